@@ -0,0 +1,133 @@
+import argparse
+import gc
+import os
+import sys
+import tracemalloc
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.controller import FrictionController
+from utils.metrics import TrialMetrics
+from utils.realtime import TickLog
+from utils.slip_detector import SlipDetector
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Iterator objects and float free-list misses stay well below this; one NumPy temporary does not
+TRANSIENT_BUDGET = 256  # bytes in flight during one tick
+RETAINED_BUDGET = 64    # bytes kept over the whole audited run
+GEN0_BUDGET = 8         # container objects kept over the whole run; keeping one per tick adds thousands
+
+
+def calibrated_controller(**kwargs):
+    coeffs = np.load(os.path.join(ROOT, "assets/servo_model_coeffs.npy"))
+    controller = FrictionController(coeffs[:7], **kwargs)
+    controller.reset(0.0)
+    now = 0.0
+    while not controller.calibrated:
+        now += 0.02
+        controller.step(4.0, now)
+    return controller, now
+
+
+def audit(name, tick, ticks=2000, warmup=500, settle=10):
+    """Run tick(i) under tracemalloc with the collector disabled, the way --realtime runs the loop.
+
+    Reports the largest allocation in flight during one tick, the memory
+    retained over the audited ticks and the growth of the generation-0
+    counter (container objects kept alive, what eventually triggers a
+    collection). The first `settle` traced ticks only prime tracemalloc and
+    the audit loop itself and are not counted.
+    """
+    for i in range(warmup):
+        tick(i)
+    gc.collect()
+    gc.disable()
+    tracemalloc.start()
+    get, reset_peak = tracemalloc.get_traced_memory, tracemalloc.reset_peak
+    worst = retained = gen0 = 0
+    try:
+        for i in range(warmup, warmup + settle + ticks):
+            if i == warmup + settle:
+                worst = retained = 0
+                gen0 = gc.get_count()[0]
+            before = get()[0]
+            reset_peak()
+            tick(i)
+            after, peak = get()
+            worst = max(worst, peak - before)
+            retained += after - before
+        gen0 = gc.get_count()[0] - gen0
+    finally:
+        tracemalloc.stop()
+        gc.enable()
+    ok = worst <= TRANSIENT_BUDGET and retained <= RETAINED_BUDGET and gen0 <= GEN0_BUDGET
+    print(f"{name:<34} in flight {worst:>6} B  retained {retained:>6} B  gen0 {gen0:>+5d}  {'ok' if ok else 'FAIL'}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fail if a control tick allocates (tracemalloc audit).")
+    parser.add_argument("--ticks", type=int, default=2000)
+    args = parser.parse_args()
+
+    n = 510 + args.ticks
+    positions = (4.0 + 0.05 * np.sin(np.linspace(0, 20, n))).tolist()
+    results = []
+
+    for horizon in (0, 3):
+        controller, now = calibrated_controller(prediction_horizon=horizon)
+        times = [now + 0.02 * (i + 1) for i in range(n)]
+
+        def step(i, controller=controller, times=times):
+            controller.step(positions[i], times[i])
+            controller.released = False
+
+        results.append(audit(f"controller.step (horizon {horizon})", step, args.ticks))
+
+    # AdaptiveRate idling: each tick spans five model steps
+    controller, now = calibrated_controller()
+    controller.multi_step = True
+    times = [now + 0.1 * (i + 1) for i in range(n)]
+
+    def step(i):
+        controller.step(positions[i], times[i])
+        controller.released = False
+
+    results.append(audit("controller.step (100 ms ticks)", step, args.ticks))
+
+    # Noise-like readings around the stick position: the detector runs without firing (and restarting)
+    jitter = (4.0 + 0.01 * np.sin(2.3 * np.arange(n))).tolist()
+    controller, now = calibrated_controller(slip_detector=SlipDetector())
+    times = [now + 0.02 * (i + 1) for i in range(n)]
+
+    def step(i):
+        controller.step(jitter[i], times[i])
+        controller.sliding = controller.released = False
+
+    results.append(audit("controller.step (CUSUM slip)", step, args.ticks))
+
+    controller, now = calibrated_controller()
+    times = [now + 0.02 * (i + 1) for i in range(n)]
+    offsets = [0.02 * (i + 1) for i in range(n)]
+    metrics = TrialMetrics()
+    log = TickLog(["t", "v", "hv", "desired", "rendered", "error", "sliding"], capacity=n)
+
+    def tick(i):
+        # friction_render.py --realtime minus the hardware
+        c = controller
+        c.compute_command(positions[i], times[i])
+        c.finish_tick()
+        c.released = False
+        metrics.update_from(c, offsets[i])
+        log.append(offsets[i], c.velocity, c.velocity + c.motorVelocity, c.frictionForce, c.detectedForce, c.error_percent,
+                   c.sliding)
+
+    results.append(audit("tick (controller + metrics + log)", tick, args.ticks))
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
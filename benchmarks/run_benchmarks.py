@@ -0,0 +1,529 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.controller import FrictionController
+from utils.device_daemon import DeviceClient, DeviceDaemon, StubBackend
+from utils.effects import SCENES, make_scene
+from utils.emulator import ADS1115Emulator, FakeI2CBus, FakeLgpio, FakePwmSysfs, VirtualClock
+from utils.fast_ads1115 import FastADS1115
+from utils.HighPassFilter import HighPassFilter
+from utils.multiaxis import MultiAxisFrictionController
+from utils.params import LIVE_PARAMS, ParameterBlock
+from utils.pot_calibration import PotCalibration
+from utils.simulation import FakePot, FakeServo, SpringServoPlant, hand_push_release
+from utils.stepper import StepperActuator
+from utils.texture import ridges
+from utils.tof_calibration import ToFTable
+from utils.trial_index import TrialIndex
+from utils.tools import read_potentialmeter, read_smoothed_position
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+BENCHMARKS = {}
+
+
+def benchmark(name, ops=1):
+    """Register a benchmark. The decorated function does the setup and returns
+    a zero-argument callable that performs `ops` operations per call."""
+    def register(setup):
+        BENCHMARKS[name] = (setup, ops)
+        return setup
+    return register
+
+
+def load_model_coeffs():
+    return np.load(os.path.join(ROOT, "assets/servo_model_coeffs.npy"))
+
+
+def calibrated_controller(coeffs, **kwargs):
+    """A controller driven through init and calibration so step() exercises the control path."""
+    controller = FrictionController(coeffs[:7], **kwargs)
+    controller.reset(0.0)
+    now = 0.0
+    position = 4.0
+    while not controller.calibrated:
+        now += 0.02
+        controller.step(position, now)
+    return controller, now
+
+
+# === Controller ===
+
+@benchmark("controller.step", ops=1000)
+def bench_controller_step():
+    controller, now = calibrated_controller(load_model_coeffs())
+    positions = 4.0 + 0.05 * np.sin(np.linspace(0, 20, 1000))
+    positions = positions.tolist()
+    state = {"now": now}
+
+    def run():
+        t = state["now"]
+        for p in positions:
+            t += 0.02
+            controller.step(p, t)
+            controller.released = False
+        state["now"] = t
+    return run
+
+
+def multiaxis_step_benchmark(n_axes):
+    def setup():
+        controller = MultiAxisFrictionController(load_model_coeffs()[:7], n_axes=n_axes)
+        now = 0.0
+        while not controller.calibrated:
+            now += 0.02
+            controller.step(np.full(n_axes, 4.0), now)
+        phases = np.linspace(0, np.pi, n_axes)
+        positions = 4.0 + 0.05 * np.sin(np.linspace(0, 20, 1000)[:, None] + phases)
+        state = {"now": now}
+
+        def run():
+            t = state["now"]
+            for p in positions:
+                t += 0.02
+                controller.step(p, t)
+                controller.released = False
+            state["now"] = t
+        return run
+    return setup
+
+
+for _n in (1, 2, 4):
+    benchmark(f"multiaxis.step.{_n}_axes", ops=1000)(multiaxis_step_benchmark(_n))
+
+
+def scene_step_benchmark(name):
+    def setup():
+        controller, now = calibrated_controller(load_model_coeffs(), effects=make_scene(name))
+        positions = (4.0 + 0.05 * np.sin(np.linspace(0, 20, 1000))).tolist()
+        state = {"now": now}
+
+        def run():
+            t = state["now"]
+            for p in positions:
+                t += 0.02
+                controller.step(p, t)
+                controller.handle_position = p * 5  # sweep the scene
+                controller.released = False
+            state["now"] = t
+        return run
+    return setup
+
+
+# Tick cost per scene: the fused effect function should keep it flat in the number of effects
+for _name in SCENES:
+    benchmark(f"scene.{_name}.step", ops=1000)(scene_step_benchmark(_name))
+
+
+def scene_force_benchmark(fused):
+    def setup():
+        scene = make_scene("workbench")
+        force = scene.compile() if fused else scene.force
+        xs = np.linspace(0, 40, 1000).tolist()
+
+        def run():
+            for x in xs:
+                force(x, 1.0, 1.0)
+        return run
+    return setup
+
+
+benchmark("scene.workbench.force_fused", ops=1000)(scene_force_benchmark(True))
+benchmark("scene.workbench.force_interpreted", ops=1000)(scene_force_benchmark(False))
+
+
+@benchmark("params.poll.unchanged", ops=1000)
+def bench_params_poll():
+    controller = FrictionController(load_model_coeffs()[:7])
+    path = os.path.join("/dev/shm" if os.path.isdir("/dev/shm") else ROOT, f"bench_params_{os.getpid()}")
+    block = ParameterBlock(path, initial={name: getattr(controller, name) for name in LIVE_PARAMS})
+
+    def run():
+        for _ in range(1000):
+            block.poll(controller)
+
+    def cleanup():
+        block.close()
+        os.remove(path)
+    run.cleanup = cleanup
+    return run
+
+
+# === Filters and friction models (cost per sample) ===
+
+@benchmark("filter.low_pass", ops=1000)
+def bench_low_pass():
+    samples = np.random.default_rng(0).normal(4.0, 0.01, 1000).tolist()
+    alpha = 0.7
+
+    def run():
+        last = samples[0]
+        for x in samples:
+            last = alpha * x + (1 - alpha) * last
+    return run
+
+
+@benchmark("filter.high_pass", ops=1000)
+def bench_high_pass():
+    samples = np.random.default_rng(0).normal(4.0, 0.01, 1000).tolist()
+    hpf = HighPassFilter(cutoff_freq=5.0, dt=0.02)
+
+    def run():
+        for x in samples:
+            hpf.apply(x)
+    return run
+
+
+@benchmark("friction.karnopp", ops=1000)
+def bench_karnopp():
+    controller = FrictionController(load_model_coeffs()[:7])
+    flags = [bool(i % 2) for i in range(1000)]
+
+    def run():
+        for flag in flags:
+            controller.sliding = flag
+            controller.friction_force()
+    return run
+
+
+@benchmark("friction.texture_lookup", ops=1000)
+def bench_texture_lookup():
+    texture = ridges()
+    positions = np.random.default_rng(0).uniform(0, 60, 1000).tolist()
+
+    def run():
+        for x in positions:
+            texture.lookup(x)
+    return run
+
+
+@benchmark("model.motor_velocity", ops=1000)
+def bench_motor_velocity():
+    coeffs = load_model_coeffs()[:7]
+    history = [0.5 * i for i in range(7)]
+
+    def run():
+        for _ in range(1000):
+            np.dot(coeffs, history[::-1])
+    return run
+
+
+# === Conversions ===
+
+@benchmark("read_potentialmeter.scalar", ops=1000)
+def bench_read_potentialmeter_scalar():
+    raws = list(range(0, 32000, 32))
+
+    def run():
+        for raw in raws:
+            read_potentialmeter(raw)
+    return run
+
+
+@benchmark("read_potentialmeter.array_100k", ops=100_000)
+def bench_read_potentialmeter_array():
+    raws = np.random.default_rng(0).integers(0, 32767, 100_000)
+
+    def run():
+        read_potentialmeter(raws)
+    return run
+
+
+@benchmark("pot_calibration.position.scalar", ops=1000)
+def bench_pot_calibration_scalar():
+    calibration = PotCalibration.nominal()
+    raws = list(range(0, 32000, 32))
+
+    def run():
+        for raw in raws:
+            calibration.position(raw)
+    return run
+
+
+@benchmark("pot_calibration.position.array_100k", ops=100_000)
+def bench_pot_calibration_array():
+    calibration = PotCalibration.nominal()
+    raws = np.random.default_rng(0).integers(0, 32767, 100_000)
+
+    def run():
+        calibration.position_array(raws)
+    return run
+
+
+@benchmark("read_smoothed_position.fake_pot")
+def bench_read_smoothed_position():
+    pot = FakePot(SpringServoPlant(load_model_coeffs(), noise_std=0.01, seed=0))
+
+    def run():
+        read_smoothed_position(pot)
+    return run
+
+
+# === ADC driver overhead (emulated chip, virtual bus time, so only CPU cost is measured) ===
+
+@benchmark("fast_ads1115.value.emulated", ops=1000)
+def bench_fast_ads1115_value():
+    clock = VirtualClock()
+    bus = FakeI2CBus(ADS1115Emulator(inputs={0: 1.65}, clock=clock), frequency=400_000, clock=clock)
+    adc = FastADS1115(dev=bus.open_dev(0x48))
+
+    def run():
+        for _ in range(1000):
+            adc.value
+    return run
+
+
+@benchmark("fast_ads1115.read_into.emulated", ops=1000)
+def bench_fast_ads1115_read_into():
+    clock = VirtualClock()
+    bus = FakeI2CBus(ADS1115Emulator(inputs={0: 1.65}, clock=clock), frequency=400_000, clock=clock)
+    adc = FastADS1115(dev=bus.open_dev(0x48))
+    out = np.zeros(1000, dtype=np.int16)
+
+    def run():
+        adc.read_into(out)
+    return run
+
+
+# === Actuator writes ===
+
+@benchmark("pi5RC.set_pwm.fake_sysfs", ops=1000)
+def bench_pi5rc_write():
+    sysfs = FakePwmSysfs(poll_interval=0.05)
+    servos = [sysfs.make_servo(18)]
+    pulses = [500 + (i * 7) % 1900 for i in range(1000)]
+
+    def run():
+        servo = servos[0]
+        for pulse in pulses:
+            servo.set_pwm(pulse)
+
+    def cleanup():
+        servos.clear()  # pi5RC.__del__ unexports while the fake tree still exists
+        sysfs.close()
+    run.cleanup = cleanup
+    return run
+
+
+@benchmark("pwm_group.set_many.fake_sysfs", ops=1000)
+def bench_pwm_group_write():
+    sysfs = FakePwmSysfs(poll_interval=0.05)
+    groups = [sysfs.make_group([18, 19])]
+    pulses = [(500 + (i * 7) % 1900, 2400 - (i * 7) % 1900) for i in range(1000)]
+
+    def run():
+        group = groups[0]
+        for pair in pulses:
+            group.set_pwm_many(pair)
+
+    def cleanup():
+        groups.clear()
+        sysfs.close()
+    run.cleanup = cleanup
+    return run
+
+
+@benchmark("stepper.set.fake_lgpio", ops=100)
+def bench_stepper_set():
+    clock = VirtualClock()
+    actuator = StepperActuator(lgpio_module=FakeLgpio(clock=clock, queue_size=10**9), clock=clock)
+    angles = [20 + 5 * np.sin(i / 5) for i in range(100)]
+
+    def run():
+        for angle in angles:
+            actuator.set(angle)
+            clock.advance(0.02)
+        actuator.lgpio.schedule.clear()
+        actuator.lgpio.waves.clear()
+    return run
+
+
+@benchmark("tof_table.correct.scalar", ops=1000)
+def bench_tof_table_correct():
+    rng = np.random.default_rng(0)
+    table = ToFTable.fit("VL6180", "15", np.repeat([10.0, 25.0, 50.0, 100.0], 50),
+                         np.repeat([34.0, 44.0, 63.0, 99.0], 50) + rng.normal(0, 1.5, 200))
+    readings = rng.integers(30, 110, 1000).tolist()
+    correct = table.correct
+
+    def run():
+        for raw in readings:
+            correct(raw)
+    return run
+
+
+# === Trial index ===
+
+@benchmark("trial_index.query.30k", ops=1)
+def bench_trial_index_query():
+    """Parameter query over 30,000 indexed trials (about 150 match)."""
+    rng = np.random.default_rng(0)
+    index = TrialIndex(":memory:")
+    for i in range(30_000):
+        index.upsert(f"logs/session_{i // 100:04d}/trial_{i % 100 + 1:04d}.csv", {
+            "trial": i % 100, "start_time": float(i), "maxStaticFriction": float(rng.choice([0.6, 0.7, 0.8, 0.9])),
+            "Kd": float(rng.choice([0.0, 0.01, 0.02, 0.03, 0.05])), "stick_rms_error_N": float(rng.uniform(0, 0.1))})
+    index.db.commit()
+
+    def run():
+        index.query("stick_rms_error_N<0.01", Kd=0.02, maxStaticFriction=0.8)
+    run.cleanup = index.close
+    return run
+
+
+@benchmark("device_daemon.read.stub", ops=1000)
+def bench_device_daemon_read():
+    """Round trip of one ADC read through a stub-backed daemon (a thin client's per-sample cost)."""
+    path = os.path.join("/dev/shm" if os.path.isdir("/dev/shm") else "/tmp", f"bench_device_{os.getpid()}.sock")
+    daemon = DeviceDaemon(StubBackend(), path).start()
+    pot = DeviceClient(path).pot(0)
+
+    def run():
+        for _ in range(1000):
+            pot.value
+
+    def cleanup():
+        pot.client.close()
+        daemon.close()
+    run.cleanup = cleanup
+    return run
+
+
+# === End to end ===
+
+@benchmark("simulated_tick", ops=500)
+def bench_simulated_tick():
+    coeffs = load_model_coeffs()
+    plant = SpringServoPlant(coeffs, hand=hand_push_release, noise_std=0.01, seed=0)
+    pot = FakePot(plant)
+    servo = FakeServo(plant)
+    controller = FrictionController(coeffs[:7])
+
+    def run():
+        controller.reset(0.0)
+        plant.time = 0.0
+        now = 0.0
+        for _ in range(500):
+            plant.advance(0.02)
+            now += 0.02
+            angle = controller.compute_command(read_potentialmeter(pot.value), now)
+            if angle is None:
+                continue
+            servo.set(angle)
+            controller.finish_tick()
+            controller.released = False
+    return run
+
+
+def measure(fn, ops, repeat=5, min_time=0.2):
+    """Best-of-`repeat` time per operation, each repeat running for at least min_time."""
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+        number *= 2 if elapsed == 0 else max(2, int(min_time / elapsed * 1.2))
+    best = elapsed
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        best = min(best, time.perf_counter() - start)
+    ns_per_op = best / (number * ops) * 1e9
+    return {"ns_per_op": ns_per_op, "ops_per_s": 1e9 / ns_per_op}
+
+
+def run_all(pattern=None, repeat=5, min_time=0.2):
+    results = {}
+    for name, (setup, ops) in BENCHMARKS.items():
+        if pattern and pattern not in name:
+            continue
+        fn = setup()
+        try:
+            results[name] = measure(fn, ops, repeat=repeat, min_time=min_time)
+        finally:
+            if hasattr(fn, "cleanup"):
+                fn.cleanup()
+        print(f"{name:<36} {results[name]['ns_per_op']:>12.1f} ns/op {results[name]['ops_per_s']:>14.0f} ops/s")
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Return the names whose ns/op grew by more than `tolerance` over the baseline."""
+    regressions = []
+    print(f"\n{'benchmark':<36} {'baseline':>12} {'current':>12} {'change':>8}")
+    for name, stats in results.items():
+        if name not in baseline:
+            print(f"{name:<36} {'-':>12} {stats['ns_per_op']:>12.1f} {'new':>8}")
+            continue
+        old = baseline[name]["ns_per_op"]
+        change = stats["ns_per_op"] / old - 1
+        flag = "  REGRESSION" if change > tolerance else ""
+        print(f"{name:<36} {old:>12.1f} {stats['ns_per_op']:>12.1f} {change:>+8.1%}{flag}")
+        if change > tolerance:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hardware-free benchmarks for the friction rendering stack.")
+    parser.add_argument("-k", "--filter", default=None, help="only run benchmarks whose name contains this")
+    parser.add_argument("--output", default="bench_results.json", help="where to write this run's results")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline JSON to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown before failing (0.2 = 20%%)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.2)
+    args = parser.parse_args()
+
+    results = run_all(args.filter, repeat=args.repeat, min_time=args.min_time)
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "node": platform.node(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nSaved results to {args.output}")
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved baseline to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --save-baseline on the reference rig first.")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline["meta"].get("machine") != report["meta"]["machine"]:
+        print(f"Warning: baseline was recorded on {baseline['meta'].get('machine')}, "
+              f"this run is on {report['meta']['machine']}")
+    regressions = compare(results, baseline["results"], args.tolerance)
+    if regressions:
+        print(f"\n{len(regressions)} benchmark(s) regressed by more than {args.tolerance:.0%}: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,169 @@
+import argparse
+import errno
+import os
+import signal
+import socket
+import sys
+import tempfile
+import time
+
+from utils.device_daemon import DEFAULT_PATH, DeviceClient, DeviceDaemon, DeviceError, HardwareBackend, StubBackend
+
+
+def serve(args):
+    start = time.perf_counter()
+    channels = [int(c) for c in args.channels.split(",")]
+    pins = [int(p) for p in args.pins.split(",")]
+    backend = StubBackend(adc_channels=channels, pwm_pins=pins) if args.stub else HardwareBackend(channels, pins)
+    try:
+        daemon = DeviceDaemon(backend, args.socket)
+    except DeviceError as e:
+        backend.close()
+        sys.exit(str(e))
+    print(f"{backend.name} backend ready in {(time.perf_counter() - start) * 1000:.0f} ms: ADC channels {channels}, "
+          f"PWM pins {pins}, serving on {args.socket}")
+    print(f"Clients: FRICTION_DAEMON={args.socket} python friction_render.py (or any servo/potentiometer script)")
+    signal.signal(signal.SIGTERM, lambda *_: daemon.stop())
+    try:
+        daemon.serve()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        daemon.close()
+    return 0
+
+
+def info(args):
+    try:
+        client = DeviceClient(args.socket)
+    except DeviceError as e:
+        sys.exit(str(e))
+    with client:
+        for key, value in client.info().items():
+            print(f"{key:>14}: {value}")
+    return 0
+
+
+def monitor(args):
+    start = time.perf_counter()
+    try:
+        client = DeviceClient(args.socket)
+    except DeviceError as e:
+        sys.exit(str(e))
+    print(f"Attached in {(time.perf_counter() - start) * 1000:.1f} ms, streaming channel {args.channel} at {args.rate:g} Hz")
+    client.subscribe(args.channel, args.rate)
+    count, window_start = 0, time.time()
+    try:
+        for t, channel, raw in client.samples():
+            count += 1
+            if t - window_start >= 1.0:
+                print(f"{count / (t - window_start):6.1f} Hz  raw {raw:6d}")
+                count, window_start = 0, t
+    except KeyboardInterrupt:
+        pass
+    finally:
+        client.close()
+    return 0
+
+
+class _FlakyBackend(StubBackend):
+    """The stub with an ADC channel whose every conversion fails like a broken I2C bus."""
+
+    def read(self, channel):
+        if channel == 3:
+            raise OSError(errno.EIO, "I2C transaction failed")
+        return super().read(channel)
+
+
+def check(args):
+    """Start a stub daemon on a private socket and exercise reads, streams and the error paths."""
+    path = os.path.join(tempfile.mkdtemp(), "check.sock")
+    daemon = DeviceDaemon(_FlakyBackend(adc_channels=(0, 3)), path).start()
+    failures = []
+
+    def expect(name, ok, detail=""):
+        print(f"{'ok' if ok else 'FAIL':>4}  {name}{': ' + detail if detail else ''}")
+        if not ok:
+            failures.append(name)
+
+    def raises(call):
+        try:
+            call()
+        except DeviceError as e:
+            return str(e)
+        return None
+
+    def drained(client):
+        # Nothing left in the socket: every reply was consumed by the request it belongs to
+        try:
+            client.sock.recv(4096, socket.MSG_DONTWAIT)
+        except (BlockingIOError, socket.timeout):
+            return not client.pending
+        return False
+
+    try:
+        with DeviceClient(path) as client, DeviceClient(path) as other:
+            raw = client.read(0)
+            expect("read", isinstance(raw, int) and 0 <= raw <= 32767, f"raw {raw}")
+            error = raises(lambda: client.read(7))
+            expect("read of an unserved channel raises", error is not None, error or "")
+            expect("read after an error", isinstance(client.read(0), int) and drained(client))
+
+            client.enable(99, True)
+            client.set_pwm(99, 1500)
+            raw = client.read(0)
+            expect("late errors of fire-and-forget commands stay out of the next read",
+                   len(client.errors) == 2 and drained(client), f"{list(client.errors)}")
+
+            error = raises(lambda: client.read(3))
+            expect("backend OSError fails the request", error is not None and "I2C" in error, error or "")
+            expect("daemon keeps serving after a backend OSError", isinstance(other.read(0), int))
+
+            rate, count = 200.0, 40
+            client.subscribe(0, rate)
+            start, samples = None, client.samples()
+            for k, (t, channel, raw) in zip(range(count), samples):
+                start = t if start is None else start
+            measured = (count - 1) / (t - start)
+            client.subscribe(0, 0)
+            expect("subscribe streams at the requested rate", abs(measured - rate) < 0.2 * rate,
+                   f"{measured:.0f} Hz for {rate:.0f} Hz")
+            expect("reads still answered while a stream runs", isinstance(other.read(0), int))
+
+            client.subscribe(7, 50.0)
+            error = raises(lambda: next(client.samples()))
+            expect("subscribe to an unserved channel raises", error is not None, error or "")
+
+            info = other.info()
+            expect("info counts the errors", info["errors"] >= 5, f"{info['errors']} errors, "
+                   f"{info['requests']} requests, {info['samples_sent']} samples sent")
+    finally:
+        daemon.close()
+    print("device daemon check " + ("passed" if not failures else f"failed: {', '.join(failures)}"))
+    return 1 if failures else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Resident device daemon: owns the ADS1115 and PWM channels and "
+                                                 "serves them to scripts over a Unix socket.")
+    parser.add_argument("--socket", default=DEFAULT_PATH)
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("serve", help="open the hardware once and serve it until stopped")
+    p.add_argument("--channels", default="0", help="ADS1115 channels to serve")
+    p.add_argument("--pins", default="18", help="PWM GPIO pins to serve")
+    p.add_argument("--stub", action="store_true", help="serve a simulated spring/servo plant instead of the hardware")
+    p.set_defaults(func=serve)
+    p = sub.add_parser("info", help="print the daemon's backend, clients and counters")
+    p.set_defaults(func=info)
+    p = sub.add_parser("monitor", help="attach to a running session and print the sample rate and raw value")
+    p.add_argument("--channel", type=int, default=0)
+    p.add_argument("--rate", type=float, default=50.0, help="samples per second")
+    p.set_defaults(func=monitor)
+    p = sub.add_parser("check", help="exercise a stub daemon on a private socket: reads, streams and error replies")
+    p.set_defaults(func=check)
+    args = parser.parse_args()
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,12 @@
+import argparse
+import sys
+
 import numpy as np
-import pandas as pd
 import matplotlib.pyplot as plt
 
+from utils.lod import LogLOD
+from utils.trial_index import latest_log
+
 # Set global font sizes
 plt.rcParams.update({
     "font.family": "Times New Roman",
@@ -16,29 +21,61 @@ plt.rcParams.update({
     "mathtext.it": "Times New Roman:italic",          # Italic
     "mathtext.bf": "Times New Roman:bold"             # Bold
 })
-# Load the CSV file
-csv_path = "logs/force_error_log_h_final_5.csv"
-df = pd.read_csv(csv_path)
+parser = argparse.ArgumentParser(description="Plot desired vs. rendered force, force error and force against velocity of one trial log.")
+parser.add_argument("log", nargs="*", default=["logs/force_error_log_h_final_5.csv"],
+                    help="a CSV log, or trial index filters such as Kd=0.02 maxStaticFriction=0.8 "
+                         "(plots the newest matching trial, see trials.py)")
+parser.add_argument("--start", type=float, help="first second of the log to plot (default: the beginning)")
+parser.add_argument("--end", type=float, help="last second of the log to plot (default: the end)")
+parser.add_argument("--interaction", type=float, default=4.53,
+                    help="log time (s) of the user-interaction marker; the paper figure is --start 2.6 --end 7.9")
+args = parser.parse_args()
+
+# Load the CSV file through its level-of-detail cache (built on first use, next to the log)
+if len(args.log) == 1 and args.log[0].endswith(".csv"):
+    csv_path = args.log[0]
+else:
+    csv_path = latest_log(*args.log)
+    if csv_path is None:
+        sys.exit(f"No indexed trial matches {' '.join(args.log)}")
+    print(f"Plotting {csv_path}")
+t_start, t_end = args.start, args.end
+max_points = 2000       # points per line, about one per pixel column at 300 dpi
+scatter_limit = 20000   # above this many rows the velocity plots become 2-D histograms
+
+v_edges = np.logspace(np.log10(0.01), np.log10(22), 121)
+lod = LogLOD.for_csv(csv_path, hists={
+    "force_by_v": ("Handler Velocity", "Rendered Force", v_edges, np.linspace(0, 1, 101), -1),
+    "error_by_v": ("Handler Velocity", "Percentage of Error", v_edges, np.linspace(-100, 100, 101), -1),
+})
+i0, i1 = lod.rows(t_start, t_end)
+scatter = i1 - i0 <= scatter_limit
+t0 = float(lod.time[i0]) if t_start is None else t_start
+
+interaction_time = args.interaction - t0
 
-interaction_time = 1.93
 
-df = df[df["Time (s)"] > 2.6].copy()
+def line(column):
+    # Reset time to start from zero
+    t, y = lod.line(column, t_start, t_end, max_points)
+    return t - t0, y
 
-df = df[df["Time (s)"] < 7.9].copy()
 
-# Reset time to start from zero
-df["Time (s)"] = df["Time (s)"] - 2.6
+def hist_mesh(ax, name):
+    counts, x_edges, y_edges = lod.hist2d(name, t_start, t_end)
+    masked = np.ma.masked_equal(counts.T, 0)
+    return ax.pcolormesh(x_edges, y_edges, masked, cmap="viridis", norm="log")
 
 # --- Plot 1: Desired vs Rendered Force ---
 fig1, ax1 = plt.subplots(figsize=(8, 5))
-ax1.plot(df["Time (s)"], df["Desired force"], label="Karnopp Model", linestyle='--')
+ax1.plot(*line("Desired force"), label="Karnopp Model", linestyle='--')
 
 ax1.axvline(x=interaction_time, color='gray', linestyle='--', linewidth=1, label="User Interaction")
 
 ax1.set_ylim(0, 1)  # Set x-axis limits from 0 to 1
 
 ax1.grid(axis='y', linestyle='--', linewidth=0.5, alpha=0.6)
-ax1.plot(df["Time (s)"], df["Rendered Force"], label="Rendered Force")
+ax1.plot(*line("Rendered Force"), label="Rendered Force")
 ax1.set_xlabel("Time (s)")
 ax1.set_title("Force (N)", loc="left")
 ax1.legend()
@@ -53,7 +90,7 @@ plt.savefig("results/figs/force_plot.png", dpi=300)
 
 # --- Plot 2: Percentage of Error ---
 fig2, ax2 = plt.subplots(figsize=(8, 5))
-ax2.plot(df["Time (s)"], df["Percentage of Error"], label="Difference (%)", color='red')
+ax2.plot(*line("Percentage of Error"), label="Difference (%)", color='red')
 
 ax2.axvline(x=interaction_time, color='gray', linestyle='--', linewidth=1, label="User Interaction")
 
@@ -76,15 +113,18 @@ for spine in ["top", "right"]:
 plt.tight_layout()
 plt.savefig("results/figs/error_plot.png", dpi=300)
 
-df['Handler Velocity'] = -df['Handler Velocity']
-df['Calculated Desired Force'] = df['Handler Velocity'].apply(lambda v: 0.8 if v < 0.2 else 0.4)
+if scatter:
+    _, handler_velocity = lod.window("Handler Velocity", t_start, t_end)
+    handler_velocity = -handler_velocity
 
 
 fig3, ax3 = plt.subplots(figsize=(8, 5))
 ax3.plot([0, 0.2], [0.8, 0.8], color='#1f77b4', linestyle='--', linewidth=1, label="Friction Reference")
 ax3.plot([0.2, 100], [0.4, 0.4], color='#1f77b4', linestyle='--', linewidth=1)
-# ax3.scatter(df['Handler Velocity'], df['Calculated Desired Force'], label='Karnopp Model', alpha=0.7, linestyle='--')
-ax3.scatter(df['Handler Velocity'], df['Rendered Force'], color='#ff7f0e', marker='x', s=20, label='Rendered Force', alpha=0.7)
+if scatter:
+    ax3.scatter(handler_velocity, lod.window("Rendered Force", t_start, t_end)[1], color='#ff7f0e', marker='x', s=20, label='Rendered Force', alpha=0.7)
+else:
+    fig3.colorbar(hist_mesh(ax3, "force_by_v"), ax=ax3, label="Samples")
 
 ax3.axvline(x=0.2, color='gray', linestyle='--', linewidth=1, label="Stick to slip")
 
@@ -109,7 +149,10 @@ plt.tight_layout()
 plt.savefig("results/figs/force_by_v.png", dpi=300)
 
 fig4, ax4 = plt.subplots(figsize=(8, 5))
-ax4.scatter(df['Handler Velocity'], df['Percentage of Error'],  marker='x', s=20, color='red', alpha=0.7, label='Percentage of Difference (%)')
+if scatter:
+    ax4.scatter(handler_velocity, lod.window("Percentage of Error", t_start, t_end)[1],  marker='x', s=20, color='red', alpha=0.7, label='Percentage of Difference (%)')
+else:
+    fig4.colorbar(hist_mesh(ax4, "error_by_v"), ax=ax4, label="Samples")
 
 ax4.axvline(x=0.2, color='gray', linestyle='--', linewidth=1, label="Stick to slip")
 tick_locs = [0.01, 0.1, 0.2, 1, 10, 22]
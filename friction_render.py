@@ -1,29 +1,71 @@
+import argparse
+import hashlib
 import os
 import time
-import board
-import busio
 import numpy as np
-import adafruit_ads1x15.ads1115 as ADS
-from adafruit_ads1x15.analog_in import AnalogIn
 import joblib
 
-from utils.pi5RC import pi5RC
+from utils.adaptive_rate import AdaptiveRate
+from utils.controller import TUNABLE_GAINS, FrictionController, load_controller_gains
+from utils.effects import make_scene
+from utils.fast_ads1115 import open_potentiometer
+from utils.metrics import TrialMetrics
+from utils.params import LIVE_PARAMS, ParameterBlock
+from utils.pi5RC import open_servo
+from utils.pot_calibration import load_pot_calibration
+from utils.profiler import make_profiler
+from utils.realtime import TickLog, gc_pause, gc_resume
+from utils.servo_fit import load_model_history
+from utils.slip_detector import load_slip_detector
+from utils.stepper import StepperActuator
+from utils.texture import make_texture
 from utils.tools import *
-import csv
 
 
 
+parser = argparse.ArgumentParser(description="Render Karnopp stick/slip friction on the grounded haptic device.")
+parser.add_argument("--trials", type=int, default=1,
+                    help="trials per session; with more than one the ADC and PWM stay open and the controller re-arms")
+parser.add_argument("--rearm-delay", type=float, default=2.0, help="pause after a slip release (s)")
+parser.add_argument("--log-dir", default="logs")
+parser.add_argument("--realtime", action="store_true",
+                    help="no per-tick printing and the garbage collector paused during trials (collected between them)")
+parser.add_argument("--live-params", action="store_true",
+                    help="expose the controller parameters in a shared block; change them with tuning/live_params.py")
+parser.add_argument("--device-id", help="potentiometer label given to potentialmeter_read/pot_lut_calibrate.py; "
+                                          "selects its calibration and rejects one made for another device")
+parser.add_argument("--pot-calibration",
+                    help="lookup tables from potentialmeter_read/pot_lut_calibrate.py (default: "
+                         "assets/pot_calibration_<device-id>.npz, then assets/pot_calibration.npz, "
+                         "nominal mapping if missing)")
+parser.add_argument("--cusum-slip", type=float, metavar="FALSE_ALARMS_PER_HOUR",
+                    help="detect slip and release with CUSUM statistics designed for this false-alarm rate "
+                         "(see tuning/slip_eval.py) instead of the single-tick thresholds")
+parser.add_argument("--scene", help="haptic effects on top of the friction: a scene name (see utils/effects.py) "
+                                      "or a scene .json file")
+parser.add_argument("--adaptive-rate", type=float, metavar="IDLE_HZ",
+                    help="drop to this control rate while the handle is untouched and return to full rate on contact")
+parser.add_argument("--texture", help="friction texture: a gallery name (see utils/texture.py) or a .npz/.csv/image file")
+args = parser.parse_args()
+
+# === Profiling (set FRICTION_PROFILE=1 to time each stage of the tick) ===
+profiler = make_profiler(os.environ.get("FRICTION_PROFILE") == "1",
+                         ["adc_read", "control", "servo_set", "model", "print", "log", "sleep"])
+
 # === Hardware Setup ===
-i2c = busio.I2C(board.SCL, board.SDA)
-ads = ADS.ADS1115(i2c)
-pot = AnalogIn(ads, ADS.P0)
-servo = pi5RC(18)  # GPIO18 with working PWM2 on pwmchip2
+pot = open_potentiometer()  # FRICTION_FAST_ADC=1 reads the ADS1115 directly in continuous mode, FRICTION_DAEMON=1 through the device daemon
+if os.environ.get("FRICTION_ACTUATOR") == "stepper":
+    servo = StepperActuator(step_pin=21, dir_pin=20)  # linear actuator, hardware-timed step pulses
+else:
+    servo = open_servo(18, profiler=profiler if profiler.enabled else None)  # GPIO18 with working PWM2 on pwmchip2
 # static_model = joblib.load('assets/servo_speed_static.pkl')
 # continues_model = joblib.load('assets/servo_speed_continues.pkl')
 
-affective_history = 7
+# History length cross-validated by servo_control/servo_model_fit.py, 7 ticks before any such fit
+affective_history = load_model_history("assets/servo_model_fit.json")
 model_coeffs = np.load("assets/servo_model_coeffs.npy")
 model_coeffs = model_coeffs[:affective_history]
+model_version = hashlib.sha1(model_coeffs.tobytes()).hexdigest()[:12]  # recorded with every trial
 
 
 # === Constants ===
@@ -32,6 +74,10 @@ angle_to_distance = -0.18  # mm per degree
 angularSpeed = 600  # degrees/s
 gear_diameter = 22.0  # mm
 spring_rate = 0.16
+# Raw ADC code -> position through the device's calibration tables (one list index per tick)
+pot_calibration = load_pot_calibration(args.pot_calibration, device_id=args.device_id, spring_rate=spring_rate)
+spring_rate = pot_calibration.spring_rate
+print(f"Potentiometer calibration: {pot_calibration.device_id}")
 
 max_angle = 180
 pwm_range = (500, 2400)
@@ -45,171 +91,160 @@ Kp, Ki, Kd = 0.8, 0, 0.02
 alpha = 0.7  # smoothing factor for low-pass filter
 pot_fluc = 0.012
 high_pass_alpha = 0.3
+prediction_horizon = 0  # ticks of servo-delay compensation (0 = off, see tuning/latency_eval.py)
 
-try:
-    # while True:
-    for i in range(1):
-
-        # === State Variables ===
-        lastSmoothedPosition = None  # to be initialized with first reading
-        integral = 0
-        previous_error = 0
-        servoBaseAngle = 0
-        detectedForce = 0
-        calibrated = False
-        sliding = False
-        lastTargetPosition = 0
-        targetPosition = 0
-        positionChange = 0
-        last_angle_change = 0
-        cold_start = True
-        pid_scale_factor = 1
-        external_velocity = 0
-
-        motorVelocity_history = [0 for _ in range(affective_history)]
-
-        log_list = []
-
-        servo.set(0, angle_range=max_angle, pulse_range=pwm_range)
-        time.sleep(1)
-
-        start_time = time.time()
-        last_time = start_time
-
-        while True:
-            now = time.time()
-            dt = now - last_time
-            last_time = now
+# Gains from tuning/autotune.py override the hand-tuned ones when present
+gains = dict(Kp=Kp, Ki=Ki, Kd=Kd)
+gains.update(load_controller_gains("assets/controller_gains.json"))
 
-            # === Read and smooth position ===
-            raw_val = pot.value  # 0–32767
-            position = read_potentialmeter(raw_val)
-
-            if lastSmoothedPosition is None:
-                smoothedPosition = position
-            else:
-                smoothedPosition = alpha * position + (1 - alpha) * lastSmoothedPosition
-
-            # === Initialization Phase ===
-            if now - start_time < initTime:
-                targetPosition = smoothedPosition
-                lastSmoothedPosition = smoothedPosition
-                previous_error = 0
-                continue
+controller = FrictionController(model_coeffs, maxStaticFriction=maxStaticFriction, dynamicFriction=dynamicFriction,
+                                spring_rate=spring_rate, delta_v=delta_v, initTime=initTime,
+                                alpha=alpha, high_pass_alpha=high_pass_alpha, max_angle=max_angle,
+                                prediction_horizon=prediction_horizon,
+                                texture=make_texture(args.texture) if args.texture else None,
+                                slip_detector=load_slip_detector(false_alarms_per_hour=args.cusum_slip)
+                                if args.cusum_slip else None,
+                                effects=make_scene(args.scene) if args.scene else None, **gains)
 
-            # === Calibration ===
-            if not calibrated:
-                print("Calibrating...", end=" ")
-                frictionForce = 0
-                if smoothedPosition > (1.1 + 4):
-                    targetPosition = smoothedPosition - 2
-                elif smoothedPosition > (maxStaticFriction / spring_rate - 1 + 1):
-                    targetPosition = smoothedPosition - 0.3
-                elif smoothedPosition > (maxStaticFriction / spring_rate - 1 + 0.1):
-                    targetPosition = smoothedPosition - 0.1
-                elif smoothedPosition > (maxStaticFriction / spring_rate - 1 + 0.02):
-                    targetPosition = smoothedPosition - 0.01
-                elif smoothedPosition <= (maxStaticFriction / spring_rate - 1 + 0.03):
-                    calibrated = True
-                    integral = 0
-
-            else:
-                # === Control ===
-                detectedForce = (smoothedPosition + 1.1) * spring_rate
-
-                if sliding:
-                    frictionForce = dynamicFriction
-                else:
-                    frictionForce = maxStaticFriction
-
-                targetPosition = frictionForce / spring_rate - 1
-
-            # === PID ===
-            if calibrated and external_velocity > 0:
-                # if velocity - motorVelocity > delta_v:
-                targetPosition -= external_velocity * 1.2 * dt
-                if sliding:
-                    targetPosition -= external_velocity * max(external_velocity/100, 2) * dt
-            velocity = (smoothedPosition - lastSmoothedPosition) / dt
-            error = targetPosition - smoothedPosition
-            integral += error * dt
-            derivative = (error - previous_error) / dt if dt > 0 else 0
-            controlSignal = -(Kp * error * pid_scale_factor + Ki * integral + Kd * derivative)
-            controlAngle = np.clip(servoBaseAngle + controlSignal, 0, max_angle)
+# Adaptive rate: full rate while touched, IDLE_HZ while untouched (see tuning/rate_eval.py)
+rate = AdaptiveRate(active_period=0.02, idle_period=1.0 / args.adaptive_rate) if args.adaptive_rate else None
 
-            servo.set(controlAngle, angle_range=max_angle, pulse_range=pwm_range)
-            # motorVelocity = last_angle_change / dt
-            # motorVelocity = np.clip(motorVelocity, -angularSpeed, angularSpeed) * angle_to_distance
+# Live parameters: checked once per tick, see tuning/live_params.py
+params = None
+if args.live_params:
+    params = ParameterBlock(initial={name: getattr(controller, name) for name in LIVE_PARAMS})
+    print(f"Live parameters at {params.path} (python tuning/live_params.py set Kp=1.0 ...)")
 
-            # if cold_start:
-            #     motorVelocity = np.sign(last_angle_change) * min(static_model.predict([[abs(last_angle_change)]])[0], 0)
-            # else:
-            #     motorVelocity = np.sign(last_angle_change) * min(continues_model.predict([[abs(last_angle_change)]])[0], 0)
-            motorVelocity = np.dot(model_coeffs, motorVelocity_history[::-1])
 
-            external_velocity = velocity - motorVelocity
-            previous_error = error
+def trial_log_path(trial):
+    """One CSV per trial: the classic single-trial name, or one rotated file per trial in a session directory."""
+    if args.trials == 1:
+        return os.path.join(args.log_dir, "force_error_log_h_final_5.csv")
+    return os.path.join(session_dir, f"trial_{trial + 1:04d}.csv")
 
-            positionChange = high_pass_alpha * (positionChange + targetPosition - lastTargetPosition)
 
-            pid_enhance = 0
-            pid_scale_factor = 1
-            if calibrated:
-                if sliding:
-                    pid_enhance = pid_enhance + max(np.tanh(abs(positionChange)), 0.12)
-                if external_velocity > delta_v:
-                    pid_enhance = pid_enhance + np.tanh(abs(external_velocity/40))
+session_dir = os.path.join(args.log_dir, time.strftime("session_%Y%m%d_%H%M%S"))
 
-            pid_scale_factor += pid_enhance
+try:
+    for i in range(args.trials):
+
+        log_list = TickLog(["Time (s)", "Velocity", "Handler Velocity", "Desired force", "Rendered Force", "Percentage of Error",
+                            "Sliding"])
+        metrics = TrialMetrics(tolerance=0.1)
+
+        if i == 0:
+            servo.set(0, angle_range=max_angle, pulse_range=pwm_range)
+            time.sleep(1)
+            start_time = time.time()
+            controller.reset(start_time)
+        else:
+            # Hardware stays open; keep the calibration and servo position of the previous trial
+            start_time = time.time()
+            controller.rearm(start_time)
+
+        if rate is not None:
+            rate.reset()
+        cpu_start = time.process_time()
+
+        if args.realtime:
+            gc_pause()
+
+        announce_calibration = not args.realtime  # once per trial, when the calibration ladder starts
+        while True:
+            profiler.tick_start()
+            now = time.time()
 
-            error_percent = 100 * (detectedForce - frictionForce) / frictionForce if frictionForce > 0 else 0
+            # === Read position ===
+            raw_val = pot.value  # 0–32767
+            profiler.lap("adc_read")
+            position = pot_calibration.position(raw_val)
 
-            print(f"{error:.2f}, {derivative:.2f}, {controlSignal:.2f}, {controlAngle:.2f}, {targetPosition:.2f}, {smoothedPosition:.2f}, {velocity:.3f}, {motorVelocity:.3f},{external_velocity:.3f}, {frictionForce:.2f}, {detectedForce:.2f}, {error_percent:.2f}%, {dt:.5f}")
+            if announce_calibration and not controller.calibrated and now - start_time >= initTime:
+                print("Calibrating...")
+                announce_calibration = False
 
-            if calibrated and not sliding and velocity - motorVelocity > delta_v and smoothedPosition > (maxStaticFriction/spring_rate - 1.1) * 1.05:
-                sliding = True
+            controlAngle = controller.compute_command(position, now)
+            if controlAngle is None:
+                # === Initialization Phase ===
+                continue
+            profiler.lap("control")
 
-            elif calibrated and sliding and velocity < 0 and motorVelocity > velocity + 5:
-                time.sleep(2)
+            servo.set(controlAngle, angle_range=max_angle, pulse_range=pwm_range)
+            profiler.lap("servo_set")
+
+            controller.finish_tick()
+            c = controller
+            metrics.update_from(c, now - start_time)
+            period = rate.next_period(c, now) if rate is not None else 0.02
+            if params is not None and params.poll(controller) is not None:
+                print(f"\nParameters updated to version {params.version}")
+            profiler.lap("model")
+
+            if not args.realtime:
+                print(f"{c.error:.2f}, {c.derivative:.2f}, {c.controlSignal:.2f}, {controlAngle:.2f}, {c.targetPosition:.2f}, {c.smoothedPosition:.2f}, {c.velocity:.3f}, {c.motorVelocity:.3f},{c.external_velocity:.3f}, {c.frictionForce:.2f}, {c.detectedForce:.2f}, {c.error_percent:.2f}%, {c.dt:.5f}")
+            profiler.lap("print")
+
+            if controller.released:
+                time.sleep(args.rearm_delay)
                 break
 
-            angle_change = controlAngle - servoBaseAngle
-            # if angle_change * last_angle_change > 0:
-            #     # movement same angle
-            #     cold_start = False
-            # else:
-            #     cold_start = True
-            # last_angle_change = angle_change
-
-            motorVelocity_history.pop(0)
-            motorVelocity_history.append(angle_change)
-
-            servoBaseAngle = controlAngle
-            lastSmoothedPosition = smoothedPosition
-            lastTargetPosition = targetPosition
-
-            log_list.append([now-start_time, velocity, velocity + motorVelocity, frictionForce, detectedForce, error_percent])
+            log_list.append(now-start_time, c.velocity, c.velocity + c.motorVelocity, c.frictionForce, c.detectedForce, c.error_percent,
+                            c.sliding)
+            profiler.lap("log")
 
             try:
-                time.sleep(0.02 - (time.time() - last_time))  # 10ms loop (100Hz)
+                time.sleep(period - (time.time() - now))  # 20 ms loop (50 Hz), longer while idle with --adaptive-rate
             except:
                 pass
-
-        os.makedirs("logs", exist_ok=True)
-        with open("logs/force_error_log_h_final_5.csv", "w", newline="") as f:
-            writer = csv.writer(f)
-            writer.writerow(["Time (s)", "Velocity", "Handler Velocity", "Desired force", "Rendered Force", "Percentage of Error"])
-            for t, v, hv, ff, rf, e in log_list:
-                writer.writerow([t, v, hv, ff, rf, e])
-
-        print("Saved error log to logs/force_error_log_h.csv")
-        servo.set(80, angle_range=max_angle, pulse_range=pwm_range)
-        time.sleep(1)
-        del servo
-
+            profiler.lap("sleep")
+            profiler.tick_end()
+
+        # Safe point between trials
+        if args.realtime:
+            gc_resume()
+
+        log_path = trial_log_path(i)
+        os.makedirs(os.path.dirname(log_path), exist_ok=True)
+        log_list.write_csv(log_path)
+
+        print(f"Saved error log to {log_path}")
+        print(metrics.summary_line())
+        cpu_s = time.process_time() - cpu_start
+        print(f"CPU {cpu_s:.2f} s over {time.time() - start_time:.1f} s ({cpu_s / (time.time() - start_time):.1%} of a core)")
+        if rate is not None:
+            print(rate.summary_line())
+        # Friction levels the trial actually rendered: live parameters may have changed them, and a
+        # texture rewrites them as the surface moves, so textured trials log the levels at the start
+        # position (the breakaway) and the texture's range.
+        if controller.texture is not None:
+            texture = controller.texture
+            levels = dict(zip(("maxStaticFriction", "dynamicFriction"), texture.lookup(0.0)),
+                          texture_static_range=[float(texture.static.min()), float(texture.static.max())],
+                          texture_dynamic_range=[float(texture.dynamic.min()), float(texture.dynamic.max())])
+        else:
+            levels = dict(maxStaticFriction=controller.maxStaticFriction, dynamicFriction=controller.dynamicFriction)
+        metrics.write(os.path.join(args.log_dir, "trial_summaries.jsonl"), log=log_path, trial=i, start_time=start_time,
+                      texture=args.texture, **levels,
+                      delta_v=controller.delta_v, **{name: getattr(controller, name) for name in TUNABLE_GAINS},
+                      device_id=pot_calibration.device_id, model_version=model_version,
+                      model_history=affective_history, scene=args.scene, cusum_slip=args.cusum_slip,
+                      cpu_s=round(cpu_s, 3), adaptive_rate=rate.summary() if rate is not None else None,
+                      live_params=params.read()[1] if params is not None else None)
+
+    if profiler.enabled:
+        print(profiler.report())
+    servo.set(80, angle_range=max_angle, pulse_range=pwm_range)
+    time.sleep(1)
+    del servo
 
 except KeyboardInterrupt:
     print("\nExiting...")
+    if profiler.enabled:
+        print(profiler.report())
     servo.set(80, angle_range=max_angle, pulse_range=pwm_range)
     time.sleep(1)
     del servo
+
+finally:
+    if params is not None:
+        params.close(unlink=True)
@@ -1,19 +1,26 @@
-import lgpio
+import os
+import sys
 import time
 
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.stepper import StepperActuator
+
 STEP = 21
 DIR = 20
 
-h = lgpio.gpiochip_open(0)
-lgpio.gpio_claim_output(h, DIR, 1)
-lgpio.gpio_claim_output(h, STEP, 0)
-
-lgpio.gpio_write(h, DIR, 1)  # Set direction
+# One revolution (200 full steps at 1.8°) with a trapezoidal ramp, sent as one hardware-timed wave
+actuator = StepperActuator(step_pin=STEP, dir_pin=DIR, v_max=800, accel=4000, max_steps_per_command=200)
 
 print("Sending step pulses to motor...")
-for i in range(200):  # One revolution (if 1.8° per step)
-    lgpio.gpio_write(h, STEP, 1)
-    time.sleep(0.01)
+start = time.time()
+actuator.move_steps(200)
+actuator.wait()
+print(f"Forward revolution took {time.time() - start:.3f} s")
+
+time.sleep(0.5)
+actuator.move_steps(-200)
+actuator.wait()
 
-lgpio.gpiochip_close(h)
+del actuator
 print("Done")
@@ -0,0 +1,84 @@
+import argparse
+import csv
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.pot_calibration import PotCalibration, calibration_path
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+parser = argparse.ArgumentParser(description="Fit a per-device potentiometer calibration and compile its lookup tables.")
+parser.add_argument("device_id", help="label of the potentiometer (e.g. the serial number on its body)")
+parser.add_argument("--points", help="reference points from a CSV with columns raw, mm, force (force may be empty) "
+                                     "instead of measuring them")
+parser.add_argument("--samples", type=int, default=200, help="raw readings averaged per reference point")
+parser.add_argument("--raw-degree", type=int, default=3)
+parser.add_argument("--force-degree", type=int, default=2)
+parser.add_argument("--spring-rate", type=float, default=0.16, help="N/mm of the controller's linear spring model")
+parser.add_argument("--save-points", help="also write the measured reference points to this CSV")
+parser.add_argument("--output", help="default: assets/pot_calibration_<device_id>.npz")
+args = parser.parse_args()
+if args.output is None:
+    args.output = calibration_path(args.device_id, os.path.join(ROOT, "assets"))
+
+rows = []
+if args.points:
+    with open(args.points, newline="") as f:
+        for row in csv.DictReader(f):
+            rows.append((float(row["raw"]), float(row["mm"]), float(row["force"]) if row.get("force") else None))
+else:
+    from utils.fast_ads1115 import open_potentiometer
+
+    # ADS1115 channel P0 (FRICTION_FAST_ADC=1 for the direct-register driver)
+    pot = open_potentiometer()
+    print("Hold the slider at a reference position (gauge block, caliper), enter it in mm and optionally the "
+          "force gauge reading in N. Empty position to finish.")
+    while True:
+        entry = input("Position (mm) [, force (N)]: ").strip()
+        if not entry:
+            break
+        fields = [float(v) for v in entry.replace(",", " ").split()]
+        vals = []
+        for _ in range(args.samples):
+            vals.append(pot.value)
+            time.sleep(0.002)
+        raw = float(np.mean(vals))
+        print(f"  raw {raw:.1f} (std {np.std(vals):.1f})")
+        rows.append((raw, fields[0], fields[1] if len(fields) > 1 else None))
+
+if len(rows) < 2:
+    sys.exit("Need at least two reference points")
+if args.save_points:
+    with open(args.save_points, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["raw", "mm", "force"])
+        writer.writerows([(raw, mm, "" if force is None else force) for raw, mm, force in rows])
+
+raw = np.array([r[0] for r in rows])
+mm = np.array([r[1] for r in rows])
+forced = [r for r in rows if r[2] is not None]
+calibration = PotCalibration.fit(args.device_id, raw, mm,
+                                 force_mm=[r[1] for r in forced], force=[r[2] for r in forced],
+                                 raw_degree=args.raw_degree, force_degree=args.force_degree,
+                                 spring_rate=args.spring_rate)
+
+# Residuals at the reference points, against the fitted curve and against the nominal mapping
+nominal = PotCalibration.nominal(args.spring_rate)
+codes = np.round(raw).astype(int)
+fit_err = calibration.distance_array(codes) - mm
+nominal_err = nominal.distance_array(codes) - mm
+print(f"\nDevice {args.device_id}: {len(rows)} reference points")
+print(f"Position error: max {np.abs(fit_err).max():.4f} mm calibrated, {np.abs(nominal_err).max():.4f} mm nominal")
+if forced:
+    force = np.array([r[2] for r in forced])
+    force_codes = np.array([round(r[0]) for r in forced])
+    print(f"Force error: max {np.abs(calibration.force_array(force_codes) - force).max():.4f} N calibrated, "
+          f"{np.abs(nominal.force_array(force_codes) - force).max():.4f} N nominal")
+
+calibration.save(args.output)
+print(f"Saved 65536-entry tables to {args.output}")
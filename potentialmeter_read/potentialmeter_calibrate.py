@@ -1,36 +1,68 @@
+import argparse
+import json
 import os
 import sys
 
-import board
 import time
-import busio
-import adafruit_ads1x15.ads1115 as ADS
-from adafruit_ads1x15.analog_in import AnalogIn
+
+import numpy as np
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
+from utils.noise import NoiseAnalyzer
 from utils.tools import *
 
-# Initialize the I2C interface
-i2c = busio.I2C(board.SCL, board.SDA)
+parser = argparse.ArgumentParser(description="Characterize potentiometer noise and recommend filter cutoffs.")
+parser.add_argument("--duration", type=float, default=20, help="seconds to record (runs for hours in constant memory)")
+parser.add_argument("--chunk", type=int, default=256, help="raw readings per analyzer update")
+parser.add_argument("--input", help="analyze a recorded raw ADC stream (.npy, or .csv with one column) instead")
+parser.add_argument("--fs", type=float, help="sample rate of --input (Hz)")
+parser.add_argument("--control-dt", type=float, default=0.02)
+parser.add_argument("--target-std", type=float, default=0.012, help="acceptable position noise after smoothing (mm)")
+parser.add_argument("--json", help="also write the report to this file")
+args = parser.parse_args()
 
-# Create an ADS1115 object
-ads = ADS.ADS1115(i2c)
+if args.input:
+    # Recorded stream: one vectorized pass
+    if args.fs is None:
+        parser.error("--fs is required with --input")
+    raw = np.load(args.input) if args.input.endswith(".npy") else np.loadtxt(args.input, delimiter=",", ndmin=1)
+    analyzer = NoiseAnalyzer(args.fs)
+    analyzer.add(read_potentialmeter(np.asarray(raw, dtype=float)))
+else:
+    from utils.fast_ads1115 import open_potentiometer
 
-# Define the analog input channel
-pot = AnalogIn(ads, ADS.P0)
+    # ADS1115 channel P0 (FRICTION_FAST_ADC=1 for the direct-register driver)
+    pot = open_potentiometer()
+    chunk = np.empty(args.chunk)
 
-start_time = time.time()
+    def read_chunk():
+        for i in range(args.chunk):
+            chunk[i] = pot.value
+        return read_potentialmeter(chunk)
 
-readings = []
+    # The first chunk measures the sample rate the loop achieves
+    start_time = time.time()
+    first = read_chunk()
+    fs = args.chunk / (time.time() - start_time)
+    analyzer = NoiseAnalyzer(fs)
+    analyzer.add(first)
 
-# Loop to read the analog input continuously
-while time.time() < start_time + 20:
+    # Loop to read the analog input continuously
+    while time.time() < start_time + args.duration:
+        analyzer.add(read_chunk())
+    print(f"Sample rate: {fs:.1f} Hz over {analyzer.stats.count} readings")
 
-    pos = read_smoothed_position(pot)
-    readings.append(pos)
+report = analyzer.recommend(control_dt=args.control_dt, target_std=args.target_std)
+avg = report["mean"]
+print(f"Average: {avg:.6f}, Upper: {report['max'] - avg:.6f}, lower: {report['min'] - avg:.6f}")
+print(f"Std: {report['std']:.6f} mm, white noise: {np.sqrt(report['white_density']):.3g} mm/sqrt(Hz), "
+      f"drift corner: {report['drift_corner_hz']:.2f} Hz")
+if report["allan_min_tau_s"] is not None:
+    print(f"Allan deviation minimum: {report['allan_min_dev']:.6f} mm at tau = {report['allan_min_tau_s']:.3f} s")
+print(f"Recommended low-pass cutoff: {report['lowpass_cutoff_hz']:.2f} Hz (alpha = {report['alpha']:.3f})")
+print(f"Recommended high-pass cutoff: {report['highpass_cutoff_hz']:.2f} Hz (high_pass_alpha = {report['high_pass_alpha']:.3f})")
 
-avg = sum(readings)/len(readings)
-max_pos = max(readings)
-min_pos = min(readings)
-print(f"Average: {avg:.6f}, Upper: {max_pos - avg:.6f}, lower: {min_pos - avg:.6f}")
+if args.json:
+    with open(args.json, "w") as f:
+        json.dump(report, f, indent=2)
@@ -1,17 +1,13 @@
-import board
+import os
+import sys
 import time
-import busio
-import adafruit_ads1x15.ads1115 as ADS
-from adafruit_ads1x15.analog_in import AnalogIn
 
-# Initialize the I2C interface
-i2c = busio.I2C(board.SCL, board.SDA)
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-# Create an ADS1115 object
-ads = ADS.ADS1115(i2c)
+from utils.fast_ads1115 import open_potentiometer
 
-# Define the analog input channel
-channel = AnalogIn(ads, ADS.P0)
+# ADS1115 channel P0 (FRICTION_FAST_ADC=1 for the direct-register driver)
+channel = open_potentiometer()
 
 start_time = time.time()
 # Loop to read the analog input continuously
@@ -1,18 +1,35 @@
-import board
+import os
+import sys
 import time
-import busio
 import adafruit_ads1x15.ads1115 as ADS
 from adafruit_ads1x15.analog_in import AnalogIn
 
-# Initialize I2C and ADC
-i2c = busio.I2C(board.SCL, board.SDA)
-ads = ADS.ADS1115(i2c)
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-# Optional: change data rate (default is 128 samples/sec)
-ads.data_rate = 860  # max supported for ADS1115
+from utils.fast_ads1115 import FastADS1115
 
-# Setup input channel
-channel = AnalogIn(ads, ADS.P0)
+emulate = "--emulate" in sys.argv
+if emulate:
+    # Register-level ADS1115 on a fake 100 kHz bus, no Pi needed
+    from utils.emulator import ADS1115Emulator, FakeI2CBus
+    i2c = FakeI2CBus(ADS1115Emulator(inputs={0: 1.65}))
+
+if "--fast" in sys.argv:
+    # Direct-register driver: continuous mode, one 2-byte read per sample
+    channel = FastADS1115(data_rate=860, dev=i2c.open_dev(0x48) if emulate else None)
+else:
+    # Initialize I2C and ADC
+    if not emulate:
+        import board
+        import busio
+        i2c = busio.I2C(board.SCL, board.SDA)
+    ads = ADS.ADS1115(i2c)
+
+    # Optional: change data rate (default is 128 samples/sec)
+    ads.data_rate = 860  # max supported for ADS1115
+
+    # Setup input channel
+    channel = AnalogIn(ads, ADS.P0)
 
 # Sampling rate test
 num_samples = 0
@@ -1,23 +1,19 @@
 import os
 import sys
 import time
-import board
-import busio
 import numpy as np
-import adafruit_ads1x15.ads1115 as ADS
-from adafruit_ads1x15.analog_in import AnalogIn
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from utils.pi5RC import pi5RC
+from utils.fast_ads1115 import open_potentiometer
+from utils.pi5RC import open_servo
+from utils.pot_calibration import DEFAULT_PATH, load_pot_calibration
 
 # === Setup ===
-i2c = busio.I2C(board.SCL, board.SDA)
-
-# Create an ADS1115 object
-ads = ADS.ADS1115(i2c)
-pot = AnalogIn(ads, ADS.P0)
-servo = pi5RC(18)  # GPIO18 using pwmchip2/pwm2
+pot = open_potentiometer()
+# Per-device tables from potentialmeter_read/pot_lut_calibrate.py, or the nominal mapping
+calibration = load_pot_calibration(os.path.join(os.path.dirname(__file__), '..', DEFAULT_PATH))
+servo = open_servo(18)  # GPIO18 using pwmchip2/pwm2
 
 NUM_SAMPLES = 20
 
@@ -27,9 +23,7 @@ calibrate_angle = [15, 60]
 def read_smoothed_position():
     vals = []
     for _ in range(NUM_SAMPLES):
-        raw = pot.value
-        pos = ((raw / 32767.0) * 10.5) / 1.01 + 1  # same mapping as your main script
-        vals.append(pos)
+        vals.append(calibration.distance(pot.value))
         time.sleep(0.005)
     return sum(vals) / len(vals)
 
@@ -1,10 +1,10 @@
 
 import time
 
-from utils.pi5RC import pi5RC
+from utils.pi5RC import open_servo
 
 # Create servo instance on GPIO18
-servo = pi5RC(18)
+servo = open_servo(18)
 
 try:
     print("Centering servo...")
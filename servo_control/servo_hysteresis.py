@@ -1,27 +1,22 @@
 import time
 import csv
-import board
-import busio
 import numpy as np
 import matplotlib.pyplot as plt
-import adafruit_ads1x15.ads1115 as ADS
-from adafruit_ads1x15.analog_in import AnalogIn
 
 import sys
 import os
-from sklearn.linear_model import LinearRegression
 
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from utils.pi5RC import pi5RC
+from utils.fast_ads1115 import open_potentiometer
+from utils.pi5RC import open_servo
+from utils.servo_fit import NormalEquations, cross_validate
 from utils.tools import *
 
 # === Setup ===
-i2c = busio.I2C(board.SCL, board.SDA)
-ads = ADS.ADS1115(i2c)
-pot = AnalogIn(ads, ADS.P0)
-servo = pi5RC(18)
+pot = open_potentiometer()
+servo = open_servo(18)
 
 alpha = 0.3
 max_angle = 180
@@ -75,38 +70,26 @@ for i in range(num_steps):
         velocities.append(velocity)
         angle_deltas.append(angle_delta)
 
-# Pad data for history regression
-X = []
-y = []
-
-for i in range(max_history, len(velocities)):
-    past_deltas = angle_deltas[i-max_history+1:i+1]  # includes current step
-    X.append(past_deltas[::-1])  # recent command first
-    y.append(velocities[i])
+# === Save the recording (one row per tick) for servo_model_fit.py ===
+with open("servo_command_history.csv", "w", newline="") as f:
+    writer = csv.writer(f)
+    writer.writerow(["angle_delta", "velocity"])
+    writer.writerows(zip(angle_deltas, velocities))
 
-X = np.array(X)
-y = np.array(y)
+print("Recording saved to servo_command_history.csv")
 
-# === Fit linear model ===
-model = LinearRegression()
-model.fit(X, y)
-coeffs = model.coef_
-np.save("../assets/servo_model_coeffs.npy", model.coef_)
+# === Fit linear model (lagged design as a sliding-window view, normal equations) ===
+eq = NormalEquations(max_history, folds=5, block=max(1, (len(velocities) - max_history + 1) // 5))
+eq.add(angle_deltas, velocities)
+cv_mse, r2, coeffs, intercept = cross_validate(eq, max_history, alpha=0.0)
 
 print("\n=== Hysteresis Analysis ===")
 for i, coef in enumerate(coeffs):
     print(f"Step t-{i}: coeff = {coef:.5f}")
 
-print(f"\nR^2 Score: {model.score(X, y):.3f}")
-
-# === Save data ===
-with open("servo_command_history_analysis.csv", "w", newline="") as f:
-    writer = csv.writer(f)
-    writer.writerow(["t_minus_" + str(i) for i in range(max_history)] + ["velocity"])
-    for row_x, row_y in zip(X, y):
-        writer.writerow(list(row_x) + [row_y])
-
-print("Data saved to servo_command_history_analysis.csv")
+print(f"\nR^2 Score: {r2:.3f} (cross-validated MSE {cv_mse:.4f})")
+print("Choose the history length and save the model with: "
+      "python servo_model_fit.py servo_command_history.csv [more recordings] --write")
 
 # === Visualization ===
 plt.figure(figsize=(8, 5))
@@ -0,0 +1,112 @@
+import argparse
+import itertools
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.servo_fit import ALPHAS, NormalEquations, fit_grid, save_servo_model
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+def scan_npy(path, start, stop, max_history, folds, block, chunk):
+    """Normal equations of target ticks [start, stop) of an (N, 2) angle delta / velocity .npy, memory-mapped."""
+    data = np.load(path, mmap_mode="r")
+    eq = NormalEquations(max_history, folds, block)
+    for t0 in range(start, stop, chunk):
+        t1 = min(t0 + chunk, stop)
+        piece = data[t0 - max_history + 1:t1]
+        eq.add(piece[:, 0], piece[:, 1], first_row=t0 - max_history + 1)
+    return eq
+
+
+def scan_csv(path, max_history, folds, block, chunk):
+    """Normal equations of a CSV recording (header, then angle_delta, velocity per tick), read chunk by chunk."""
+    eq = NormalEquations(max_history, folds, block)
+    tail = np.zeros((0, 2))
+    row = 0
+    with open(path) as f:
+        f.readline()
+        while True:
+            lines = list(itertools.islice(f, chunk))
+            if not lines:
+                break
+            piece = np.loadtxt(lines, delimiter=",", usecols=(0, 1), ndmin=2)
+            # Carry the last max_history - 1 ticks over for the histories of the next chunk
+            piece = np.concatenate([tail, piece])
+            if len(piece) >= max_history:
+                eq.add(piece[:, 0], piece[:, 1], first_row=row)
+                row += len(piece) - max_history + 1
+            tail = piece[len(piece) - (max_history - 1):] if max_history > 1 else piece[:0]
+    return eq
+
+
+def _scan_job(args):
+    kind, *rest = args
+    return scan_npy(*rest) if kind == "npy" else scan_csv(*rest)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fit the servo command-history velocity model with cross-validation.")
+    parser.add_argument("recordings", nargs="+",
+                        help="servo_hysteresis.py recordings: .csv (angle_delta, velocity per tick) or .npy (N x 2)")
+    parser.add_argument("--max-history", type=int, default=16, help="longest command history to try (ticks)")
+    parser.add_argument("--alphas", default=",".join(map(str, ALPHAS)), help="ridge strengths, relative to mean diag(X'X)")
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--block", type=int, default=500, help="ticks per contiguous cross-validation block")
+    parser.add_argument("--chunk", type=int, default=200_000, help="ticks read at a time")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--no-intercept", action="store_true")
+    parser.add_argument("--write", action="store_true",
+                        help="save the best model to assets/servo_model_coeffs.npy and its score to assets/servo_model_fit.json")
+    args = parser.parse_args()
+
+    h = args.max_history
+    jobs = []
+    for path in args.recordings:
+        if path.endswith(".npy"):
+            # Large arrays are split between the workers; each part reads its own history prefix
+            n = len(np.load(path, mmap_mode="r"))
+            step = max(args.chunk, -(-n // args.workers))
+            jobs += [("npy", path, t0, min(t0 + step, n), h, args.folds, args.block, args.chunk)
+                     for t0 in range(h - 1, n, step)]
+        else:
+            jobs.append(("csv", path, h, args.folds, args.block, args.chunk))
+
+    start = time.time()
+    eq = NormalEquations(h, args.folds, args.block)
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        for part in pool.map(_scan_job, jobs):
+            eq.merge(part)
+    rows = int(eq.n.sum())
+    if rows <= args.folds:
+        sys.exit("Not enough data for cross-validation")
+    print(f"Accumulated {rows} ticks from {len(args.recordings)} recordings in {time.time() - start:.1f} s")
+
+    alphas = [float(a) for a in args.alphas.split(",")]
+    results = fit_grid(eq, range(1, h + 1), alphas, fit_intercept=not args.no_intercept, workers=args.workers)
+
+    print(f"\n{'history':>7} {'alpha':>8} {'CV MSE':>10} {'R^2':>7}")
+    for r in results[:10]:
+        print(f"{r['history']:>7} {r['alpha']:>8g} {r['cv_mse']:>10.4f} {r['r2']:>7.3f}")
+    best = results[0]
+    print(f"\nBest: history {best['history']}, alpha {best['alpha']:g} "
+          f"(CV MSE {best['cv_mse']:.4f} (mm/s)^2, R^2 {best['r2']:.3f})")
+    for i, coef in enumerate(best["coeffs"]):
+        print(f"Step t-{i}: coeff = {coef:.5f}")
+
+    if args.write:
+        save_servo_model(best, os.path.join(ROOT, "assets/servo_model_coeffs.npy"),
+                         os.path.join(ROOT, "assets/servo_model_fit.json"),
+                         rows=rows, folds=args.folds, recordings=[os.path.basename(p) for p in args.recordings])
+        print("Saved to assets/servo_model_coeffs.npy and assets/servo_model_fit.json")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
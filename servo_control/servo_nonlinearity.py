@@ -1,24 +1,19 @@
 import time
 import csv
-import board
-import busio
 import numpy as np
-import adafruit_ads1x15.ads1115 as ADS
-from adafruit_ads1x15.analog_in import AnalogIn
 
 import sys
 import os
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from utils.pi5RC import pi5RC
+from utils.fast_ads1115 import open_potentiometer
+from utils.pi5RC import open_servo
 from utils.tools import *
 
 # === Setup ===
-i2c = busio.I2C(board.SCL, board.SDA)
-ads = ADS.ADS1115(i2c)
-pot = AnalogIn(ads, ADS.P0)
-servo = pi5RC(18)  # GPIO18 using pwmchip2/pwm2
+pot = open_potentiometer()
+servo = open_servo(18)  # GPIO18 using pwmchip2/pwm2
 
 alpha = 0.3
 
@@ -1,35 +1,35 @@
 import math
-
-from gpiozero import Servo
-from gpiozero.pins.lgpio import LGPIOFactory
-from time import sleep
+import os
 import signal
 import sys
+from time import sleep
 
-# Use lgpio backend explicitly
-factory = LGPIOFactory()
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.pi5RC import open_servo
+
+# Set up the servo on GPIO18 (or through the device daemon with FRICTION_DAEMON=1)
+servo = open_servo(18)
 
-# Set up the servo
-servo = Servo(18, pin_factory=factory, min_pulse_width=0.5/1000, max_pulse_width=2.5/1000)
 
 # Graceful exit on Ctrl+C or script exit
 def cleanup(signum=None, frame=None):
     print("Cleaning up...")
-    servo.detach()  # Optional: detaches the signal from the pin
-    servo.close()   # Required: tells gpiozero to release the pin
-    factory.close() # Required: tells lgpio to release the handle
+    servo.enable(False)  # stops the signal; pi5RC releases the pin when deleted
     sys.exit(0)
 
+
 # Register the cleanup handler
 signal.signal(signal.SIGINT, cleanup)
 signal.signal(signal.SIGTERM, cleanup)
 
-# Example: sweep servo back and forth
+# Example: sweep servo back and forth, value -1..1 over 0.5..2.5 ms pulses
 try:
     while True:
         for i in range(0, 360):
-            print(math.sin(math.radians(i)))
-            servo.value = math.sin(math.radians(i))
+            value = math.sin(math.radians(i))
+            print(value)
+            servo.set_pwm(int(1500 + 1000 * value))
             sleep(0.02)
 
 except Exception as e:
@@ -0,0 +1,65 @@
+import argparse
+import os
+from functools import partial
+
+import numpy as np
+import matplotlib.pyplot as plt
+
+from utils.controller import FrictionController
+from utils.simulation import SpringServoPlant, hand_push_release, run_trial
+from utils.texture import TEXTURES, make_texture
+
+# Set global font sizes
+plt.rcParams.update({
+    "font.family": "Times New Roman",
+    "font.size": 16,          # Base font size
+    "axes.titlesize": 18,     # Title size
+    "axes.labelsize": 16,     # Axis label size
+    "xtick.labelsize": 14,    # X tick size
+    "ytick.labelsize": 14,    # Y tick size
+    "legend.fontsize": 14,     # Legend font size
+})
+
+parser = argparse.ArgumentParser(description="Plot friction textures and a simulated slide over each of them.")
+parser.add_argument("textures", nargs="*", default=list(TEXTURES), help="gallery names or texture files")
+parser.add_argument("--push-time", type=float, default=6.0, help="length of the simulated push (s)")
+parser.add_argument("--output", default="results/figs/texture_gallery.png")
+args = parser.parse_args()
+
+model_coeffs = np.load("assets/servo_model_coeffs.npy")
+hand = partial(hand_push_release, push_time=args.push_time)
+
+fig, axes = plt.subplots(len(args.textures), 1, figsize=(8, 3 * len(args.textures)), squeeze=False)
+for ax, spec in zip(axes[:, 0], args.textures):
+    texture = make_texture(spec)
+
+    # The texture is a precomputed table; the simulated trial only does lookups
+    controller = FrictionController(model_coeffs[:7], texture=texture)
+    plant = SpringServoPlant(model_coeffs, hand=hand, noise_std=0.012, seed=0)
+    samples = []
+
+    def on_tick(c, p, now):
+        if c.sliding:
+            samples.append((c.surface_position, c.frictionForce, c.detectedForce))
+
+    run_trial(controller, plant, duration=args.push_time + 6, on_tick=on_tick)
+    samples = np.array(samples).reshape(-1, 3)
+
+    x = np.linspace(texture.x_min, max(texture.x_max, samples[:, 0].max(initial=0)), 2000)
+    static, dynamic = texture.lookup_array(x)
+    ax.plot(x, static, linestyle='--', label="Static")
+    ax.plot(x, dynamic, linestyle='--', label="Dynamic")
+    ax.plot(samples[:, 0], samples[:, 2], label="Rendered Force (sim)")
+    ax.set_title(f"{texture.name}: Force (N)", loc="left")
+    ax.set_xlim(x[0], x[-1])
+    ax.set_ylim(0, 1.4)
+    ax.grid(axis='y', linestyle='--', linewidth=0.5, alpha=0.6)
+    for spine in ["top", "right"]:
+        ax.spines[spine].set_visible(False)
+axes[-1, 0].set_xlabel("Surface position (mm)")
+axes[0, 0].legend(loc="upper right")
+
+plt.tight_layout()
+os.makedirs(os.path.dirname(args.output), exist_ok=True)
+plt.savefig(args.output, dpi=300)
+print(f"Saved {args.output}")
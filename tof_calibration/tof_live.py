@@ -0,0 +1,33 @@
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.tof_calibration import DEFAULT_PATH, MAX_RAW, open_tof
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+parser = argparse.ArgumentParser(description="Stream calibrated ToF distances through a lookup table.")
+parser.add_argument("sensor", choices=list(MAX_RAW))
+parser.add_argument("--window", default="15", help="window setting whose table to apply (see tof_lut_calibrate.py)")
+parser.add_argument("--tables", default=os.path.join(ROOT, DEFAULT_PATH))
+parser.add_argument("--duration", type=float, default=10.0, help="seconds to stream")
+args = parser.parse_args()
+
+reader = open_tof(args.sensor, args.window, args.tables)
+table = reader.table
+count, correct_time = 0, 0.0
+start = time.time()
+while time.time() - start < args.duration:
+    raw = reader.device.range
+    t0 = time.perf_counter()
+    distance = table.correct(raw)
+    correct_time += time.perf_counter() - t0
+    count += 1
+    print(f"raw {raw:4d} mm -> {distance:7.2f} mm")
+
+elapsed = time.time() - start
+print(f"\n{count} samples in {elapsed:.1f} s ({count / elapsed:.0f} Hz), "
+      f"correction {correct_time / max(count, 1) * 1e9:.0f} ns per sample")
@@ -0,0 +1,53 @@
+import argparse
+import csv
+import os
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.tof_calibration import DEFAULT_PATH, MAX_RAW, ToFTable, cross_validate_degree, parse_runs, save_tof_tables
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+parser = argparse.ArgumentParser(description="Fit raw -> true distance curves of a ToF sensor per window setting "
+                                             "and compile them into lookup tables.")
+parser.add_argument("sensor", choices=list(MAX_RAW), help="sensor the runs were recorded with")
+parser.add_argument("--runs", help="CSV with columns window, true_mm, raw (one sample per row) "
+                                   "instead of the raw_data runs in tof_raw.py")
+parser.add_argument("--windows", help="comma-separated windows to fit (default: all)")
+parser.add_argument("--degree", type=int, help="polynomial degree (default: chosen per window by "
+                                               "leave-one-distance-out cross-validation)")
+parser.add_argument("--output", default=os.path.join(ROOT, DEFAULT_PATH))
+args = parser.parse_args()
+
+if args.runs:
+    samples = {}
+    with open(args.runs, newline="") as f:
+        for row in csv.DictReader(f):
+            true, raw = samples.setdefault(row["window"], ([], []))
+            true.append(float(row["true_mm"]))
+            raw.append(float(row["raw"]))
+    runs = {window: (np.array(true), np.array(raw)) for window, (true, raw) in samples.items()}
+else:
+    from tof_calibration.tof_raw import raw_data
+    runs = parse_runs(raw_data)
+if args.windows:
+    runs = {w: runs[w] for w in args.windows.split(",")}
+
+print(f"{'window':>10} {'samples':>7} {'degree':>6} {'CV RMS':>7} {'raw RMS':>8} {'RMS':>6} {'max bias':>8}  (mm)")
+tables = []
+for window, (true, raw) in sorted(runs.items(), key=lambda item: (not item[0].isdigit(), len(item[0]), item[0])):
+    cv = cross_validate_degree(true, raw)
+    degree = args.degree if args.degree is not None else min(cv, key=cv.get, default=1)
+    table = ToFTable.fit(args.sensor, window, true, raw, degree)
+    corrected = table.correct_array(raw)
+    # Mean corrected reading at each reference distance against the distance itself
+    bias = max(abs(corrected[true == d].mean() - d) for d in np.unique(true))
+    print(f"{window:>10} {len(raw):>7} {degree:>6} {cv.get(degree, float('nan')):>7.2f} "
+          f"{np.sqrt(np.mean((raw - true) ** 2)):>8.2f} {np.sqrt(np.mean((corrected - true) ** 2)):>6.2f} {bias:>8.2f}")
+    tables.append(table)
+
+save_tof_tables(tables, args.output)
+print(f"Saved {len(tables)} tables of {MAX_RAW[args.sensor] + 1} entries to {args.output}")
@@ -0,0 +1,50 @@
+import argparse
+import sys
+import time
+
+from utils.trial_index import COLUMNS, DEFAULT_PATH, TrialIndex
+
+DEFAULT_COLUMNS = "session,trial,maxStaticFriction,dynamicFriction,Kp,Kd,device_id,model_version,dt_p99,stick_rms_error_N,slip_latency_s"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Index the trial logs in SQLite and search them by parameters and metrics.")
+    parser.add_argument("filters", nargs="*", help='column filters such as Kd=0.02 maxStaticFriction=0.8 "stick_rms_error_N<0.05"')
+    parser.add_argument("--index", default=DEFAULT_PATH, help="index database; it covers the logs in its directory")
+    parser.add_argument("--log-dir", help="directory to index (default: the directory of --index)")
+    parser.add_argument("--no-update", action="store_true", help="query without indexing new logs first")
+    parser.add_argument("--where", help="extra SQL condition")
+    parser.add_argument("--order", default="start_time", help="sort column, prefix with - for descending")
+    parser.add_argument("--limit", type=int)
+    parser.add_argument("--columns", default=DEFAULT_COLUMNS, help=f"columns to print, from: {', '.join(COLUMNS)}")
+    parser.add_argument("--paths", action="store_true", help="print only the CSV paths, one per line")
+    args = parser.parse_args()
+
+    with TrialIndex(args.index, args.log_dir) as index:
+        if not args.no_update:
+            start = time.perf_counter()
+            lines, logs = index.update()
+            print(f"Indexed {lines} summary lines and {logs} new or changed logs in "
+                  f"{(time.perf_counter() - start) * 1000:.0f} ms ({len(index)} trials)", file=sys.stderr)
+        start = time.perf_counter()
+        try:
+            rows = index.query(*args.filters, where=args.where, order_by=args.order, limit=args.limit)
+        except ValueError as e:
+            sys.exit(str(e))
+        elapsed = time.perf_counter() - start
+
+    if args.paths:
+        print("\n".join(row["log"] for row in rows))
+        return 0
+    columns = args.columns.split(",")
+    table = [[f"{row[c]:.4g}" if isinstance(row[c], float) else str(row[c]) for c in columns] for row in rows]
+    widths = [max([len(c)] + [len(r[i]) for r in table]) for i, c in enumerate(columns)]
+    print("  ".join(c.rjust(w) for c, w in zip(columns, widths)))
+    for r in table:
+        print("  ".join(v.rjust(w) for v, w in zip(r, widths)))
+    print(f"{len(rows)} trials in {elapsed * 1000:.1f} ms", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
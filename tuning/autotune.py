@@ -0,0 +1,185 @@
+import argparse
+import csv
+import itertools
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.controller import FrictionController, save_controller_gains
+from utils.simulation import HAND_MOTIONS, SpringServoPlant, make_hand, run_trial
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Search ranges for each gain; the hand-tuned values sit inside every range
+SEARCH_SPACE = {
+    "Kp": (0.2, 2.0),
+    "Ki": (0.0, 0.5),
+    "Kd": (0.0, 0.08),
+    "ff_gain": (0.0, 3.0),
+    "slip_ff_gain": (0.0, 4.0),
+    "slide_boost_min": (0.0, 0.5),
+    "velocity_boost_scale": (10.0, 100.0),
+}
+HAND_TUNED = {"Kp": 0.8, "Ki": 0, "Kd": 0.02, "ff_gain": 1.2, "slip_ff_gain": 2,
+              "slide_boost_min": 0.12, "velocity_boost_scale": 40}
+GRID_GAINS = ("Kp", "Kd", "ff_gain", "slip_ff_gain")
+
+TOLERANCE = 0.1      # force band for response time, fraction of the desired force
+SETTLE_SAMPLES = 5   # samples that must stay in the band
+DURATION = 8.0
+DT = 0.02
+
+
+def trial_metrics(log_list, push_start, duration=DURATION):
+    """RMS force error (N) after calibration and response time (s) from push start
+    until the rendered force settles within TOLERANCE of the dynamic friction."""
+    rows = np.array([row for row in log_list if row[3] > 0])
+    if len(rows) == 0:
+        return float("inf"), float("inf")
+    t, desired, rendered = rows[:, 0], rows[:, 3], rows[:, 4]
+    rms = float(np.sqrt(np.mean((rendered - desired) ** 2)))
+
+    response = duration - push_start
+    in_band = np.abs(rendered - desired) <= TOLERANCE * desired
+    sliding = desired < desired.max()
+    for i in np.flatnonzero((t >= push_start) & sliding):
+        if in_band[i:i + SETTLE_SAMPLES].all() and i + SETTLE_SAMPLES <= len(t):
+            response = float(t[i] - push_start)
+            break
+    return rms, response
+
+
+def evaluate(gains, motions, coeffs, noise_std=0.012, seed=0):
+    """Mean RMS error and mean response time of one gain set over the motion library."""
+    errors, responses = [], []
+    for k, name in enumerate(motions):
+        hand, push_start = make_hand(name)
+        plant = SpringServoPlant(coeffs, hand=hand, noise_std=noise_std, seed=seed + k)
+        controller = FrictionController(coeffs[:7], **gains)
+        rms, response = trial_metrics(run_trial(controller, plant, duration=DURATION, dt=DT), push_start)
+        errors.append(rms)
+        responses.append(response)
+    return float(np.mean(errors)), float(np.mean(responses))
+
+
+def _evaluate_job(args):
+    """Evaluate one candidate; a candidate whose evaluation raises scores inf and returns the traceback."""
+    gains, motions, coeffs, noise_std, seed = args
+    try:
+        error, response = evaluate(gains, motions, coeffs, noise_std, seed)
+    except Exception:
+        return gains, float("inf"), float("inf"), traceback.format_exc()
+    return gains, error, response, None
+
+
+def report_failures(failures, what):
+    """Count evaluations that raised and show the first traceback, so a bug is not mistaken for a bad score."""
+    if failures:
+        print(f"\n{len(failures)} {what} raised instead of completing (scored inf); first traceback:")
+        print(failures[0])
+
+
+def random_candidates(n, rng):
+    for _ in range(n):
+        yield {name: float(rng.uniform(lo, hi)) for name, (lo, hi) in SEARCH_SPACE.items()}
+
+
+def grid_candidates(points):
+    axes = [np.linspace(*SEARCH_SPACE[name], points) for name in GRID_GAINS]
+    for values in itertools.product(*axes):
+        gains = dict(HAND_TUNED)
+        gains.update({name: float(v) for name, v in zip(GRID_GAINS, values)})
+        yield gains
+
+
+def pareto_front(results):
+    """Results (gains, error, response) not dominated in both error and response time."""
+    ordered = sorted(results, key=lambda r: (r[1], r[2]))
+    front = []
+    best_response = float("inf")
+    for r in ordered:
+        if r[2] < best_response:
+            front.append(r)
+            best_response = r[2]
+    return front
+
+
+def knee_point(front):
+    """Front member closest to the utopia point after normalizing both objectives."""
+    errors = np.array([r[1] for r in front])
+    responses = np.array([r[2] for r in front])
+    e = (errors - errors.min()) / (np.ptp(errors) or 1.0)
+    r = (responses - responses.min()) / (np.ptp(responses) or 1.0)
+    return front[int(np.argmin(np.hypot(e, r)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Auto-tune friction controller gains against the simulated plant.")
+    parser.add_argument("--method", choices=["random", "grid"], default="random")
+    parser.add_argument("--samples", type=int, default=400, help="candidates for random search")
+    parser.add_argument("--grid-points", type=int, default=5, help="points per gain for grid search")
+    parser.add_argument("--motions", default=",".join(HAND_MOTIONS), help="comma-separated hand motions")
+    parser.add_argument("--noise", type=float, default=0.012, help="potentiometer noise std (mm)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--csv", default="autotune_results.csv", help="every evaluated candidate")
+    parser.add_argument("--write", action="store_true", help="write the knee-point gains to --config")
+    parser.add_argument("--config", default=os.path.join(ROOT, "assets/controller_gains.json"))
+    args = parser.parse_args()
+
+    coeffs = np.load(os.path.join(ROOT, "assets/servo_model_coeffs.npy"))
+    motions = args.motions.split(",")
+    rng = np.random.default_rng(args.seed)
+    if args.method == "random":
+        candidates = [dict(HAND_TUNED)] + list(random_candidates(args.samples, rng))
+    else:
+        candidates = list(grid_candidates(args.grid_points))
+
+    print(f"Evaluating {len(candidates)} gain sets on {len(motions)} motions with {args.workers} workers...")
+    start = time.time()
+    jobs = [(gains, motions, coeffs, args.noise, args.seed) for gains in candidates]
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        outcomes = list(pool.map(_evaluate_job, jobs, chunksize=max(1, len(jobs) // (4 * args.workers))))
+    print(f"Done in {time.time() - start:.1f} s")
+    results = [outcome[:3] for outcome in outcomes]
+    failures = [outcome[3] for outcome in outcomes if outcome[3] is not None]
+    report_failures(failures, f"of {len(outcomes)} gain sets")
+
+    with open(args.csv, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(list(SEARCH_SPACE) + ["rms_error_N", "response_time_s"])
+        for gains, error, response in results:
+            writer.writerow([gains[name] for name in SEARCH_SPACE] + [error, response])
+    print(f"Saved all candidates to {args.csv}")
+
+    finite = [r for r in results if np.isfinite(r[1]) and np.isfinite(r[2])]
+    if not finite:
+        print("No candidate completed a trial.")
+        return 1
+    front = pareto_front(finite)
+    print("\n=== Pareto front (RMS force error vs. response time) ===")
+    print(" ".join(f"{name:>10}" for name in SEARCH_SPACE) + f" {'rms (N)':>9} {'resp (s)':>9}")
+    for gains, error, response in front:
+        print(" ".join(f"{gains[name]:>10.3f}" for name in SEARCH_SPACE) + f" {error:>9.4f} {response:>9.3f}")
+
+    baseline = results[0] if args.method == "random" else None
+    chosen, error, response = knee_point(front)
+    print(f"\nKnee point: rms {error:.4f} N, response {response:.3f} s")
+    if baseline is not None:
+        print(f"Hand-tuned: rms {baseline[1]:.4f} N, response {baseline[2]:.3f} s")
+
+    if args.write:
+        save_controller_gains(chosen, args.config, rms_error_N=error, response_time_s=response,
+                              motions=motions, method=args.method, tuned_at=time.strftime("%Y-%m-%dT%H:%M:%S"))
+        print(f"Wrote gains to {args.config}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,118 @@
+import argparse
+import os
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from tuning.autotune import DT, DURATION, trial_metrics
+from utils.controller import FrictionController
+from utils.simulation import HAND_MOTIONS, SpringServoPlant, hand_idle, make_hand, run_trial
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+def step_latency(horizon, controller_coeffs, plant_coeffs, Kp, noise_std=0.012, seed=0, t_step=5.0):
+    """Effective loop latency (ms): time for the rendered force to cover half of a
+    0.8 N -> 0.4 N friction step while the handle is held still.
+
+    NaN when the controller was not holding 0.8 N in the stick phase at the step
+    (it oscillated into sliding on its own), so there is no step to measure.
+    """
+    plant = SpringServoPlant(plant_coeffs, hand=hand_idle, noise_std=noise_std, seed=seed)
+    controller = FrictionController(controller_coeffs, Kp=Kp, prediction_horizon=horizon)
+    crossed = []
+    holding = []
+
+    def on_tick(c, p, now):
+        if not holding and now >= t_step:
+            holding.append(c.calibrated and not c.sliding and c.detectedForce > 0.7)
+        if now >= t_step:
+            c.maxStaticFriction = 0.4
+            if not crossed and c.calibrated and c.detectedForce <= 0.6:
+                crossed.append(now - t_step)
+
+    run_trial(controller, plant, duration=DURATION, dt=DT, on_tick=on_tick)
+    if not holding or not holding[0]:
+        return float("nan")
+    return crossed[0] * 1000 if crossed else float("inf")
+
+
+def trial_error(horizon, controller_coeffs, plant_coeffs, motions, Kp, noise_std, seed):
+    """Mean RMS force error over the scripted motions."""
+    errors = []
+    for k, name in enumerate(motions):
+        hand, push_start = make_hand(name)
+        plant = SpringServoPlant(plant_coeffs, hand=hand, noise_std=noise_std, seed=seed + k)
+        controller = FrictionController(controller_coeffs, Kp=Kp, prediction_horizon=horizon)
+        errors.append(trial_metrics(run_trial(controller, plant, duration=DURATION, dt=DT), push_start)[0])
+    return float(np.mean(errors))
+
+
+def stick_deviation(horizon, controller_coeffs, plant_coeffs, Kp, maxStaticFriction=0.8, noise_std=0.012, seed=0):
+    """Largest deviation (N) of the rendered from the desired force over the last 2 s of
+    an untouched stick phase. Catches oscillation as well as a loop that settles at the
+    wrong force.
+
+    Infinite when the controller oscillated into sliding although nobody touched it.
+    """
+    plant = SpringServoPlant(plant_coeffs, hand=hand_idle, noise_std=noise_std, seed=seed)
+    controller = FrictionController(controller_coeffs, Kp=Kp, maxStaticFriction=maxStaticFriction,
+                                    prediction_horizon=horizon)
+    log_list = run_trial(controller, plant, duration=DURATION, dt=DT)
+    if controller.sliding or controller.released:
+        return float("inf")
+    tail = [abs(row[4] - row[3]) for row in log_list if row[0] > DURATION - 2 and row[3] > 0]
+    return max(tail) if tail else float("inf")
+
+
+def max_stable_kp(horizon, controller_coeffs, plant_coeffs, limit=0.1, kps=np.arange(0.4, 20.01, 0.2)):
+    """Largest Kp whose stick phase stays within `limit` N of the desired force, and whether
+    the search ran out of gains before finding an unstable one (then Kp is only a
+    lower bound)."""
+    stable = 0.0
+    for kp in kps:
+        if stick_deviation(horizon, controller_coeffs, plant_coeffs, kp) > limit:
+            return stable, False
+        stable = float(kp)
+    return stable, True
+
+
+def _ms(latency):
+    return "n/a" if np.isnan(latency) else f"{latency:.0f}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline evaluation of the predictive servo-delay compensation.")
+    parser.add_argument("--horizons", default="0,1,2,3,4,7", help="comma-separated prediction horizons (ticks)")
+    parser.add_argument("--motions", default=",".join(HAND_MOTIONS))
+    parser.add_argument("--noise", type=float, default=0.012)
+    parser.add_argument("--plant-gain", type=float, default=1.0, help="scale the plant's servo model (model mismatch)")
+    parser.add_argument("--extra-delay", type=int, default=0, help="extra plant delay in ticks (model mismatch)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-kp", type=float, default=20.0, help="upper end of the stable-gain search")
+    args = parser.parse_args()
+
+    coeffs = np.load(os.path.join(ROOT, "assets/servo_model_coeffs.npy"))
+    controller_coeffs = coeffs[:7]
+    plant_coeffs = np.concatenate([np.zeros(args.extra_delay), coeffs * args.plant_gain])
+    motions = args.motions.split(",")
+
+    kps = np.arange(0.4, args.max_kp + 0.01, 0.2)
+    print("Kp at 60% of the largest stable gain for each horizon; baseline Kp = 0.8")
+    print("latency n/a: the controller was not holding 0.8 N when the step came; "
+          "'>=' marks a search that hit --max-kp")
+    print(f"{'horizon':>8} {'max stable Kp':>14} {'Kp':>6} {'latency@0.8 (ms)':>17} {'latency@Kp (ms)':>16} {'rms err@Kp (N)':>15}")
+    for horizon in [int(h) for h in args.horizons.split(",")]:
+        max_kp, capped = max_stable_kp(horizon, controller_coeffs, plant_coeffs, kps=kps)
+        kp = round(0.6 * max_kp, 2)
+        base_latency = step_latency(horizon, controller_coeffs, plant_coeffs, 0.8, args.noise, args.seed)
+        latency = step_latency(horizon, controller_coeffs, plant_coeffs, kp, args.noise, args.seed)
+        error = trial_error(horizon, controller_coeffs, plant_coeffs, motions, kp, args.noise, args.seed)
+        max_text = (">=" if capped else "") + f"{max_kp:.1f}"
+        print(f"{horizon:>8d} {max_text:>14} {kp:>6.2f} {_ms(base_latency):>17} {_ms(latency):>16} {error:>15.4f}")
+
+
+if __name__ == "__main__":
+    main()
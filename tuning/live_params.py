@@ -0,0 +1,62 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.params import DEFAULT_PATH, LIVE_PARAMS, ParameterBlock
+
+
+def parse_assignments(items):
+    values = {}
+    for item in items:
+        name, _, value = item.partition("=")
+        if name not in LIVE_PARAMS or not value:
+            raise SystemExit(f"Expected NAME=VALUE with NAME one of: {', '.join(LIVE_PARAMS)}")
+        values[name] = float(value)
+    return values
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show or change the parameters of a running friction_render.py "
+                                                 "(started with --live-params).")
+    parser.add_argument("--path", default=DEFAULT_PATH, help="parameter block file")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("show", help="print the current values")
+    set_parser = sub.add_parser("set", help="set one or more values, e.g. set Kp=1.2 dynamicFriction=0.3")
+    set_parser.add_argument("assignments", nargs="+")
+    sweep = sub.add_parser("sweep", help="step one parameter through a range, holding each value for --dwell s")
+    sweep.add_argument("name", choices=LIVE_PARAMS)
+    sweep.add_argument("start", type=float)
+    sweep.add_argument("stop", type=float)
+    sweep.add_argument("--steps", type=int, default=5)
+    sweep.add_argument("--dwell", type=float, default=10.0)
+    args = parser.parse_args()
+
+    if not os.path.exists(args.path):
+        print(f"No parameter block at {args.path}; start friction_render.py with --live-params first.")
+        return 1
+    block = ParameterBlock(args.path)
+    try:
+        if args.command == "set":
+            version = block.update(**parse_assignments(args.assignments))
+            print(f"Version {version}")
+        elif args.command == "sweep":
+            for value in np.linspace(args.start, args.stop, args.steps):
+                version = block.update(**{args.name: value})
+                print(f"{args.name} = {value:.4f} (version {version})")
+                time.sleep(args.dwell)
+        version, values = block.read()
+        print(f"Parameters (version {version}):")
+        for name, value in values.items():
+            print(f"  {name:<22} {value:g}")
+    finally:
+        block.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+import argparse
+import os
+import sys
+import warnings
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from tuning.autotune import DT, DURATION
+from utils.controller import FrictionController
+from utils.effects import make_scene
+from utils.metrics import TrialMetrics
+from utils.simulation import HAND_MOTIONS, SpringServoPlant, hand_idle, make_hand, run_trial
+from utils.texture import make_texture
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+def simulate(coeffs, hand, noise_std, seed, **controller_kwargs):
+    """One simulated trial; returns the live metrics, the log rows and the time slip was declared."""
+    controller = FrictionController(coeffs[:7], **controller_kwargs)
+    plant = SpringServoPlant(coeffs, hand=hand, noise_std=noise_std, seed=seed)
+    metrics = TrialMetrics()
+    slipped = []
+
+    def on_tick(c, p, now):
+        metrics.update_from(c, now)
+        if c.sliding and not slipped:
+            slipped.append(now)
+
+    rows = run_trial(controller, plant, duration=DURATION, dt=DT, on_tick=on_tick)
+    return metrics, rows, slipped[0] if slipped else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the trial metrics against simulated trials with a known "
+                                                 "push onset: slip latency measured, phases labelled, also "
+                                                 "under a texture or scene.")
+    parser.add_argument("--motions", default=",".join(HAND_MOTIONS))
+    parser.add_argument("--noise", default="0.012,0.03,0.05", help="potentiometer noise levels (mm)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    coeffs = np.load(os.path.join(ROOT, "assets/servo_model_coeffs.npy"))
+    failures = []
+
+    def expect(name, ok, detail=""):
+        print(f"{'ok' if ok else 'FAIL':>4}  {name}{': ' + detail if detail else ''}")
+        if not ok:
+            failures.append(name)
+
+    for noise in (float(n) for n in args.noise.split(",")):
+        for motion in args.motions.split(","):
+            hand, push_start = make_hand(motion)
+            live, rows, slipped = simulate(coeffs, hand, noise, args.seed)
+            logged = TrialMetrics.from_log(rows)
+            # Slip shows in the log one tick after it is declared; the onset cannot precede the push
+            bound = slipped + DT - push_start + 1e-9 if slipped is not None else None
+            latencies = (live.slip_latency, logged.slip_latency)
+            ok = slipped is not None and all(v is not None and 0 < v <= bound for v in latencies)
+            expect(f"slip latency, {motion} at {noise:g} mm noise", ok,
+                   "live {} ms, log {} ms, push to slip {} ms".format(
+                       *(f"{v * 1000:.0f}" if v is not None else "None" for v in latencies + (bound,))))
+
+    live, rows, slipped = simulate(coeffs, hand_idle, 0.012, args.seed)
+    expect("no slip latency without a push", slipped is None and live.slip_latency is None
+           and TrialMetrics.from_log(rows).slip_latency is None)
+
+    # Textures and scenes vary the desired force in both phases: the log's sliding column must
+    # label them as the live metrics did, and a log without it must warn
+    hand, _ = make_hand("long_push")
+    for name, kwargs in (("ridges texture", dict(texture=make_texture("ridges"))),
+                         ("detents scene", dict(effects=make_scene("detents")))):
+        live, rows, slipped = simulate(coeffs, hand, 0.012, args.seed, **kwargs)
+        logged = TrialMetrics.from_log(rows)
+        # The live metrics also see the release tick, which is not logged
+        counts = [(live.error[p].count, logged.error[p].count) for p in ("stick", "slip")]
+        ok = (slipped is not None and counts[0][0] == counts[0][1] and 0 <= counts[1][0] - counts[1][1] <= 1
+              and live.slip_latency == logged.slip_latency)
+        expect(f"phases from the log, {name}", ok,
+               "stick {}/{}, slip {}/{} live/log ticks".format(*counts[0], *counts[1]))
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+            TrialMetrics.from_log([row[:6] for row in rows])
+        expect(f"warning for a log without phases, {name}", len(caught) == 1)
+
+    print("metrics check " + ("passed" if not failures else f"failed: {len(failures)} checks"))
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
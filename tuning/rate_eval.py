@@ -0,0 +1,148 @@
+import argparse
+import csv
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from tuning.autotune import DT
+from utils.adaptive_rate import AdaptiveRate
+from utils.controller import FrictionController, load_controller_gains
+from utils.metrics import TrialMetrics
+from utils.simulation import HAND_MOTIONS, SpringServoPlant, hand_push_release, run_trial
+from utils.tools import read_potentialmeter
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+def simulate(motion, seed, coeffs, gains, noise_std, idle_time, rate_kwargs):
+    """One trial at the fixed rate and one with AdaptiveRate, same hand and noise.
+
+    The hand rests for idle_time s after calibration (about 2 s in
+    simulation), then pushes. Returns per mode: ticks, controller CPU
+    seconds (compute_command to the end of the tick), the first tick at or
+    after the push start that sees the push (wake criterion met and, in
+    adaptive mode, the loop back at full rate), stick RMS error and slip
+    latency.
+    """
+    start = 2.0 + idle_time
+    kwargs = dict(HAND_MOTIONS[motion], start=start)
+    results = {}
+    for mode in ("fixed", "adaptive"):
+        plant = SpringServoPlant(coeffs, hand=partial(hand_push_release, **kwargs), noise_std=noise_std, seed=seed)
+        controller = FrictionController(coeffs[:7], **gains)
+        rate = AdaptiveRate(active_period=DT, **rate_kwargs)
+        metrics = TrialMetrics()
+        state = {"ticks": 0, "cpu": 0.0, "t0": 0.0, "seen": None}
+
+        def read(p):
+            position = read_potentialmeter(p.read_raw())
+            state["t0"] = time.perf_counter()
+            return position
+
+        def on_tick(c, p, now):
+            state["cpu"] += time.perf_counter() - state["t0"]
+            state["ticks"] += 1
+            metrics.update_from(c, now)
+            if mode == "fixed":
+                rate.next_period(c, now)  # only evaluates the wake criterion; every tick runs at full rate
+            if now >= start and rate.last_active == now and state["seen"] is None:
+                state["seen"] = now
+
+        run_trial(controller, plant, duration=start + 3.0, dt=DT, read=read, on_tick=on_tick,
+                  rate=rate if mode == "adaptive" else None)
+        summary = metrics.summary()
+        results[mode] = {"ticks": state["ticks"], "cpu": state["cpu"],
+                         "notice": state["seen"] - start if state["seen"] is not None else None,
+                         "stick_rms": summary.get("stick", {}).get("rms_error_N"),
+                         "slip_latency": summary["slip_latency_s"], "idle_time": rate.idle_time}
+    return motion, results
+
+
+def _mean_known(values):
+    """Mean over the trials where the value was measured (None: no slip or no onset seen); NaN if none was."""
+    known = [v for v in values if v is not None]
+    return float(np.mean(known)) if known else float("nan")
+
+
+def _simulate_job(args):
+    return simulate(*args)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Adaptive control rate vs. fixed rate: wake-up latency, skipped ticks "
+                                                 "and controller CPU over seeded simulated trials.")
+    parser.add_argument("--motions", default=",".join(HAND_MOTIONS))
+    parser.add_argument("--trials", type=int, default=20, help="trials per motion")
+    parser.add_argument("--idle", default="2,20", help="range of seconds the hand rests before pushing")
+    parser.add_argument("--noise", type=float, default=0.012, help="simulated potentiometer noise (mm)")
+    parser.add_argument("--idle-rate", type=float, default=10.0, help="control rate while idle (Hz)")
+    parser.add_argument("--wake-velocity", type=float, default=1.0, help="mm/s")
+    parser.add_argument("--wake-force", type=float, default=0.02, help="N")
+    parser.add_argument("--idle-after", type=float, default=0.5, help="s without interaction before idling")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--csv", help="write the per-motion table to this file")
+    args = parser.parse_args()
+
+    coeffs = np.load(os.path.join(ROOT, "assets/servo_model_coeffs.npy"))
+    gains = load_controller_gains(os.path.join(ROOT, "assets/controller_gains.json"))
+    rate_kwargs = dict(idle_period=1.0 / args.idle_rate, wake_velocity=args.wake_velocity,
+                       wake_force=args.wake_force, idle_after=args.idle_after)
+    lo, hi = (float(v) for v in args.idle.split(","))
+    rng = np.random.default_rng(args.seed)
+    jobs = [(motion, args.seed + k, coeffs, gains, args.noise, float(rng.uniform(lo, hi)), rate_kwargs)
+            for motion in args.motions.split(",") for k in range(args.trials)]
+
+    start = time.time()
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        trials = list(pool.map(_simulate_job, jobs))
+    print(f"Simulated {len(trials)} trial pairs in {time.time() - start:.1f} s "
+          f"(idle rate {args.idle_rate:g} Hz, full rate {1 / DT:g} Hz)\n")
+
+    rows = []
+    for motion in args.motions.split(","):
+        pairs = [r for m, r in trials if m == motion]
+        fixed = [p["fixed"] for p in pairs]
+        adaptive = [p["adaptive"] for p in pairs]
+        # Extra time to notice the push because the loop was idling
+        added = np.array([a["notice"] - f["notice"] for f, a in zip(fixed, adaptive)
+                          if a["notice"] is not None and f["notice"] is not None])
+        added = added if len(added) else np.array([np.nan])
+        rows.append({
+            "motion": motion,
+            "ticks_saved": 1 - sum(a["ticks"] for a in adaptive) / sum(f["ticks"] for f in fixed),
+            "cpu_saved": 1 - sum(a["cpu"] for a in adaptive) / sum(f["cpu"] for f in fixed),
+            "wake_latency_mean_ms": float(added.mean() * 1000),
+            "wake_latency_p95_ms": float(np.percentile(added, 95) * 1000),
+            "wake_latency_max_ms": float(added.max() * 1000),
+            "stick_rms_fixed_N": float(np.mean([f["stick_rms"] for f in fixed])),
+            "stick_rms_adaptive_N": float(np.mean([a["stick_rms"] for a in adaptive])),
+            "slip_latency_fixed_s": _mean_known([f["slip_latency"] for f in fixed]),
+            "slip_latency_adaptive_s": _mean_known([a["slip_latency"] for a in adaptive]),
+        })
+
+    print(f"{'motion':>15} {'ticks saved':>11} {'CPU saved':>9} {'wake +ms mean':>13} {'p95':>5} {'max':>5} "
+          f"{'stick RMS fixed/adaptive (N)':>28} {'slip latency (s)':>16}")
+    for r in rows:
+        print(f"{r['motion']:>15} {r['ticks_saved']:>11.0%} {r['cpu_saved']:>9.0%} {r['wake_latency_mean_ms']:>13.0f} "
+              f"{r['wake_latency_p95_ms']:>5.0f} {r['wake_latency_max_ms']:>5.0f} "
+              f"{r['stick_rms_fixed_N']:>14.4f} / {r['stick_rms_adaptive_N']:<11.4f} "
+              f"{r['slip_latency_fixed_s']:>7.3f} / {r['slip_latency_adaptive_s']:<6.3f}")
+
+    if args.csv:
+        with open(args.csv, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+        print(f"Saved to {args.csv}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
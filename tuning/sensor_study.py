@@ -0,0 +1,117 @@
+import argparse
+import csv
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from tuning.autotune import DT, DURATION, report_failures, trial_metrics
+from utils.controller import FrictionController, load_controller_gains
+from utils.simulation import HAND_MOTIONS, SENSOR_MODELS, SensorModel, SpringServoPlant, make_hand, run_trial
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+def run_sensor_trial(sensor, motion, seed, coeffs, gains):
+    """One closed-loop trial with the controller reading the position through `sensor`.
+
+    Returns RMS force error (N), response time (s) and whether the trial
+    calibrated, slipped and was released like a clean trial does.
+    """
+    hand, push_start = make_hand(motion)
+    plant = SpringServoPlant(coeffs, hand=hand, seed=seed)
+    controller = FrictionController(coeffs[:7], **gains)
+    read = SensorModel(seed=seed, **SENSOR_MODELS[sensor])
+    slipped = []
+
+    def on_tick(c, p, now):
+        if c.sliding and not slipped:
+            slipped.append(now)
+
+    log_list = run_trial(controller, plant, duration=DURATION, dt=DT, read=read, on_tick=on_tick)
+    rms, response = trial_metrics(log_list, push_start)
+    # A clean trial slips after the push starts and is released by the end
+    early_slip = bool(slipped) and slipped[0] < push_start
+    ok = controller.calibrated and controller.released and bool(slipped) and not early_slip
+    return rms, response, ok, early_slip
+
+
+def _trial_job(args):
+    """One trial; a trial that raises counts as failed and returns the traceback."""
+    sensor, motion, seed, coeffs, gains = args
+    try:
+        rms, response, ok, early_slip = run_sensor_trial(sensor, motion, seed, coeffs, gains)
+    except Exception:
+        return (sensor, motion, seed, float("inf"), float("inf"), False, False), traceback.format_exc()
+    return (sensor, motion, seed, rms, response, ok, early_slip), None
+
+
+def summarize(rows):
+    """Per sensor: RMS error distribution (finite trials), response time and failure rates."""
+    summary = {}
+    for sensor in dict.fromkeys(r[0] for r in rows):
+        trials = [r for r in rows if r[0] == sensor]
+        rms = np.array([r[3] for r in trials if np.isfinite(r[3])])
+        response = np.array([r[4] for r in trials if np.isfinite(r[4])])
+        summary[sensor] = {
+            "trials": len(trials),
+            "rms_mean": float(rms.mean()) if len(rms) else float("inf"),
+            "rms_p50": float(np.percentile(rms, 50)) if len(rms) else float("inf"),
+            "rms_p95": float(np.percentile(rms, 95)) if len(rms) else float("inf"),
+            "rms_max": float(rms.max()) if len(rms) else float("inf"),
+            "response_p50": float(np.percentile(response, 50)) if len(response) else float("inf"),
+            "failure_rate": 1 - sum(r[5] for r in trials) / len(trials),
+            "early_slip_rate": sum(r[6] for r in trials) / len(trials),
+        }
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Monte Carlo study of position-sensor noise in the closed loop.")
+    parser.add_argument("--sensors", default=",".join(SENSOR_MODELS), help="comma-separated SENSOR_MODELS names")
+    parser.add_argument("--motions", default=",".join(HAND_MOTIONS))
+    parser.add_argument("--trials", type=int, default=200, help="seeded trials per sensor and motion")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--csv", default="sensor_study_results.csv", help="every trial")
+    parser.add_argument("--config", default=os.path.join(ROOT, "assets/controller_gains.json"),
+                        help="tuned gains, as friction_render.py loads them")
+    args = parser.parse_args()
+
+    coeffs = np.load(os.path.join(ROOT, "assets/servo_model_coeffs.npy"))
+    gains = load_controller_gains(args.config)
+    sensors = args.sensors.split(",")
+    motions = args.motions.split(",")
+    # Every sensor sees the same hand motions and seeds
+    jobs = [(sensor, motion, args.seed + k, coeffs, gains)
+            for sensor in sensors for motion in motions for k in range(args.trials)]
+
+    print(f"Running {len(jobs)} trials ({len(sensors)} sensors x {len(motions)} motions x {args.trials} seeds) "
+          f"with {args.workers} workers...")
+    start = time.time()
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        outcomes = list(pool.map(_trial_job, jobs, chunksize=max(1, len(jobs) // (4 * args.workers))))
+    print(f"Done in {time.time() - start:.1f} s")
+    rows = [row for row, _ in outcomes]
+    report_failures([failure for _, failure in outcomes if failure is not None], f"of {len(outcomes)} trials")
+
+    with open(args.csv, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["sensor", "motion", "seed", "rms_error_N", "response_time_s", "ok", "early_slip"])
+        writer.writerows(rows)
+    print(f"Saved all trials to {args.csv}")
+
+    print(f"\n{'sensor':>10} {'rms mean':>9} {'p50':>7} {'p95':>7} {'max':>7} {'resp p50':>9} {'fail':>6} {'early':>6}")
+    for sensor, s in summarize(rows).items():
+        print(f"{sensor:>10} {s['rms_mean']:>9.4f} {s['rms_p50']:>7.4f} {s['rms_p95']:>7.4f} {s['rms_max']:>7.4f} "
+              f"{s['response_p50']:>9.3f} {s['failure_rate']:>6.1%} {s['early_slip_rate']:>6.1%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
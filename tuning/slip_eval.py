@@ -0,0 +1,228 @@
+import argparse
+import csv
+import glob
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from tuning.autotune import DT
+from utils.controller import FrictionController, load_controller_gains
+from utils.simulation import HAND_MOTIONS, SpringServoPlant, hand_push_release, run_trial
+from utils.slip_detector import STREAM_PARAMS, SlipDetector, save_slip_detector
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+SETTLE = 0.5  # s after calibration before false alarms count (the controller is still converging)
+RATES = (0.1, 1.0, 10.0, 100.0, 1000.0)  # false alarms per hour to design for
+
+
+class NeverSlip:
+    """Slip detector that never fires, so a simulated trial keeps sticking through the push."""
+
+    def reset(self):
+        pass
+
+    def stick(self, external_velocity, force_above_static):
+        return False
+
+    def slide(self, external_velocity):
+        return False
+
+
+def simulate_streams(motion, seed, coeffs, gains, noise_std, stick_time):
+    """Detector streams of one closed-loop trial; the hand starts pushing stick_time s after calibration ends.
+
+    The controller never slips (NeverSlip), which is what every detector
+    sees until it fires: the streams are valid for any detector up to its
+    detection. Returns (t, external velocity, force above static friction,
+    static friction, onset) over the calibrated ticks; the onset is the
+    push start.
+    """
+    # Calibration takes about 2 s in simulation
+    kwargs = dict(HAND_MOTIONS[motion], start=2.0 + stick_time)
+    hand = partial(hand_push_release, **kwargs)
+    plant = SpringServoPlant(coeffs, hand=hand, noise_std=noise_std, seed=seed)
+    controller = FrictionController(coeffs[:7], slip_detector=NeverSlip(), **gains)
+    rows = []
+
+    def on_tick(c, p, now):
+        if c.calibrated and c.detectedForce > 0:
+            rows.append((now, c.external_velocity, c.detectedForce - c.maxStaticFriction, c.maxStaticFriction))
+
+    run_trial(controller, plant, duration=kwargs["start"] + 1.0, dt=DT, on_tick=on_tick)
+    t, ev, fr, static = np.array(rows).T
+    return t, ev, fr, static, kwargs["start"]
+
+
+def _simulate_job(args):
+    return simulate_streams(*args)
+
+
+def change_point(x):
+    """Offline maximum-likelihood index of a single mean shift in x."""
+    n = len(x)
+    k = np.arange(1, n)
+    csum = np.cumsum(x)[:-1]
+    left = csum / k
+    right = (x.sum() - csum) / (n - k)
+    return int(np.argmax(k * (n - k) * (left - right) ** 2)) + 1
+
+
+def log_streams(path):
+    """Detector streams from a friction_render.py log.
+
+    The log has velocity v and v + motorVelocity, so the external velocity
+    is 2v - (v + motorVelocity); the force above static friction is
+    rendered - desired while the desired force is the static level. The
+    onset is estimated offline (maximum-likelihood mean shift of the
+    external velocity) up to a little after the logged slip.
+    """
+    data = np.genfromtxt(path, delimiter=",", names=True)
+    data = data[data["Desired_force"] > 0]
+    t = data["Time_s"]
+    ev = 2 * data["Velocity"] - data["Handler_Velocity"]
+    desired = data["Desired_force"]
+    fr = data["Rendered_Force"] - desired
+    slipped = np.flatnonzero(desired < desired.max())
+    end = min(slipped[0] + 10, len(t)) if len(slipped) else len(t)
+    onset = t[change_point(ev[:end])] if end > 2 else t[-1]
+    static = np.full(len(t), desired.max())
+    return t, ev, fr, static, onset
+
+
+def replay(streams, detector):
+    """Feed recorded streams to detector: (false alarms before onset, detection delay or None, stick seconds)."""
+    t, ev, fr, static, onset = streams
+    start = t[0] + SETTLE
+    detector.reset()
+    false_alarms = 0
+    for i in range(len(t)):
+        if detector.stick(ev[i], fr[i]):
+            if t[i] >= onset:
+                return false_alarms, t[i] - onset, max(onset - start, 0.0)
+            if t[i] >= start:
+                false_alarms += 1
+    return false_alarms, None, max(onset - start, 0.0)
+
+
+class ThresholdRule:
+    """The controller's single-sample slip rule as a replayable detector."""
+
+    def __init__(self, delta_v=0.2, spring_rate=0.16):
+        self.delta_v = delta_v
+        self.spring_rate = spring_rate
+        self.static = 0.8
+
+    def reset(self):
+        pass
+
+    def stick(self, external_velocity, force_above_static):
+        # smoothedPosition > (static / k - 1.1) * 1.05, in force above static friction
+        return external_velocity > self.delta_v and force_above_static > 0.05 * self.static - 0.055 * self.spring_rate
+
+
+def stick_statistics(all_streams):
+    """Mean, std and lag-1 autocorrelation of both streams while sticking (after SETTLE, before the onset)."""
+    ev, fr = [], []
+    for t, v, f, static, onset in all_streams:
+        mask = (t >= t[0] + SETTLE) & (t < onset)
+        ev.append(v[mask])
+        fr.append(f[mask])
+    stats = {}
+    for name, parts in (("velocity", ev), ("force", fr)):
+        x = np.concatenate(parts)
+        mean = x.mean()
+        lagged = [(p[1:] - mean) @ (p[:-1] - mean) for p in parts if len(p) > 1]
+        stats[f"{name}_mean"] = float(mean)
+        stats[f"{name}_std"] = float(x.std())
+        stats[f"{name}_rho"] = float(np.sum(lagged) / np.sum((x - mean) ** 2))
+    return stats
+
+
+def evaluate(all_streams, detector):
+    delays, false_alarms, stick_time, missed = [], 0, 0.0, 0
+    for streams in all_streams:
+        if isinstance(detector, ThresholdRule):
+            detector.static = streams[3][0]
+        fa, delay, stick = replay(streams, detector)
+        false_alarms += fa
+        stick_time += stick
+        if delay is None:
+            missed += 1
+        else:
+            delays.append(delay)
+    delays = np.array(delays) if delays else np.array([np.inf])
+    return {"false_alarms_per_hour": false_alarms / stick_time * 3600 if stick_time > 0 else float("nan"),
+            "delay_mean": float(delays.mean()), "delay_p50": float(np.percentile(delays, 50)),
+            "delay_p95": float(np.percentile(delays, 95)), "missed": missed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Slip detection delay vs. false alarms: CUSUM detector and threshold rule.")
+    parser.add_argument("logs", nargs="*", help="friction_render.py CSV logs or directories of them; "
+                                                "without logs, seeded simulated trials are used")
+    parser.add_argument("--motions", default=",".join(HAND_MOTIONS))
+    parser.add_argument("--trials", type=int, default=20, help="simulated trials per motion")
+    parser.add_argument("--noise", type=float, default=0.012, help="simulated potentiometer noise (mm)")
+    parser.add_argument("--stick-time", type=float, default=30.0, help="simulated seconds of sticking before the push")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--velocity-shift", type=float, default=1.0, help="slowest push to detect quickly (mm/s)")
+    parser.add_argument("--force-shift", type=float, default=0.01, help="force rise to detect (N)")
+    parser.add_argument("--csv", help="write the delay / false-alarm table to this file")
+    parser.add_argument("--write", action="store_true",
+                        help="save the measured stream statistics to assets/slip_detector.json for friction_render.py")
+    args = parser.parse_args()
+
+    start = time.time()
+    if args.logs:
+        paths = []
+        for path in args.logs:
+            paths += sorted(glob.glob(os.path.join(path, "**", "*.csv"), recursive=True)) if os.path.isdir(path) else [path]
+        all_streams = [log_streams(path) for path in paths]
+        print(f"Loaded {len(all_streams)} logs")
+    else:
+        coeffs = np.load(os.path.join(ROOT, "assets/servo_model_coeffs.npy"))
+        gains = load_controller_gains(os.path.join(ROOT, "assets/controller_gains.json"))
+        jobs = [(motion, args.seed + k, coeffs, gains, args.noise, args.stick_time)
+                for motion in args.motions.split(",") for k in range(args.trials)]
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            all_streams = list(pool.map(_simulate_job, jobs))
+        print(f"Simulated {len(all_streams)} trials in {time.time() - start:.1f} s")
+
+    stats = stick_statistics(all_streams)
+    print("Stick-phase streams: external velocity {velocity_mean:+.3f} +- {velocity_std:.3f} mm/s, "
+          "force above static {force_mean:+.4f} +- {force_std:.4f} N".format(**stats))
+
+    rows = [("threshold rule", "", evaluate(all_streams, ThresholdRule()))]
+    for rate in RATES:
+        detector = SlipDetector(dt=DT, false_alarms_per_hour=rate, velocity_shift=args.velocity_shift,
+                                force_shift=args.force_shift, **stats)
+        rows.append(("cusum", rate, evaluate(all_streams, detector)))
+
+    print(f"\n{'detector':>15} {'design FA/h':>11} {'FA/h':>8} {'delay mean':>10} {'p50':>6} {'p95':>6} {'missed':>6}")
+    for name, rate, r in rows:
+        print(f"{name:>15} {rate:>11} {r['false_alarms_per_hour']:>8.2f} {r['delay_mean']:>10.3f} "
+              f"{r['delay_p50']:>6.3f} {r['delay_p95']:>6.3f} {r['missed']:>6}")
+
+    if args.csv:
+        with open(args.csv, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["detector", "design_false_alarms_per_hour", *rows[0][2]])
+            writer.writerows([(name, rate, *r.values()) for name, rate, r in rows])
+        print(f"Saved to {args.csv}")
+    if args.write:
+        path = os.path.join(ROOT, "assets/slip_detector.json")
+        save_slip_detector(stats, path, source="logs" if args.logs else f"simulation, noise {args.noise} mm")
+        print(f"Stream statistics written to {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+class AdaptiveRate:
+    """Control period chosen from the interaction state: full rate while touched, a low rate while idle.
+
+    Call next_period(controller, now) after every finish_tick(); it returns
+    the time until the next tick. The loop runs at active_period while the
+    controller calibrates or slides, while the external velocity exceeds
+    wake_velocity (mm/s) or the rendered force is off the desired force by
+    more than wake_force (N). After idle_after seconds without any of that
+    it drops to idle_period, and the first idle tick that crosses a
+    threshold switches straight back to active_period. Waking therefore
+    takes one idle period plus however long the reading, averaged over
+    that period, needs to cross a threshold: up to 120 ms at 10 Hz in
+    tuning/rate_eval.py, 100 ms at the 95th percentile. While idle the
+    servo holds its last command. next_period() sets the controller's
+    multi_step flag for the idle ticks only, so the controller treats each
+    of them as several model steps (see FrictionController).
+
+    The statistics (ticks, idle time, wakes, longest idle gap before a
+    wake) are plain counters; summary() reports them with the share of
+    fixed-rate ticks that were skipped.
+    """
+
+    def __init__(self, active_period=0.02, idle_period=0.1, wake_velocity=1.0, wake_force=0.02, idle_after=0.5):
+        self.active_period = active_period
+        self.idle_period = idle_period
+        self.wake_velocity = wake_velocity
+        self.wake_force = wake_force
+        self.idle_after = idle_after
+        self.reset()
+
+    def reset(self):
+        self.idle = False
+        self.last_active = None
+        self.last_tick = None
+        self.first_tick = None
+        self.ticks = 0
+        self.idle_ticks = 0
+        self.idle_time = 0.0
+        self.wakes = 0
+        self.last_wake = None
+        self.max_wake_gap = 0.0
+
+    def next_period(self, controller, now):
+        c = controller
+        if self.first_tick is None:
+            self.first_tick = now
+            self.last_active = now
+        self.ticks += 1
+        v = c.external_velocity
+        f = c.detectedForce - c.frictionForce
+        wv, wf = self.wake_velocity, self.wake_force
+        if not c.calibrated or c.sliding or v > wv or v < -wv or f > wf or f < -wf:
+            if self.idle:
+                self.idle = False
+                self.wakes += 1
+                self.last_wake = now
+                gap = now - self.last_tick
+                if gap > self.max_wake_gap:
+                    self.max_wake_gap = gap
+            self.last_active = now
+        elif not self.idle and now - self.last_active >= self.idle_after:
+            self.idle = True
+        if self.idle:
+            self.idle_ticks += 1
+            self.idle_time += self.idle_period
+        self.last_tick = now
+        c.multi_step = self.idle
+        return self.idle_period if self.idle else self.active_period
+
+    def summary(self):
+        elapsed = (self.last_tick - self.first_tick) if self.ticks else 0.0
+        fixed_ticks = elapsed / self.active_period + 1 if self.ticks else 0
+        return {
+            "ticks": self.ticks,
+            "idle_ticks": self.idle_ticks,
+            "idle_time_s": round(self.idle_time, 3),
+            "wakes": self.wakes,
+            "max_wake_gap_s": round(self.max_wake_gap, 4),
+            "ticks_saved_fraction": round(1 - self.ticks / fixed_ticks, 4) if fixed_ticks else 0.0,
+        }
+
+    def summary_line(self):
+        s = self.summary()
+        return (f"adaptive rate: {s['ticks']} ticks, {s['ticks_saved_fraction']:.0%} of fixed-rate ticks skipped, "
+                f"idle {s['idle_time_s']:.1f} s, {s['wakes']} wakes (longest gap {s['max_wake_gap_s'] * 1000:.0f} ms)")
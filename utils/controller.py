@@ -0,0 +1,355 @@
+import json
+import math
+import os
+
+import numpy as np
+
+# Gains the auto-tuner (tuning/autotune.py) may write to assets/controller_gains.json
+TUNABLE_GAINS = ("Kp", "Ki", "Kd", "ff_gain", "slip_ff_gain", "slip_ff_scale", "slide_boost_min", "velocity_boost_scale")
+
+
+def load_controller_gains(path="assets/controller_gains.json"):
+    """Tuned gains as FrictionController keyword arguments; empty if the file does not exist."""
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        data = json.load(f)
+    return {k: v for k, v in data.get("gains", data).items() if k in TUNABLE_GAINS}
+
+
+def save_controller_gains(gains, path="assets/controller_gains.json", **meta):
+    with open(path, "w") as f:
+        json.dump({"gains": {k: gains[k] for k in TUNABLE_GAINS if k in gains}, **meta}, f, indent=2)
+
+
+class FrictionController:
+    """Karnopp stick/slip friction controller used by friction_render.py.
+
+    The controller is hardware-free: it consumes potentiometer positions (mm)
+    with their timestamps and produces servo angles. A tick is split in two
+    so the servo can be commanded as early as possible:
+
+        angle = controller.compute_command(position, now)  # None while initializing
+        servo.set(angle, ...)
+        controller.finish_tick()
+
+    step() runs both halves for simulations that do not care about the split.
+
+    Feed-forward: while the user pushes, the target moves back by
+    ff_gain * v_ext * dt, and while sliding by another
+    max(v_ext / slip_ff_scale, slip_ff_gain) * v_ext * dt. The proportional
+    term is boosted by max(tanh|positionChange|, slide_boost_min) while
+    sliding and by tanh|v_ext / velocity_boost_scale| while the user moves.
+
+    Latency compensation (prediction_horizon > 0, Smith-predictor style):
+    the servo FIR model tells how much of every past command has not shown
+    up at the potentiometer yet. The PID acts on the measured position plus
+    the displacement still pending over the next prediction_horizon ticks
+    instead of on the delayed measurement. A horizon of len(model_coeffs)
+    is the full Smith predictor. It does not shorten the servo dead time:
+    at the same Kp a step response is slower with prediction, because
+    the pending displacement already counts against the error. What it
+    buys is a much higher stable Kp, which is where the lower latency and
+    error come from (tuning/latency_eval.py).
+
+    While multi_step is set (AdaptiveRate sets it for its idle ticks), a
+    tick counts as round(dt / model_dt) model steps: the servo model's
+    history gets a zero command for each skipped step and its velocity is
+    averaged over them, and the position filter and positionChange
+    high-pass decay per step, so the first full-rate tick after an idle
+    one sees them at the model's time step. Otherwise every tick is one
+    model step whatever its length, so a late tick at the fixed rate is
+    rendered as before. The predictor and the CUSUM slip detector always
+    work per tick.
+
+    The per-tick path uses Python floats and math only (the FIR model and
+    the predictor are plain loops over preallocated lists), so a step
+    creates no NumPy temporaries and retains nothing; see
+    benchmarks/alloc_audit.py.
+
+    Friction textures (texture=FrictionTexture): while sliding, the surface
+    position advances by the external displacement v_ext * dt, and the
+    static and dynamic friction come from one table lookup at that position.
+
+    Slip detection: by default slip is declared on one tick where the
+    external velocity exceeds delta_v and the position is 5 % past the
+    static limit, and release when the hand pulls back faster than the
+    servo. With slip_detector=SlipDetector both decisions come from CUSUM
+    statistics on the external velocity and the force above static
+    friction instead (utils/slip_detector.py).
+
+    Haptic effects (effects=EffectGraph): springs, dampers, walls and
+    detents of a scene add their force to the desired friction force every
+    tick (never below zero), through the one function the graph compiles
+    to (utils/effects.py). They read the handle position (the hand's
+    travel since calibration, integrated from the external velocity while
+    sticking and sliding, unlike the surface position of the texture) and
+    the velocities of the previous tick. While sticking, the breakaway
+    force is the static friction plus the effect forces.
+    """
+
+    def __init__(self, model_coeffs, maxStaticFriction=0.8, dynamicFriction=0.4, spring_rate=0.16,
+                 delta_v=0.2, initTime=1.0, Kp=0.8, Ki=0, Kd=0.02, alpha=0.7, high_pass_alpha=0.3,
+                 max_angle=180, ff_gain=1.2, slip_ff_gain=2, slip_ff_scale=100, slide_boost_min=0.12,
+                 velocity_boost_scale=40, prediction_horizon=0, model_dt=0.02, texture=None, slip_detector=None,
+                 effects=None):
+        self.model_coeffs = np.asarray(model_coeffs, dtype=float)
+        self.affective_history = len(self.model_coeffs)
+        self.maxStaticFriction = maxStaticFriction
+        self.dynamicFriction = dynamicFriction
+        self.spring_rate = spring_rate
+        self.delta_v = delta_v
+        self.initTime = initTime
+        self.Kp, self.Ki, self.Kd = Kp, Ki, Kd
+        self.alpha = alpha
+        self.high_pass_alpha = high_pass_alpha
+        self.max_angle = max_angle
+        self.ff_gain = ff_gain
+        self.slip_ff_gain = slip_ff_gain
+        self.slip_ff_scale = slip_ff_scale
+        self.slide_boost_min = slide_boost_min
+        self.velocity_boost_scale = velocity_boost_scale
+        self.prediction_horizon = prediction_horizon
+        self.model_dt = model_dt
+        self.pending_weights = self.compute_pending_weights(self.model_coeffs, prediction_horizon, model_dt)
+        # Python-float copies for the per-tick loops; coefficients newest-last to match the history order
+        self._coeffs_oldest_first = self.model_coeffs[::-1].tolist()
+        self._pending_weights = self.pending_weights.tolist()
+        self.texture = texture
+        self.slip_detector = slip_detector
+        self.effects = effects
+        self._effect_force = effects.compile() if effects is not None else None
+        self.reset(0.0)
+
+    @staticmethod
+    def compute_pending_weights(model_coeffs, horizon, model_dt=0.02):
+        """Weights w such that dot(w, motorVelocity_history) is the displacement (mm) the
+        past commands will still produce over the next `horizon` ticks.
+
+        The model says the velocity measured j+1 ticks after a command of d degrees is
+        model_coeffs[j] * d, so a command issued j+1 ticks ago still has
+        model_dt * sum(model_coeffs[j+1 : j+1+horizon]) * d to go. The history is stored
+        oldest first, hence the reversal.
+        """
+        n = len(model_coeffs)
+        weights = np.array([model_dt * np.sum(model_coeffs[j + 1:j + 1 + horizon]) for j in range(n)])
+        return weights[::-1].copy()
+
+    def reset(self, start_time):
+        """Clear all per-trial state; the trial starts at start_time."""
+        self.start_time = start_time
+        self.last_time = start_time
+        self.lastSmoothedPosition = None
+        self.integral = 0
+        self.previous_error = 0
+        self.servoBaseAngle = 0
+        self.detectedForce = 0
+        self.frictionForce = 0
+        self.effectForce = 0.0
+        self.calibrated = False
+        self.sliding = False
+        self.released = False
+        self.lastTargetPosition = 0
+        self.targetPosition = 0
+        self.positionChange = 0
+        self.pid_scale_factor = 1
+        self.external_velocity = 0
+        self.motorVelocity = 0
+        self.smoothedPosition = 0
+        self.predictedPosition = 0
+        self.velocity = 0
+        self.error = 0
+        self.derivative = 0
+        self.controlSignal = 0
+        self.controlAngle = 0
+        self.error_percent = 0
+        self.dt = 0
+        self.model_steps = 1
+        self.multi_step = False  # set by AdaptiveRate while idling
+        self.motorVelocity_history = [0.0] * self.affective_history
+        self.surface_position = 0.0
+        self.handle_position = 0.0
+        if self.texture is not None:
+            self.maxStaticFriction, self.dynamicFriction = self.texture.lookup(0.0)
+        if self.slip_detector is not None:
+            self.slip_detector.reset()
+
+    def rearm(self, start_time, settle_time=0.1):
+        """Start a new trial without recalibrating.
+
+        If the previous trial finished calibration, the calibration and the
+        servo base angle are kept and the initialization phase is shortened
+        to settle_time (enough to seed the smoothing filter); otherwise this
+        is a full reset().
+        """
+        calibrated, servoBaseAngle = self.calibrated, self.servoBaseAngle
+        self.reset(start_time)
+        if calibrated:
+            self.calibrated = True
+            self.servoBaseAngle = servoBaseAngle
+            self.start_time = start_time - (self.initTime - settle_time)
+
+    def friction_force(self):
+        return self.dynamicFriction if self.sliding else self.maxStaticFriction
+
+    def compute_command(self, position, now):
+        """Filter the reading and return the servo angle for this tick.
+
+        Returns None during the initialization phase, when no command is issued.
+        """
+        dt = now - self.last_time
+        self.last_time = now
+        self.dt = dt
+        # Model steps (model_dt) this tick spans: more than 1 only for idle ticks of AdaptiveRate
+        model_steps = int(dt / self.model_dt + 0.5) if self.multi_step else 1
+        self.model_steps = model_steps if model_steps > 1 else 1
+
+        if self.lastSmoothedPosition is None:
+            smoothedPosition = position
+        elif self.model_steps == 1:
+            smoothedPosition = self.alpha * position + (1 - self.alpha) * self.lastSmoothedPosition
+        else:
+            keep = (1 - self.alpha) ** self.model_steps  # same time constant as per-step filtering
+            smoothedPosition = (1 - keep) * position + keep * self.lastSmoothedPosition
+        self.smoothedPosition = smoothedPosition
+
+        # === Initialization Phase ===
+        if now - self.start_time < self.initTime:
+            self.targetPosition = smoothedPosition
+            self.lastSmoothedPosition = smoothedPosition
+            self.previous_error = 0
+            return None
+
+        spring_rate = self.spring_rate
+        maxStaticFriction = self.maxStaticFriction
+        targetPosition = self.targetPosition
+
+        # === Calibration ===
+        if not self.calibrated:
+            self.frictionForce = 0
+            if smoothedPosition > (1.1 + 4):
+                targetPosition = smoothedPosition - 2
+            elif smoothedPosition > (maxStaticFriction / spring_rate - 1 + 1):
+                targetPosition = smoothedPosition - 0.3
+            elif smoothedPosition > (maxStaticFriction / spring_rate - 1 + 0.1):
+                targetPosition = smoothedPosition - 0.1
+            elif smoothedPosition > (maxStaticFriction / spring_rate - 1 + 0.02):
+                targetPosition = smoothedPosition - 0.01
+            elif smoothedPosition <= (maxStaticFriction / spring_rate - 1 + 0.03):
+                self.calibrated = True
+                self.integral = 0
+
+        else:
+            # === Control ===
+            self.detectedForce = (smoothedPosition + 1.1) * spring_rate
+            frictionForce = self.friction_force()
+            if self._effect_force is not None:
+                self.effectForce = self._effect_force(self.handle_position, self.velocity, self.external_velocity)
+                frictionForce += self.effectForce
+                frictionForce = frictionForce if frictionForce > 0.0 else 0.0
+            self.frictionForce = frictionForce
+            targetPosition = frictionForce / spring_rate - 1
+
+        # === PID ===
+        external_velocity = self.external_velocity
+        if self.calibrated and external_velocity > 0:
+            targetPosition -= external_velocity * self.ff_gain * dt
+            if self.sliding:
+                targetPosition -= external_velocity * max(external_velocity / self.slip_ff_scale, self.slip_ff_gain) * dt
+        self.targetPosition = targetPosition
+
+        self.velocity = (smoothedPosition - self.lastSmoothedPosition) / dt
+        predictedPosition = smoothedPosition
+        if self.prediction_horizon:
+            pending = 0.0
+            history = self.motorVelocity_history
+            for j, w in enumerate(self._pending_weights):
+                pending += w * history[j]
+            predictedPosition = smoothedPosition + pending
+        self.predictedPosition = predictedPosition
+        error = targetPosition - predictedPosition
+        self.integral += error * dt
+        self.derivative = (error - self.previous_error) / dt if dt > 0 else 0
+        self.error = error
+        self.controlSignal = -(self.Kp * error * self.pid_scale_factor + self.Ki * self.integral + self.Kd * self.derivative)
+        self.controlAngle = min(max(self.servoBaseAngle + self.controlSignal, 0.0), self.max_angle)
+        return self.controlAngle
+
+    def finish_tick(self):
+        """Update the motor-velocity model and the stick/slip state after the servo was commanded."""
+        motorVelocity = 0.0
+        history = self.motorVelocity_history
+        for j, c in enumerate(self._coeffs_oldest_first):
+            motorVelocity += c * history[j]
+        steps = self.model_steps
+        if steps > 1:
+            # A longer tick: the servo kept moving over steps model steps with no new command.
+            # Average the model's velocity over them, and leave the history at model_dt spacing.
+            total = motorVelocity
+            for _ in range(min(steps, len(history) + 1) - 1):
+                history.pop(0)
+                history.append(0.0)
+                for j, c in enumerate(self._coeffs_oldest_first):
+                    total += c * history[j]
+            motorVelocity = total / steps
+        self.motorVelocity = motorVelocity
+        velocity = self.velocity
+
+        external_velocity = velocity - motorVelocity
+        self.external_velocity = external_velocity
+        self.previous_error = self.error
+
+        if steps == 1:
+            self.positionChange = self.high_pass_alpha * (self.positionChange + self.targetPosition - self.lastTargetPosition)
+        else:
+            self.positionChange = (self.high_pass_alpha ** steps * self.positionChange
+                                   + self.high_pass_alpha * (self.targetPosition - self.lastTargetPosition))
+
+        pid_enhance = 0
+        if self.calibrated:
+            if self.sliding:
+                pid_enhance = pid_enhance + max(math.tanh(abs(self.positionChange)), self.slide_boost_min)
+            if external_velocity > self.delta_v:
+                pid_enhance = pid_enhance + math.tanh(abs(external_velocity / self.velocity_boost_scale))
+        self.pid_scale_factor = 1 + pid_enhance
+
+        frictionForce = self.frictionForce
+        self.error_percent = 100 * (self.detectedForce - frictionForce) / frictionForce if frictionForce > 0 else 0
+
+        detector = self.slip_detector
+        if detector is not None:
+            if self.calibrated and not self.sliding:
+                if detector.stick(external_velocity, self.detectedForce - self.maxStaticFriction - self.effectForce):
+                    self.sliding = True
+            elif self.calibrated and self.sliding and detector.slide(external_velocity):
+                self.released = True
+                return
+
+        elif (self.calibrated and not self.sliding and velocity - motorVelocity > self.delta_v
+                and self.smoothedPosition > ((self.maxStaticFriction + self.effectForce) / self.spring_rate - 1.1) * 1.05):
+            self.sliding = True
+
+        elif self.calibrated and self.sliding and velocity < 0 and motorVelocity > velocity + 5:
+            self.released = True
+            return
+
+        if self.calibrated:
+            self.handle_position += external_velocity * self.dt
+        if self.sliding:
+            self.surface_position += external_velocity * self.dt
+            if self.texture is not None:
+                self.maxStaticFriction, self.dynamicFriction = self.texture.lookup(self.surface_position)
+
+        angle_change = self.controlAngle - self.servoBaseAngle
+        self.motorVelocity_history.pop(0)
+        self.motorVelocity_history.append(angle_change)
+
+        self.servoBaseAngle = self.controlAngle
+        self.lastSmoothedPosition = self.smoothedPosition
+        self.lastTargetPosition = self.targetPosition
+
+    def step(self, position, now):
+        angle = self.compute_command(position, now)
+        if angle is not None:
+            self.finish_tick()
+        return angle
@@ -0,0 +1,438 @@
+import collections
+import errno
+import json
+import os
+import selectors
+import socket
+import struct
+import tempfile
+import threading
+import time
+
+DEFAULT_PATH = os.path.join(tempfile.gettempdir(), "friction_device.sock")
+
+# One request or reply per SOCK_SEQPACKET packet
+MESSAGE = struct.Struct("<BBhd")  # kind, channel / pin, int argument (raw code, flag), float argument (time, µs, Hz)
+
+# Requests
+OP_READ = 1  # one conversion of an ADC channel, answered with REPLY_SAMPLE
+OP_SET_PWM = 2  # pulse width (µs) on a PWM pin; no reply
+OP_ENABLE = 3  # PWM output on/off; no reply
+OP_SUBSCRIBE = 4  # stream a channel at the given rate (Hz), 0 stops it
+OP_INFO = 5  # answered with REPLY_INFO
+
+# Replies; REPLY_INFO and REPLY_ERROR carry a JSON body after the kind byte. An error names the
+# request (op, channel) it belongs to, so a client waiting for one reply can tell it from the
+# late error of an earlier fire-and-forget command.
+REPLY_SAMPLE = 1
+REPLY_STREAM = 2
+REPLY_INFO = 3
+REPLY_ERROR = 4
+
+
+class DeviceError(RuntimeError):
+    pass
+
+
+# === Backends: what the daemon owns ===
+
+class HardwareBackend:
+    """The ADS1115 channels and the PWM pins, opened once for the daemon's lifetime."""
+
+    name = "hardware"
+
+    def __init__(self, adc_channels=(0,), pwm_pins=(18,), fast=None):
+        from utils.fast_ads1115 import open_potentiometer
+        from utils.pi5RC import pi5RC
+
+        self.pots = {channel: open_potentiometer(channel, fast, daemon=False) for channel in adc_channels}
+        self.servos = {pin: pi5RC(pin) for pin in pwm_pins}
+
+    def read(self, channel):
+        return self.pots[channel].value
+
+    def set_pwm(self, pin, on_time_us):
+        self.servos[pin].set_pwm(int(on_time_us))
+
+    def enable(self, pin, flag):
+        self.servos[pin].enable(flag)
+
+    def close(self):
+        for pin in list(self.servos):
+            del self.servos[pin]  # pi5RC.__del__ disables and unexports the channel
+
+
+class StubBackend:
+    """A simulated spring, servo and hand (SpringServoPlant) in place of the hardware, advanced in real time.
+
+    Channel 0 reads the plant's potentiometer and pin 18 drives its servo;
+    any other channel reads 0 and other pins are accepted and ignored, so
+    clients written for the hardware run unchanged.
+    """
+
+    name = "stub"
+
+    def __init__(self, plant=None, adc_channels=(0,), pwm_pins=(18,), dt=0.02, clock=time.monotonic):
+        if plant is None:
+            import numpy as np
+            from utils.simulation import SpringServoPlant
+            root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+            plant = SpringServoPlant(np.load(os.path.join(root, "assets/servo_model_coeffs.npy")), noise_std=0.012, seed=0)
+        from utils.simulation import FakePot, FakeServo
+
+        self.plant = plant
+        self.pots = {channel: FakePot(plant) if channel == 0 else None for channel in adc_channels}
+        self.servos = {pin: FakeServo(plant) if pin == 18 else None for pin in pwm_pins}
+        self.dt = dt
+        self.clock = clock
+        self.start = clock()
+
+    def _advance(self):
+        now = self.clock() - self.start
+        while self.plant.time + self.dt <= now:
+            self.plant.advance(self.dt)
+
+    def read(self, channel):
+        pot = self.pots[channel]
+        self._advance()
+        return pot.value if pot is not None else 0
+
+    def set_pwm(self, pin, on_time_us):
+        servo = self.servos[pin]
+        if servo is not None:
+            self._advance()
+            servo.set_pwm(on_time_us)
+
+    def enable(self, pin, flag):
+        self.servos[pin]  # unknown pins are an error like on the hardware
+
+    def close(self):
+        pass
+
+
+# === Daemon ===
+
+class _Client:
+    def __init__(self, sock):
+        self.sock = sock
+        self.streams = {}  # channel -> [period, next due time]
+        self.dropped = 0
+
+
+class DeviceDaemon:
+    """Owns a backend and serves it to any number of local clients over a Unix socket.
+
+    Clients send fixed 12-byte requests (MESSAGE) in SOCK_SEQPACKET
+    packets: reads are answered with a sample, PWM commands are applied on
+    arrival without a reply, subscriptions stream samples of a channel at a
+    fixed rate. One thread runs everything in a selector loop whose
+    timeout is the next due stream sample, so the ADC and PWM are only
+    touched from that thread, and a channel due for several subscribers is
+    converted once. A stream sample that does not fit in a slow client's
+    socket buffer is dropped (and counted) instead of blocking the others.
+    """
+
+    def __init__(self, backend, path=DEFAULT_PATH, clock=time.monotonic):
+        self.backend = backend
+        self.path = path
+        self.clock = clock
+        self.clients = {}
+        self.requests = 0
+        self.samples_sent = 0
+        self.errors = 0
+        self.started = time.time()
+        self._stop = threading.Event()
+        self._thread = None
+
+        if os.path.exists(path):
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+            try:
+                probe.connect(path)
+            except OSError:
+                os.unlink(path)  # left over from a daemon that died
+            else:
+                probe.close()
+                raise DeviceError(f"A device daemon is already running on {path}")
+        self.listener = socket.socket(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+        self.listener.bind(path)
+        self.listener.listen()
+        self.listener.setblocking(False)
+        self.selector = selectors.DefaultSelector()
+        self.selector.register(self.listener, selectors.EVENT_READ)
+
+    # --- request handling ---
+    def _accept(self):
+        sock, _ = self.listener.accept()
+        sock.setblocking(False)
+        self.clients[sock.fileno()] = _Client(sock)
+        self.selector.register(sock, selectors.EVENT_READ)
+
+    def _drop(self, client):
+        self.selector.unregister(client.sock)
+        del self.clients[client.sock.fileno()]
+        client.sock.close()
+
+    def _send(self, client, data):
+        try:
+            client.sock.send(data)
+            return True
+        except BlockingIOError:
+            client.dropped += 1
+        except OSError:
+            pass  # disconnected; the next read sees EOF
+        return False
+
+    def _error(self, client, message, op=0, channel=0):
+        self.errors += 1
+        self._send(client, bytes([REPLY_ERROR]) + json.dumps({"error": message, "op": op, "channel": channel}).encode())
+
+    def _handle(self, client, packet):
+        self.requests += 1
+        if len(packet) != MESSAGE.size:
+            return self._error(client, f"bad request of {len(packet)} bytes")
+        op, channel, arg, value = MESSAGE.unpack(packet)
+        try:
+            if op == OP_READ:
+                raw = self.backend.read(channel)
+                self._send(client, MESSAGE.pack(REPLY_SAMPLE, channel, raw, time.time()))
+            elif op == OP_SET_PWM:
+                self.backend.set_pwm(channel, value)
+            elif op == OP_ENABLE:
+                self.backend.enable(channel, bool(arg))
+            elif op == OP_SUBSCRIBE:
+                if value > 0:
+                    self.backend.read(channel)  # unknown channels fail now rather than in the stream
+                    client.streams[channel] = [1.0 / value, self.clock()]
+                else:
+                    client.streams.pop(channel, None)
+            elif op == OP_INFO:
+                self._send(client, bytes([REPLY_INFO]) + json.dumps(self.info()).encode())
+            else:
+                self._error(client, f"unknown request {op}", op, channel)
+        except KeyError:
+            self._error(client, f"{'channel' if op in (OP_READ, OP_SUBSCRIBE) else 'pin'} {channel} is not served",
+                        op, channel)
+        except OSError as e:  # I2C or sysfs failure: fails this request, not the daemon
+            self._error(client, f"{'channel' if op in (OP_READ, OP_SUBSCRIBE) else 'pin'} {channel}: {e}", op, channel)
+
+    def info(self):
+        return {"backend": self.backend.name, "pid": os.getpid(), "uptime_s": round(time.time() - self.started, 3),
+                "channels": sorted(self.backend.pots), "pins": sorted(self.backend.servos),
+                "clients": len(self.clients), "requests": self.requests, "samples_sent": self.samples_sent,
+                "errors": self.errors,
+                "streams": sum(len(c.streams) for c in self.clients.values()),
+                "dropped": sum(c.dropped for c in self.clients.values())}
+
+    def _stream(self, now):
+        """Send every stream sample that is due; returns the time the next one is."""
+        readings = {}
+        next_due = None
+        for client in list(self.clients.values()):
+            for channel, due in client.streams.items():
+                period, t = due
+                if t <= now:
+                    if channel not in readings:
+                        try:
+                            readings[channel] = MESSAGE.pack(REPLY_STREAM, channel, self.backend.read(channel),
+                                                             time.time())
+                        except OSError:
+                            readings[channel] = None  # a failed conversion skips this sample
+                            self.errors += 1
+                    if readings[channel] is not None and self._send(client, readings[channel]):
+                        self.samples_sent += 1
+                    # Keep the rate without bursts after a stall
+                    due[1] = t + period if t + period > now else now + period
+                if next_due is None or due[1] < next_due:
+                    next_due = due[1]
+        return next_due
+
+    # --- loop ---
+    def serve(self, duration=None):
+        """Run the loop until stop() (or for `duration` seconds)."""
+        end = None if duration is None else self.clock() + duration
+        next_due = None
+        while not self._stop.is_set():
+            now = self.clock()
+            if end is not None and now >= end:
+                break
+            timeout = 0.1 if next_due is None else max(next_due - now, 0.0)
+            if end is not None:
+                timeout = min(timeout, end - now)
+            for key, _ in self.selector.select(min(timeout, 0.1)):
+                if key.fileobj is self.listener:
+                    self._accept()
+                    continue
+                client = self.clients[key.fileobj.fileno()]
+                while True:
+                    try:
+                        packet = client.sock.recv(64)
+                    except BlockingIOError:
+                        break
+                    except OSError:
+                        packet = b""
+                    if not packet:
+                        self._drop(client)
+                        break
+                    self._handle(client, packet)
+            next_due = self._stream(self.clock())
+
+    def start(self):
+        """Serve from a background thread (for in-process use and benchmarks)."""
+        self._thread = threading.Thread(target=self.serve, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def close(self):
+        self.stop()
+        for client in list(self.clients.values()):
+            self._drop(client)
+        self.selector.close()
+        self.listener.close()
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self.backend.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# === Client ===
+
+class DeviceClient:
+    """Connection to a running DeviceDaemon. Connecting costs a socket, not a hardware setup."""
+
+    def __init__(self, path=DEFAULT_PATH, timeout=1.0):
+        self.path = path
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+        try:
+            self.sock.connect(path)
+        except OSError as e:
+            self.sock.close()
+            if e.errno in (errno.ENOENT, errno.ECONNREFUSED):
+                raise DeviceError(f"No device daemon on {path} (start one with: python device_daemon.py serve)") from e
+            raise
+        self.sock.settimeout(timeout)
+        self.pending = collections.deque()  # stream samples that arrived while waiting for a reply
+        self.errors = collections.deque(maxlen=32)  # late errors of fire-and-forget commands (set_pwm, enable)
+        self.stream_error = None
+        self._request = MESSAGE.pack
+
+    def _receive(self, kind, op):
+        """Next reply of `kind` to request `op`, queueing stream samples that come first.
+
+        An error for `op` is raised; errors of earlier fire-and-forget
+        commands are kept in `errors` and do not take the place of the reply.
+        """
+        while True:
+            packet = self.sock.recv(4096)
+            if not packet:
+                raise DeviceError("Device daemon closed the connection")
+            got = packet[0]
+            if got == kind:
+                return packet
+            if got == REPLY_STREAM:
+                self.pending.append(MESSAGE.unpack(packet))
+            elif got == REPLY_ERROR:
+                error = json.loads(packet[1:])
+                if error.get("op") == op:
+                    raise DeviceError(error["error"])
+                if error.get("op") == OP_SUBSCRIBE:
+                    self.stream_error = error["error"]  # raised by samples()
+                else:
+                    self.errors.append(error["error"])
+
+    def read(self, channel=0):
+        """One raw ADC code of the channel."""
+        self.sock.send(self._request(OP_READ, channel, 0, 0.0))
+        return MESSAGE.unpack(self._receive(REPLY_SAMPLE, OP_READ))[2]
+
+    def set_pwm(self, pin, on_time_us):
+        self.sock.send(self._request(OP_SET_PWM, pin, 0, on_time_us))
+
+    def enable(self, pin, flag):
+        self.sock.send(self._request(OP_ENABLE, pin, int(flag), 0.0))
+
+    def subscribe(self, channel=0, rate=100.0):
+        """Have the daemon stream the channel at `rate` Hz; rate 0 stops the stream."""
+        self.sock.send(self._request(OP_SUBSCRIBE, channel, 0, float(rate)))
+
+    def samples(self):
+        """Iterate over streamed samples as (wall time, channel, raw code)."""
+        while True:
+            while self.pending:
+                _, channel, raw, t = self.pending.popleft()
+                yield t, channel, raw
+            if self.stream_error is not None:
+                error, self.stream_error = self.stream_error, None
+                raise DeviceError(error)
+            self.pending.append(MESSAGE.unpack(self._receive(REPLY_STREAM, OP_SUBSCRIBE)))
+
+    def info(self):
+        self.sock.send(self._request(OP_INFO, 0, 0, 0.0))
+        return json.loads(self._receive(REPLY_INFO, OP_INFO)[1:])
+
+    def pot(self, channel=0):
+        return RemotePot(self, channel)
+
+    def servo(self, pin=18):
+        return RemoteServo(self, pin)
+
+    def close(self):
+        self.sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class RemotePot:
+    """Stands in for adafruit AnalogIn / FastADS1115: .value reads through the daemon."""
+
+    def __init__(self, client, channel=0):
+        self.client = client
+        self.channel = channel
+
+    @property
+    def value(self):
+        return self.client.read(self.channel)
+
+
+class RemoteServo:
+    """Stands in for pi5RC: commands go through the daemon, which keeps the PWM channel exported."""
+
+    def __init__(self, client, pin=18):
+        self.client = client
+        self.pin = pin
+
+    def enable(self, flag):
+        self.client.enable(self.pin, flag)
+
+    def set(self, angle, angle_range=180.0, pulse_range=(500, 2400)):
+        self.set_pwm(int(((angle / angle_range) * (pulse_range[1] - pulse_range[0]) + pulse_range[0])))
+
+    def set_pwm(self, onTime_us):
+        self.onTime_us = onTime_us
+        self.client.set_pwm(self.pin, onTime_us)
+
+
+_clients = {}
+
+
+def connect(path=None):
+    """The process-wide client of the daemon at path: FRICTION_DAEMON if it is a path, else DEFAULT_PATH."""
+    if path is None:
+        path = os.environ.get("FRICTION_DAEMON", "")
+        path = DEFAULT_PATH if path in ("", "1") else path
+    if path not in _clients:
+        _clients[path] = DeviceClient(path)
+    return _clients[path]
@@ -0,0 +1,182 @@
+import json
+import math
+
+# Per-tick values an effect can read. position is the hand's travel since calibration (mm, the
+# controller's handle_position, which also moves while sticking), velocity the handle velocity and
+# external_velocity the hand's own velocity (mm/s)
+INPUTS = ("position", "velocity", "external_velocity")
+
+
+class Effect:
+    """A haptic effect: a force (N) from some of INPUTS, added to the desired friction force.
+
+    Subclasses declare the inputs they read, compute the force directly in
+    force() (the reference, interpreted path) and emit() the same formula
+    as a Python expression for EffectGraph.compile(). emit() gets shared:
+    shared(expr) returns the name of a local computed once per tick, so
+    effects asking for the same intermediate value share it.
+    """
+
+    inputs = ()
+
+    def force(self, position, velocity, external_velocity):
+        raise NotImplementedError
+
+    def emit(self, shared):
+        raise NotImplementedError
+
+
+class Spring(Effect):
+    """Pulls back toward `rest` with `stiffness` N/mm."""
+
+    inputs = ("position",)
+
+    def __init__(self, stiffness, rest=0.0):
+        self.stiffness = float(stiffness)
+        self.rest = float(rest)
+
+    def force(self, position, velocity, external_velocity):
+        return self.stiffness * (position - self.rest)
+
+    def emit(self, shared):
+        return f"{self.stiffness!r} * {shared(f'position - {self.rest!r}')}"
+
+
+class Damper(Effect):
+    """Resists the hand's motion with `damping` N per mm/s."""
+
+    inputs = ("external_velocity",)
+
+    def __init__(self, damping):
+        self.damping = float(damping)
+
+    def force(self, position, velocity, external_velocity):
+        return self.damping * external_velocity
+
+    def emit(self, shared):
+        return f"{self.damping!r} * external_velocity"
+
+
+class Wall(Effect):
+    """Virtual wall at `position` mm: a stiff spring plus damping once the hand is past it."""
+
+    inputs = ("position", "external_velocity")
+
+    def __init__(self, position, stiffness=0.5, damping=0.0):
+        self.position = float(position)
+        self.stiffness = float(stiffness)
+        self.damping = float(damping)
+
+    def force(self, position, velocity, external_velocity):
+        depth = position - self.position
+        return self.stiffness * depth + self.damping * external_velocity if depth > 0.0 else 0.0
+
+    def emit(self, shared):
+        depth = shared(f"position - {self.position!r}")
+        damping = f" + {self.damping!r} * external_velocity" if self.damping else ""
+        return f"({self.stiffness!r} * {depth}{damping} if {depth} > 0.0 else 0.0)"
+
+
+class Detent(Effect):
+    """Periodic notches: amplitude * sin(2 pi position / period + phase)."""
+
+    inputs = ("position",)
+
+    def __init__(self, period, amplitude=0.1, phase=0.0):
+        self.period = float(period)
+        self.amplitude = float(amplitude)
+        self.phase = float(phase)
+
+    def force(self, position, velocity, external_velocity):
+        return self.amplitude * math.sin(2 * math.pi * position / self.period + self.phase)
+
+    def emit(self, shared):
+        # Detents with the same period share the angle, identical ones the sine as well
+        angle = shared(f"{2 * math.pi / self.period!r} * position")
+        phase = f" + {self.phase!r}" if self.phase else ""
+        return f"{self.amplitude!r} * {shared(f'math.sin({angle}{phase})')}"
+
+
+EFFECT_TYPES = {"spring": Spring, "damper": Damper, "wall": Wall, "detent": Detent}
+
+
+class EffectGraph:
+    """The effects of one scene, compiled into a single fused force function.
+
+    compile() generates the source of
+
+        def scene_force(position, velocity, external_velocity):
+            _s0 = ...            # every shared intermediate, once
+            return e0 + e1 + ...
+
+    with all parameters inlined as constants, so a tick costs one call and
+    one expression however many effects the scene has, instead of a call
+    and attribute lookups per effect (force(), the interpreted reference).
+    """
+
+    def __init__(self, effects=(), name=""):
+        self.effects = list(effects)
+        self.name = name
+        for effect in self.effects:
+            unknown = set(effect.inputs) - set(INPUTS)
+            if unknown:
+                raise ValueError(f"{type(effect).__name__} reads unknown inputs: {', '.join(sorted(unknown))}")
+        self.source = None
+
+    @property
+    def inputs(self):
+        return tuple(name for name in INPUTS if any(name in e.inputs for e in self.effects))
+
+    def force(self, position, velocity, external_velocity):
+        total = 0.0
+        for effect in self.effects:
+            total += effect.force(position, velocity, external_velocity)
+        return total
+
+    def compile(self):
+        names = {}
+
+        def shared(expr):
+            if expr not in names:
+                names[expr] = f"_s{len(names)}"
+            return names[expr]
+
+        terms = [effect.emit(shared) for effect in self.effects]
+        lines = [f"def scene_force({', '.join(INPUTS)}):"]
+        lines += [f"    {name} = {expr}" for expr, name in names.items()]
+        lines.append(f"    return {' + '.join(terms) if terms else '0.0'}")
+        self.source = "\n".join(lines) + "\n"
+        namespace = {"math": math}
+        exec(compile(self.source, f"<scene {self.name or 'anonymous'}>", "exec"), namespace)
+        return namespace["scene_force"]
+
+
+def load_scene(path):
+    """Scene from JSON: {"name": ..., "effects": [{"type": "wall", "position": 10, ...}, ...]}."""
+    with open(path) as f:
+        data = json.load(f)
+    effects = [EFFECT_TYPES[spec.pop("type")](**spec) for spec in data["effects"]]
+    return EffectGraph(effects, data.get("name", path))
+
+
+# === Scene library ===
+
+SCENES = {
+    "friction": lambda: EffectGraph([], "friction"),
+    "spring": lambda: EffectGraph([Spring(0.02)], "spring"),
+    "wall": lambda: EffectGraph([Wall(15.0, stiffness=0.5, damping=0.01)], "wall"),
+    "detents": lambda: EffectGraph([Detent(4.0, 0.1)], "detents"),
+    # Spring-loaded slider that stiffens past 10 mm and stops at 30 mm, with notches: eight effects
+    "workbench": lambda: EffectGraph([
+        Spring(0.01, rest=10.0), Damper(0.005),
+        Wall(10.0, stiffness=0.05), Wall(30.0, stiffness=0.5, damping=0.01),
+        Detent(4.0, 0.08), Detent(10.0, 0.05), Detent(2.0, 0.02), Detent(4.0, 0.03, phase=math.pi / 2),
+    ], "workbench"),
+}
+
+
+def make_scene(spec):
+    """A library scene by name, or a scene JSON file by path."""
+    if spec in SCENES:
+        return SCENES[spec]()
+    return load_scene(spec)
@@ -0,0 +1,465 @@
+import os
+import shutil
+import stat
+import tempfile
+import threading
+import time
+
+# === ADS1115 register map (datasheet SBAS444) ===
+REG_CONVERSION = 0x00
+REG_CONFIG = 0x01
+REG_LO_THRESH = 0x02
+REG_HI_THRESH = 0x03
+
+CONFIG_OS = 0x8000
+CONFIG_MODE_SINGLE = 0x0100
+CONFIG_DEFAULT = 0x8583
+DATA_RATES = [8, 16, 32, 64, 128, 250, 475, 860]  # samples/s, indexed by DR[7:5]
+PGA_FSR = [6.144, 4.096, 2.048, 1.024, 0.512, 0.256, 0.256, 0.256]  # volts, indexed by PGA[11:9]
+
+
+class VirtualClock:
+    """Deterministic clock; the fake bus advances it by the time each transaction takes."""
+
+    def __init__(self, start=0.0):
+        self.t = start
+
+    def __call__(self):
+        return self.t
+
+    def advance(self, dt):
+        self.t += dt
+
+    def sleep(self, dt):
+        self.t += max(dt, 0.0)
+
+
+class ADS1115Emulator:
+    """Register-level model of one ADS1115.
+
+    inputs maps AIN0..AIN3 to a callable f(t) -> volts (or a constant).
+    Conversions take 1/DR seconds (scaled by the oscillator error), in
+    single-shot mode the OS bit reads 0 until the conversion is done, in
+    continuous mode the conversion register holds the latest finished
+    conversion. ALERT/RDY works as conversion-ready or traditional
+    comparator depending on the threshold registers.
+    """
+
+    def __init__(self, inputs=None, address=0x48, clock=None, oscillator_error=0.0):
+        self.address = address
+        self.clock = clock if clock is not None else time.perf_counter
+        self.oscillator_error = oscillator_error
+        inputs = inputs or {}
+        self.inputs = [inputs.get(i, 0.0) for i in range(4)]
+        self.registers = {REG_CONVERSION: 0, REG_CONFIG: CONFIG_DEFAULT & ~CONFIG_OS, REG_LO_THRESH: 0x8000, REG_HI_THRESH: 0x7FFF}
+        self.pointer = REG_CONVERSION
+        self.conversion_start = None  # time the running (or first continuous) conversion started
+        self.conversions = 0
+        self.alert = False  # comparator / ready output asserted
+        self._last_index = -1
+
+    # --- configuration fields ---
+    @property
+    def config(self):
+        return self.registers[REG_CONFIG]
+
+    @property
+    def single_shot(self):
+        return bool(self.config & CONFIG_MODE_SINGLE)
+
+    @property
+    def data_rate(self):
+        return DATA_RATES[(self.config >> 5) & 0x07]
+
+    @property
+    def full_scale(self):
+        return PGA_FSR[(self.config >> 9) & 0x07]
+
+    @property
+    def conversion_time(self):
+        return (1.0 / self.data_rate) * (1.0 + self.oscillator_error)
+
+    # --- analog front end ---
+    def _input(self, channel, t):
+        source = self.inputs[channel]
+        return source(t) if callable(source) else float(source)
+
+    def _sample(self, t):
+        mux = (self.config >> 12) & 0x07
+        if mux >= 4:
+            volts = self._input(mux - 4, t)
+        else:
+            pos, neg = [(0, 1), (0, 3), (1, 3), (2, 3)][mux]
+            volts = self._input(pos, t) - self._input(neg, t)
+        code = int(round(volts / self.full_scale * 32768))
+        return min(max(code, -32768), 32767)
+
+    def _finish(self, code):
+        self.registers[REG_CONVERSION] = code & 0xFFFF
+        self.conversions += 1
+        self._update_alert(code)
+
+    def _update_alert(self, code):
+        if (self.config & 0x0003) == 0x0003:  # comparator disabled, pin high-Z
+            self.alert = False
+            return
+        lo = self.registers[REG_LO_THRESH]
+        hi = self.registers[REG_HI_THRESH]
+        if hi & 0x8000 and not lo & 0x8000:
+            self.alert = True  # conversion-ready pulse
+            return
+        lo = lo - 0x10000 if lo & 0x8000 else lo
+        hi = hi - 0x10000 if hi & 0x8000 else hi
+        if code > hi:
+            self.alert = True
+        elif code <= lo and not self.config & 0x0004:  # non-latching
+            self.alert = False
+
+    def _sync(self):
+        """Bring the conversion register up to date with the clock."""
+        if self.conversion_start is None:
+            return
+        now = self.clock()
+        period = self.conversion_time
+        if self.single_shot:
+            if now >= self.conversion_start + period:
+                self._finish(self._sample(self.conversion_start + period))
+                self.conversion_start = None
+            return
+        index = int((now - self.conversion_start) / period) - 1
+        if index > self._last_index:
+            self.conversions += index - self._last_index - 1  # conversions nobody read
+            self._last_index = index
+            self._finish(self._sample(self.conversion_start + (index + 1) * period))
+
+    # --- register access ---
+    def write(self, data):
+        if len(data) == 0:
+            return
+        self._sync()
+        self.pointer = data[0] & 0x03
+        if len(data) < 3:
+            return
+        value = (data[1] << 8) | data[2]
+        if self.pointer == REG_CONVERSION:
+            return  # read-only
+        if self.pointer != REG_CONFIG:
+            self.registers[self.pointer] = value
+            return
+        # OS is stored cleared; read() reports it from the conversion state
+        self.registers[REG_CONFIG] = value & ~CONFIG_OS
+        if not value & CONFIG_MODE_SINGLE:
+            self.conversion_start = self.clock()
+            self._last_index = -1
+        elif value & CONFIG_OS and self.conversion_start is None:
+            self.conversion_start = self.clock()
+            self.alert = False
+
+    def read(self, length=2):
+        self._sync()
+        value = self.registers[self.pointer]
+        if self.pointer == REG_CONFIG and self.conversion_start is None:
+            value |= CONFIG_OS  # not converting
+        out = bytes([(value >> 8) & 0xFF, value & 0xFF])
+        if self.pointer == REG_CONVERSION and self.alert:
+            ready_mode = self.registers[REG_HI_THRESH] & 0x8000 and not self.registers[REG_LO_THRESH] & 0x8000
+            if ready_mode or self.config & 0x0004:
+                self.alert = False  # ready pulse ends / latched comparator is cleared by the read
+        return (out * ((length + 1) // 2))[:length]
+
+    def alert_rdy(self):
+        """Logic level of the ALERT/RDY pin (active low unless COMP_POL is set)."""
+        self._sync()
+        active_high = bool(self.config & 0x0008)
+        return self.alert if active_high else not self.alert
+
+
+class FakeI2CBus:
+    """busio.I2C stand-in routing transactions to emulated devices.
+
+    Every transaction costs start/stop plus 9 bit times per byte (address
+    included) at `frequency`, plus `transaction_overhead` seconds of driver
+    time. With a VirtualClock the clock is advanced, otherwise the call
+    busy-waits so real throughput limits show up in wall-clock timings.
+    """
+
+    def __init__(self, devices, frequency=100_000, transaction_overhead=0.0, clock=None):
+        if not isinstance(devices, (list, tuple)):
+            devices = [devices]
+        self.devices = {dev.address: dev for dev in devices}
+        self.frequency = frequency
+        self.transaction_overhead = transaction_overhead
+        self.clock = clock
+        self.transactions = 0
+        self.bus_time = 0.0
+        self._locked = False
+
+    def _spend(self, nbytes):
+        dt = (nbytes + 1) * 9 / self.frequency + 2 / self.frequency + self.transaction_overhead
+        self.transactions += 1
+        self.bus_time += dt
+        if isinstance(self.clock, VirtualClock):
+            self.clock.advance(dt)
+        else:
+            end = time.perf_counter() + dt
+            while time.perf_counter() < end:
+                pass
+
+    def _device(self, address):
+        if address not in self.devices:
+            raise OSError(121, "Remote I/O error")
+        return self.devices[address]
+
+    # --- busio.I2C interface used by adafruit_bus_device ---
+    def try_lock(self):
+        if self._locked:
+            return False
+        self._locked = True
+        return True
+
+    def unlock(self):
+        self._locked = False
+
+    def scan(self):
+        return sorted(self.devices)
+
+    def writeto(self, address, buffer, *, start=0, end=None):
+        data = bytes(buffer[start:end])
+        device = self._device(address)
+        self._spend(len(data))
+        device.write(data)
+
+    def readfrom_into(self, address, buffer, *, start=0, end=None):
+        end = len(buffer) if end is None else end
+        device = self._device(address)
+        self._spend(end - start)
+        buffer[start:end] = device.read(end - start)
+
+    def writeto_then_readfrom(self, address, buffer_out, buffer_in, *, out_start=0, out_end=None, in_start=0, in_end=None):
+        self.writeto(address, buffer_out, start=out_start, end=out_end)
+        self.readfrom_into(address, buffer_in, start=in_start, end=in_end)
+
+    def deinit(self):
+        pass
+
+    def open_dev(self, address):
+        """File-like i2c-dev handle bound to one address (what ioctl(I2C_SLAVE) gives)."""
+        return FakeI2CDev(self, address)
+
+
+class FakeI2CDev:
+    def __init__(self, bus, address):
+        self.bus = bus
+        self.address = address
+
+    def write(self, data):
+        self.bus.writeto(self.address, data)
+        return len(data)
+
+    def read(self, length):
+        buf = bytearray(length)
+        self.bus.readfrom_into(self.address, buf)
+        return bytes(buf)
+
+    def readinto(self, buf):
+        self.bus.readfrom_into(self.address, buf)
+        return len(buf)
+
+    def close(self):
+        pass
+
+
+class FakePwmSysfs:
+    """Temporary /sys/class/pwm tree that pi5RC and PWMGroup can drive.
+
+    A background thread plays the kernel's part for export/unexport by
+    creating and removing pwmN directories. A stub pinctrl script logs its
+    arguments instead of touching GPIO.
+    """
+
+    def __init__(self, chips=None, root=None, poll_interval=0.005):
+        self.chips = chips if chips is not None else {0: 4, 2: 4}  # pwmchip -> npwm
+        base = "/dev/shm" if os.path.isdir("/dev/shm") else None
+        self.root = root or tempfile.mkdtemp(prefix="fake_sysfs_", dir=base)
+        self.pwm_root = os.path.join(self.root, "class", "pwm")
+        self.poll_interval = poll_interval
+        for chip, npwm in self.chips.items():
+            chip_path = self.chip_path(chip)
+            os.makedirs(chip_path, exist_ok=True)
+            for name in ("export", "unexport"):
+                open(os.path.join(chip_path, name), "w").close()
+            with open(os.path.join(chip_path, "npwm"), "w") as f:
+                f.write(f"{npwm}\n")
+        self.pinctrl = os.path.join(self.root, "pinctrl")
+        self.pinctrl_log = os.path.join(self.root, "pinctrl.log")
+        with open(self.pinctrl, "w") as f:
+            f.write(f"#!/bin/sh\necho \"$@\" >> \"{self.pinctrl_log}\"\n")
+        os.chmod(self.pinctrl, os.stat(self.pinctrl).st_mode | stat.S_IEXEC)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+
+    def chip_path(self, chip):
+        return os.path.join(self.pwm_root, f"pwmchip{chip}")
+
+    def channel_path(self, chip, chan):
+        return os.path.join(self.chip_path(chip), f"pwm{chan}")
+
+    def export(self, chip, chan):
+        path = self.channel_path(chip, chan)
+        os.makedirs(path, exist_ok=True)
+        for name, value in (("period", "0"), ("duty_cycle", "0"), ("enable", "0"), ("polarity", "normal")):
+            if not os.path.exists(os.path.join(path, name)):
+                with open(os.path.join(path, name), "w") as f:
+                    f.write(value + "\n")
+
+    def unexport(self, chip, chan):
+        shutil.rmtree(self.channel_path(chip, chan), ignore_errors=True)
+
+    def _take(self, path):
+        with open(path, "r+") as f:
+            value = f.read().strip()
+            if value:
+                f.seek(0)
+                f.truncate()
+        return value
+
+    def _serve(self):
+        while not self._stop.is_set():
+            for chip, npwm in self.chips.items():
+                for name, action in (("export", self.export), ("unexport", self.unexport)):
+                    value = self._take(os.path.join(self.chip_path(chip), name))
+                    if value.isdigit() and int(value) < npwm:
+                        action(chip, int(value))
+            self._stop.wait(self.poll_interval)
+
+    def state(self, chip, chan):
+        """Current period/duty_cycle/enable of a channel as ints, or None if not exported."""
+        path = self.channel_path(chip, chan)
+        if not os.path.isdir(path):
+            return None
+        result = {}
+        for name in ("period", "duty_cycle", "enable"):
+            with open(os.path.join(path, name)) as f:
+                text = f.read().strip()
+            result[name] = int(text) if text else 0
+        return result
+
+    def pinctrl_calls(self):
+        if not os.path.exists(self.pinctrl_log):
+            return []
+        with open(self.pinctrl_log) as f:
+            return [line.split() for line in f.read().splitlines()]
+
+    def make_servo(self, pin, **kwargs):
+        from utils.pi5RC import pi5RC
+        return pi5RC(pin, sysfs_root=self.pwm_root, pinctrl=self.pinctrl, **kwargs)
+
+    def make_group(self, pins, **kwargs):
+        from utils.pwm_group import PWMGroup
+        return PWMGroup(pins, sysfs_root=self.pwm_root, pinctrl=self.pinctrl, **kwargs)
+
+    def close(self):
+        self._stop.set()
+        self._thread.join()
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def potentiometer_source(position_fn):
+    """Turn a position function (mm, as read_potentialmeter reports it) into an
+    AIN voltage function for ADS1115Emulator at the default ±4.096 V range."""
+    def volts(t):
+        raw = (position_fn(t) - 1) * 1.01 / 10.5 * 32767.0
+        return min(max(raw, 0.0), 32767.0) / 32768.0 * 4.096
+    return volts
+
+
+class FakeLgpio:
+    """Stand-in for the lgpio module that records levels and wave schedules.
+
+    Waves are assumed to play back-to-back from the moment they are queued
+    (or when the previous one ends); `schedule` holds (time_us, gpio, level)
+    for every edge, with time measured on the fake's own microsecond clock.
+    """
+
+    TX_PWM = 0
+    TX_WAVE = 1
+
+    class pulse:
+        def __init__(self, group_bits, group_mask, pulse_delay):
+            self.group_bits = group_bits
+            self.group_mask = group_mask
+            self.pulse_delay = pulse_delay
+
+    def __init__(self, clock=None, queue_size=4):
+        self.clock = clock if clock is not None else time.perf_counter
+        self.queue_size = queue_size
+        self.levels = {}
+        self.groups = {}
+        self.schedule = []
+        self.waves = []
+        self._wave_end_us = {}
+        self._open = set()
+
+    def _now_us(self):
+        return int(self.clock() * 1e6)
+
+    def gpiochip_open(self, chip):
+        handle = len(self._open) + 1
+        self._open.add(handle)
+        return handle
+
+    def gpiochip_close(self, handle):
+        self._open.discard(handle)
+
+    def gpio_claim_output(self, handle, gpio, level=0, lFlags=0):
+        self.levels[gpio] = level
+
+    def group_claim_output(self, handle, gpios, levels=(0,), lFlags=0):
+        self.groups[gpios[0]] = list(gpios)
+        for i, gpio in enumerate(gpios):
+            self.levels[gpio] = levels[i] if i < len(levels) else 0
+
+    def group_free(self, handle, gpio):
+        self.groups.pop(gpio, None)
+
+    def gpio_write(self, handle, gpio, level):
+        self.levels[gpio] = level
+        self.schedule.append((self._now_us(), gpio, level))
+
+    def tx_wave(self, handle, gpio, pulses):
+        members = self.groups[gpio]
+        t = max(self._now_us(), self._wave_end_us.get(gpio, 0))
+        self.waves.append((t, list(pulses)))
+        for p in pulses:
+            for bit, member in enumerate(members):
+                if p.group_mask >> bit & 1:
+                    level = p.group_bits >> bit & 1
+                    if self.levels.get(member) != level:
+                        self.levels[member] = level
+                        self.schedule.append((t, member, level))
+            t += p.pulse_delay
+        self._wave_end_us[gpio] = t
+        return len(pulses)
+
+    def tx_busy(self, handle, gpio, kind):
+        return int(self._now_us() < self._wave_end_us.get(gpio, 0))
+
+    def tx_room(self, handle, gpio, kind):
+        now = self._now_us()
+        pending = sum(1 for start, _ in self.waves if start > now)
+        return self.queue_size - pending
+
+    def tx_pulse(self, handle, gpio, pulse_on, pulse_off, pulse_offset=0, pulse_cycles=0):
+        if pulse_on == 0 and pulse_off == 0:
+            self._wave_end_us[gpio] = self._now_us()
+
+    def step_times(self, gpio):
+        """Rising-edge times (us) of one gpio, e.g. the STEP pin."""
+        return [t for t, g, level in self.schedule if g == gpio and level == 1]
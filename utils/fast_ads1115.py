@@ -0,0 +1,118 @@
+import fcntl
+import io
+import os
+import struct
+
+I2C_SLAVE = 0x0703  # linux/i2c-dev.h
+
+# Same gain keys as adafruit_ads1x15 (gain -> PGA[11:9]) and their full-scale ranges
+GAINS = {2 / 3: (0, 6.144), 1: (1, 4.096), 2: (2, 2.048), 4: (3, 1.024), 8: (4, 0.512), 16: (5, 0.256)}
+DATA_RATES = {8: 0, 16: 1, 32: 2, 64: 3, 128: 4, 250: 5, 475: 6, 860: 7}
+
+_SAMPLE = struct.Struct(">h")
+
+
+class FastADS1115:
+    """Minimal ADS1115 driver: configure once, then one 2-byte read per sample.
+
+    The chip is put in continuous mode on one single-ended channel, and the
+    register pointer is left on the conversion register, so every sample is
+    a single I2C read through a persistent /dev/i2c-N handle. .value and
+    .voltage match adafruit AnalogIn, so scripts can swap one for the other.
+    Reading faster than data_rate returns the same conversion again.
+
+    dev is any file-like object with write()/readinto() already bound to the
+    chip address (e.g. FakeI2CBus.open_dev() from utils.emulator); by default
+    /dev/i2c-<bus> is opened.
+    """
+
+    def __init__(self, channel=0, gain=1, data_rate=860, bus=1, address=0x48, dev=None):
+        if channel not in (0, 1, 2, 3):
+            raise ValueError(f"Unsupported ADS1115 channel: {channel}")
+        if gain not in GAINS:
+            raise ValueError(f"Unsupported gain: {gain}")
+        if data_rate not in DATA_RATES:
+            raise ValueError(f"Unsupported data rate: {data_rate}")
+        self.channel = channel
+        self.gain = gain
+        self.data_rate = data_rate
+        self.address = address
+        self.full_scale = GAINS[gain][1]
+
+        if dev is None:
+            fd = os.open(f"/dev/i2c-{bus}", os.O_RDWR)
+            fcntl.ioctl(fd, I2C_SLAVE, address)
+            dev = io.FileIO(fd, "r+b", closefd=True)
+        self.dev = dev
+        self._buf = bytearray(2)
+
+        config = (0x04 + channel) << 12          # MUX: AINx vs GND
+        config |= GAINS[gain][0] << 9            # PGA
+        config |= DATA_RATES[data_rate] << 5     # DR, MODE=0 (continuous)
+        config |= 0x0003                         # comparator off
+        self.config = config
+        self.dev.write(bytes([0x01, config >> 8, config & 0xFF]))
+        self.dev.write(bytes([0x00]))            # leave the pointer on the conversion register
+
+    def read_raw(self):
+        self.dev.readinto(self._buf)
+        return _SAMPLE.unpack_from(self._buf)[0]
+
+    @property
+    def value(self):
+        return self.read_raw()
+
+    @property
+    def voltage(self):
+        return self.read_raw() * self.full_scale / 32767
+
+    def read_into(self, out, count=None):
+        """Fill out[0:count] (list, array.array or numpy array) with raw samples."""
+        count = len(out) if count is None else count
+        dev = self.dev
+        buf = self._buf
+        unpack = _SAMPLE.unpack_from
+        for i in range(count):
+            dev.readinto(buf)
+            out[i] = unpack(buf)[0]
+        return out
+
+    def close(self):
+        if self.dev is not None:
+            self.dev.close()
+            self.dev = None
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+def open_potentiometer(channel=0, fast=None, daemon=None):
+    """Potentiometer input with a .value like adafruit AnalogIn.
+
+    daemon=None follows FRICTION_DAEMON: when set, the channel is read
+    through the running device daemon (utils/device_daemon.py) instead of
+    opening the ADC. Otherwise fast=None follows FRICTION_FAST_ADC=1;
+    fast=True uses FastADS1115, else the Adafruit driver in its default
+    single-shot mode.
+    """
+    if daemon is None:
+        daemon = bool(os.environ.get("FRICTION_DAEMON"))
+    if daemon:
+        from utils.device_daemon import connect
+        return connect().pot(channel)
+    if fast is None:
+        fast = os.environ.get("FRICTION_FAST_ADC") == "1"
+    if fast:
+        return FastADS1115(channel=channel)
+
+    import board
+    import busio
+    import adafruit_ads1x15.ads1115 as ADS
+    from adafruit_ads1x15.analog_in import AnalogIn
+
+    i2c = busio.I2C(board.SCL, board.SDA)
+    ads = ADS.ADS1115(i2c)
+    return AnalogIn(ads, [ADS.P0, ADS.P1, ADS.P2, ADS.P3][channel])
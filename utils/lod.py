@@ -0,0 +1,169 @@
+import json
+import os
+import re
+
+import numpy as np
+
+
+def lttb(x, y, n_out):
+    """Largest-Triangle-Three-Buckets downsampling of a line to n_out points.
+
+    Keeps the first and last point and, from every bucket in between, the
+    point forming the largest triangle with the previously kept point and
+    the mean of the next bucket, so peaks survive.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return x, y
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    keep = np.empty(n_out, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        nxt_lo, nxt_hi = hi, edges[i + 2] if i + 2 < len(edges) else n
+        cx, cy = x[nxt_lo:nxt_hi].mean(), y[nxt_lo:nxt_hi].mean()
+        area = np.abs((x[a] - cx) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (cy - y[a]))
+        a = lo + int(np.argmax(area))
+        keep[i + 1] = a
+    return x[keep], y[keep]
+
+
+def _slug(name):
+    return re.sub(r"[^A-Za-z0-9]+", "_", name).strip("_").lower()
+
+
+class LogLOD:
+    """Level-of-detail cache of one friction_render.py CSV log.
+
+    Built once per log into `<log>.lod/` (next to the CSV) and rebuilt only
+    when the CSV changes. It holds every column as a memory-mapped .npy file,
+    a min/max pyramid per column (level k has 2**k * base_bin samples per
+    bin) and, for every 2-D histogram spec, one histogram per `chunk_s`
+    seconds of log. A figure of any window then reads at most a few thousand
+    values: the finest pyramid level with no more than max_bins bins in the
+    window, or the sum of the histogram chunks it covers. Windows with no
+    more than max_bins rows are served from the raw columns.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, "meta.json")) as f:
+            self.meta = json.load(f)
+        self.columns = self.meta["columns"]
+        self._arrays = {}
+        self.time = self._load("time")
+
+    def _load(self, key):
+        if key not in self._arrays:
+            self._arrays[key] = np.load(os.path.join(self.path, key + ".npy"), mmap_mode="r")
+        return self._arrays[key]
+
+    @classmethod
+    def for_csv(cls, csv_path, hists=None, base_bin=4, chunk_s=10.0):
+        """The LOD cache of csv_path, (re)built if missing or older than the CSV.
+
+        hists maps a name to (x column, y column, x edges, y edges, x scale);
+        x scale multiplies the x column before binning (exp_plot flips the
+        handler velocity).
+        """
+        path = os.path.splitext(csv_path)[0] + ".lod"
+        stat = os.stat(csv_path)
+        source = {"size": stat.st_size, "mtime": stat.st_mtime}
+        meta_path = os.path.join(path, "meta.json")
+        hists = {name: [x, y, list(map(float, xe)), list(map(float, ye)), scale]
+                 for name, (x, y, xe, ye, scale) in (hists or {}).items()}
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                meta = json.load(f)
+            if meta.get("source") == source and meta.get("hists") == hists and meta.get("base_bin") == base_bin:
+                return cls(path)
+        cls.build(csv_path, path, hists, base_bin, chunk_s, source)
+        return cls(path)
+
+    @staticmethod
+    def build(csv_path, path, hists, base_bin, chunk_s, source):
+        with open(csv_path) as f:
+            header = f.readline().strip().split(",")
+        data = np.loadtxt(csv_path, delimiter=",", skiprows=1, ndmin=2)
+        os.makedirs(path, exist_ok=True)
+        time = data[:, 0]
+        np.save(os.path.join(path, "time.npy"), time)
+        columns = {}
+        for j, name in enumerate(header[1:], start=1):
+            key = _slug(name)
+            columns[name] = key
+            y = data[:, j]
+            np.save(os.path.join(path, key + ".npy"), y)
+            level, size = 0, base_bin
+            while len(y) > size:
+                starts = np.arange(0, len(y), size)
+                np.save(os.path.join(path, f"{key}.L{level}.min.npy"), np.minimum.reduceat(y, starts))
+                np.save(os.path.join(path, f"{key}.L{level}.max.npy"), np.maximum.reduceat(y, starts))
+                level, size = level + 1, size * 2
+        chunks = np.floor((time - time[0]) / chunk_s).astype(np.int64) if len(time) else np.zeros(0, np.int64)
+        n_chunks = int(chunks[-1]) + 1 if len(chunks) else 0
+        bounds = np.searchsorted(chunks, np.arange(n_chunks + 1))
+        for name, (xcol, ycol, xedges, yedges, scale) in hists.items():
+            x = data[:, header.index(xcol)] * scale
+            y = data[:, header.index(ycol)]
+            counts = np.zeros((n_chunks, len(xedges) - 1, len(yedges) - 1), dtype=np.int32)
+            for c in range(n_chunks):
+                rows = slice(bounds[c], bounds[c + 1])
+                counts[c] = np.histogram2d(x[rows], y[rows], bins=[xedges, yedges])[0]
+            np.save(os.path.join(path, f"hist_{_slug(name)}.npy"), counts)
+        meta = {"source": source, "columns": columns, "base_bin": base_bin, "chunk_s": chunk_s, "hists": hists,
+                "t0": float(time[0]) if len(time) else 0.0}
+        with open(os.path.join(path, "meta.json"), "w") as f:
+            json.dump(meta, f, indent=2)
+
+    def rows(self, t0=None, t1=None):
+        """Row index range [i0, i1) of the window."""
+        i0 = 0 if t0 is None else int(np.searchsorted(self.time, t0, side="left"))
+        i1 = len(self.time) if t1 is None else int(np.searchsorted(self.time, t1, side="right"))
+        return i0, i1
+
+    def window(self, column, t0=None, t1=None):
+        """Raw time and values of a column inside the window."""
+        i0, i1 = self.rows(t0, t1)
+        return np.asarray(self.time[i0:i1]), np.asarray(self._load(self.columns[column])[i0:i1])
+
+    def envelope(self, column, t0=None, t1=None, max_bins=2000):
+        """Bin times and min/max of the column, at most about max_bins bins over the window."""
+        i0, i1 = self.rows(t0, t1)
+        key = self.columns[column]
+        base = self.meta["base_bin"]
+        level, size = 0, base
+        while (i1 - i0) / size > max_bins and os.path.exists(os.path.join(self.path, f"{key}.L{level + 1}.min.npy")):
+            level, size = level + 1, size * 2
+        if (i1 - i0) <= max_bins or not os.path.exists(os.path.join(self.path, f"{key}.L{level}.min.npy")):
+            t, y = self.window(column, t0, t1)
+            return t, y, y
+        b0, b1 = i0 // size, -(-i1 // size)
+        lo = np.asarray(self._load(f"{key}.L{level}.min")[b0:b1])
+        hi = np.asarray(self._load(f"{key}.L{level}.max")[b0:b1])
+        t = np.asarray(self.time[np.minimum(np.arange(b0, b1) * size + size // 2, len(self.time) - 1)])
+        return t, lo, hi
+
+    def line(self, column, t0=None, t1=None, n_out=2000):
+        """A line of at most n_out points for plot(): LTTB over the envelope, so peaks stay visible."""
+        t, lo, hi = self.envelope(column, t0, t1, max_bins=n_out)
+        if lo is not hi:
+            t, y = np.repeat(t, 2), np.column_stack([lo, hi]).ravel()
+        else:
+            y = lo
+        return lttb(t, y, n_out)
+
+    def hist2d(self, name, t0=None, t1=None):
+        """Counts of a 2-D histogram spec over the window, with its x and y edges.
+
+        Whole chunks are summed, so the window is rounded out to chunk_s.
+        """
+        xcol, ycol, xedges, yedges, scale = self.meta["hists"][name]
+        counts = self._load(f"hist_{_slug(name)}")
+        chunk_s, start = self.meta["chunk_s"], self.meta["t0"]
+        c0 = 0 if t0 is None else max(int((t0 - start) // chunk_s), 0)
+        c1 = len(counts) if t1 is None else int((t1 - start) // chunk_s) + 1
+        return np.asarray(counts[c0:c1]).sum(axis=0), np.array(xedges), np.array(yedges)
@@ -0,0 +1,214 @@
+import json
+import math
+import warnings
+
+PHASES = ("calibration", "stick", "slip")
+
+
+class RunningStats:
+    """Welford mean/variance plus RMS and peak |x|, in constant memory."""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.sum_sq = 0.0
+        self.peak = 0.0
+
+    def add(self, x):
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+        self.sum_sq += x * x
+        if abs(x) > self.peak:
+            self.peak = abs(x)
+
+    @property
+    def variance(self):
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def std(self):
+        return math.sqrt(self.variance)
+
+    @property
+    def rms(self):
+        return math.sqrt(self.sum_sq / self.count) if self.count else 0.0
+
+    def merge(self, other):
+        """Combine with another RunningStats (Chan et al. parallel update)."""
+        if other.count == 0:
+            return self
+        n = self.count + other.count
+        delta = other.mean - self.mean
+        self.m2 += other.m2 + delta * delta * self.count * other.count / n
+        self.mean += delta * other.count / n
+        self.count = n
+        self.sum_sq += other.sum_sq
+        self.peak = max(self.peak, other.peak)
+        return self
+
+
+class TrialMetrics:
+    """Online force-rendering quality metrics for one trial.
+
+    Feed one sample per tick with update() (or update_from(controller, t)).
+    Keeps, per phase, running mean/std/RMS/peak of the force error
+    (rendered - desired, N), time spent and time within tolerance of the
+    desired force; plus the stick-to-slip latency: time from the onset of
+    the push until slip is declared. The onset is the first tick of the
+    last unbroken run of stick ticks whose force error lies above a band
+    around the recent stick error: an exponentially weighted mean plus
+    ONSET_DEVIATIONS mean absolute deviations (and at least ONSET_FLOOR N),
+    learned while the force is inside the band. At rest the loop holds a
+    steady offset plus noise, which only briefly leaves the band, while a
+    push lifts the force out of it until breakaway. The latency is None
+    when there was no slip or no onset was seen (too few stick ticks, or
+    the force was back in the band when slip came).
+    """
+
+    ONSET_DEVIATIONS = 2.5
+    ONSET_FLOOR = 0.002  # N
+    ONSET_WEIGHT = 0.05  # per stick tick, about a 1 s memory at 50 Hz
+    ONSET_MIN_SAMPLES = 10  # stick ticks before the band means anything
+
+    def __init__(self, tolerance=0.1):
+        self.tolerance = tolerance
+        self.error = {phase: RunningStats() for phase in PHASES}
+        self.duration = {phase: 0.0 for phase in PHASES}
+        self.in_band = {phase: 0.0 for phase in PHASES}
+        self.last_t = None
+        self.last_phase = None
+        self.was_sliding = False  # controller.sliding at the previous update_from()
+        self.stick_level = 0.0  # recent stick error and its mean absolute deviation (N)
+        self.stick_deviation = 0.0
+        self.above_since = None  # first tick of the current run of stick ticks above the error band
+        self.breakaway_t = None
+        self.slip_t = None
+
+    def update(self, phase, t, desired, rendered):
+        dt = 0.0 if self.last_t is None else t - self.last_t
+        self.last_t = t
+        err = rendered - desired
+        stats = self.error[phase]
+        if phase == "stick":
+            band = self.ONSET_DEVIATIONS * self.stick_deviation
+            if stats.count >= self.ONSET_MIN_SAMPLES and err > self.stick_level + (
+                    band if band > self.ONSET_FLOOR else self.ONSET_FLOOR):
+                if self.above_since is None:
+                    self.above_since = t
+            else:
+                self.above_since = None
+                w = self.ONSET_WEIGHT if stats.count else 1.0
+                self.stick_level += w * (err - self.stick_level)
+                deviation = err - self.stick_level
+                self.stick_deviation += w * ((deviation if deviation > 0 else -deviation) - self.stick_deviation)
+        stats.add(err)
+        self.duration[phase] += dt
+        if abs(err) <= self.tolerance * abs(desired):
+            self.in_band[phase] += dt
+
+        if phase == "slip" and self.last_phase == "stick" and self.slip_t is None:
+            self.slip_t = t
+            self.breakaway_t = self.above_since
+        self.last_phase = phase
+
+    def update_from(self, controller, t):
+        """Sample a FrictionController after finish_tick().
+
+        The desired force is the one the controller tracked this tick,
+        friction plus any haptic effects, clipped at zero. Ticks without
+        one (the tick calibration finishes on, or effects cancelling the
+        friction) are skipped, as from_log() skips their rows. The tick on
+        which slip is declared still tracked the static force, so it counts
+        as stick, like its log row.
+        """
+        sliding = self.was_sliding
+        self.was_sliding = controller.sliding
+        if not controller.calibrated:
+            phase, desired = "calibration", controller.maxStaticFriction
+        else:
+            phase, desired = ("slip" if sliding else "stick"), controller.frictionForce
+            if desired <= 0.0:
+                return
+        rendered = (controller.smoothedPosition + 1.1) * controller.spring_rate
+        self.update(phase, t, desired, rendered)
+
+    @property
+    def slip_latency(self):
+        if self.slip_t is None or self.breakaway_t is None:
+            return None
+        return self.slip_t - self.breakaway_t
+
+    def summary(self):
+        result = {"tolerance": self.tolerance}
+        for phase in PHASES:
+            stats = self.error[phase]
+            if stats.count == 0:
+                continue
+            duration = self.duration[phase]
+            result[phase] = {
+                "samples": stats.count,
+                "duration_s": round(duration, 4),
+                "mean_error_N": round(stats.mean, 5),
+                "std_error_N": round(stats.std, 5),
+                "rms_error_N": round(stats.rms, 5),
+                "peak_error_N": round(stats.peak, 5),
+                "in_band_s": round(self.in_band[phase], 4),
+                "in_band_fraction": round(self.in_band[phase] / duration, 4) if duration > 0 else 0.0,
+            }
+        latency = self.slip_latency
+        result["slip_latency_s"] = round(latency, 4) if latency is not None else None
+        return result
+
+    def summary_line(self):
+        parts = []
+        for phase in PHASES:
+            if self.error[phase].count:
+                stats = self.error[phase]
+                parts.append(f"{phase}: rms {stats.rms:.3f} N, peak {stats.peak:.3f} N, "
+                             f"in band {self.in_band[phase]:.2f}/{self.duration[phase]:.2f} s")
+        latency = self.slip_latency
+        if latency is not None:
+            parts.append(f"slip latency: {latency * 1000:.0f} ms")
+        else:
+            parts.append("no slip" if self.slip_t is None else "slip latency: no onset seen")
+        return " | ".join(parts)
+
+    def write(self, path, **meta):
+        """Append the summary as one JSON line (one line per trial)."""
+        with open(path, "a") as f:
+            f.write(json.dumps({**meta, **self.summary()}) + "\n")
+
+    @classmethod
+    def from_log(cls, log_rows, tolerance=0.1):
+        """Metrics for rows already written by friction_render.py
+        (time, velocity, handler velocity, desired force, rendered force, error %, sliding).
+
+        Rows with desired force 0 are calibration. The phase of a row is
+        the sliding flag of the row before, as in update_from(). Logs
+        written before the sliding column was added only tell the phases
+        apart by force level, the larger desired force being stick; that
+        is wrong when a texture or scene varies the force, so such logs
+        with more than two levels are classified with a warning.
+        """
+        metrics = cls(tolerance)
+        if log_rows and len(log_rows[0]) > 6:
+            sliding = False
+            for row in log_rows:
+                desired = row[3]
+                if desired > 0:
+                    metrics.update("slip" if sliding else "stick", row[0], desired, row[4])
+                sliding = row[6] > 0
+            return metrics
+        levels = {row[3] for row in log_rows if row[3] > 0}
+        if len(levels) > 2:
+            warnings.warn(f"log without a sliding column has {len(levels)} desired force levels (texture or "
+                          f"scene?); stick and slip are told apart by level and may be mislabelled")
+        static = max(levels, default=0)
+        for t, _, _, desired, rendered, _ in log_rows:
+            if desired <= 0:
+                continue
+            metrics.update("stick" if desired >= static else "slip", t, desired, rendered)
+        return metrics
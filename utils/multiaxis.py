@@ -0,0 +1,233 @@
+import numpy as np
+
+from utils.controller import FrictionController
+
+
+class MultiAxisFrictionController:
+    """FrictionController generalized to N spring/potentiometer/servo axes.
+
+    Every per-axis quantity of the 1-D controller (positions, targets, PID
+    state, servo history, ...) is a NumPy array of shape (n_axes,), so a tick
+    costs the same handful of vectorized operations whatever the axis count.
+    Positions come in as an array and compute_command() returns one angle per
+    axis, ready for PWMGroup.set_many():
+
+        angles = controller.compute_command(positions, now)  # None while initializing
+        group.set_many(angles, ...)
+        controller.finish_tick()
+
+    The axes are coupled by a Coulomb friction cone instead of stick/slip
+    per axis. The load on the contact is the detected force minus the rest
+    force every axis holds at its stick target, clipped at zero since only
+    pushing into the springs loads it. The contact sticks until the load
+    leaves the static cone while the user pushes faster than delta_v,
+    |max(v_ext, 0)| > delta_v; the cone radius is the breakaway level along
+    the push direction u, |(breakaway - rest) * u|, so an idle axis neither
+    adds to the load nor widens the cone.
+    While sliding the rendered friction has magnitude |dynamicFriction| and
+    is split over the axes along the slip direction u, the unit push
+    velocity at breakaway. u is held until release so that servo-model
+    mismatch on the idle axes cannot swing it. The contact is released once
+    the handle moves back along u while the servos still push forward. With n_axes=1 this is the same law as FrictionController.
+
+    maxStaticFriction and dynamicFriction may be scalars or one value per
+    axis (anisotropic surfaces).
+    """
+
+    def __init__(self, model_coeffs, n_axes=2, maxStaticFriction=0.8, dynamicFriction=0.4, spring_rate=0.16,
+                 delta_v=0.2, initTime=1.0, Kp=0.8, Ki=0, Kd=0.02, alpha=0.7, high_pass_alpha=0.3,
+                 max_angle=180, ff_gain=1.2, slip_ff_gain=2, slip_ff_scale=100, slide_boost_min=0.12,
+                 velocity_boost_scale=40, prediction_horizon=0, model_dt=0.02):
+        self.model_coeffs = np.asarray(model_coeffs, dtype=float)
+        self.affective_history = len(self.model_coeffs)
+        self.n_axes = n_axes
+        self.maxStaticFriction = np.broadcast_to(np.asarray(maxStaticFriction, dtype=float), (n_axes,)).copy()
+        self.dynamicFriction = np.broadcast_to(np.asarray(dynamicFriction, dtype=float), (n_axes,)).copy()
+        self.spring_rate = spring_rate
+        self.delta_v = delta_v
+        self.initTime = initTime
+        self.Kp, self.Ki, self.Kd = Kp, Ki, Kd
+        self.alpha = alpha
+        self.high_pass_alpha = high_pass_alpha
+        self.max_angle = max_angle
+        self.ff_gain = ff_gain
+        self.slip_ff_gain = slip_ff_gain
+        self.slip_ff_scale = slip_ff_scale
+        self.slide_boost_min = slide_boost_min
+        self.velocity_boost_scale = velocity_boost_scale
+        self.prediction_horizon = prediction_horizon
+        self.model_dt = model_dt
+        self.pending_weights = FrictionController.compute_pending_weights(self.model_coeffs, prediction_horizon, model_dt)
+        # Newest-first coefficients so motorVelocity is one matrix-vector product with the oldest-first history
+        self.model_coeffs_rev = self.model_coeffs[::-1].copy()
+        # Force of an unloaded axis at its stick target, and the load on top of it at which
+        # the 1-D controller breaks away; the cone radius along u is |breakaway_load * u|
+        self.rest_force = (self.maxStaticFriction / spring_rate - 1 + 1.1) * spring_rate
+        self.breakaway_load = ((self.maxStaticFriction / spring_rate - 1.1) * 1.05 + 1.1) * spring_rate - self.rest_force
+        self.reset(0.0)
+
+    def reset(self, start_time):
+        """Clear all per-trial state; the trial starts at start_time."""
+        n = self.n_axes
+        zeros = lambda: np.zeros(n)
+        self.start_time = start_time
+        self.last_time = start_time
+        self.lastSmoothedPosition = None
+        self.integral = zeros()
+        self.previous_error = zeros()
+        self.servoBaseAngle = zeros()
+        self.detectedForce = zeros()
+        self.frictionForce = zeros()
+        self.axis_calibrated = np.zeros(n, dtype=bool)
+        self.calibrated = False
+        self.sliding = False
+        self.released = False
+        self.slip_direction = np.full(n, 1 / np.sqrt(n))
+        self.lastTargetPosition = zeros()
+        self.targetPosition = zeros()
+        self.positionChange = zeros()
+        self.pid_scale_factor = np.ones(n)
+        self.external_velocity = zeros()
+        self.motorVelocity = zeros()
+        self.smoothedPosition = zeros()
+        self.predictedPosition = zeros()
+        self.velocity = zeros()
+        self.error = zeros()
+        self.derivative = zeros()
+        self.controlSignal = zeros()
+        self.controlAngle = zeros()
+        self.error_percent = zeros()
+        self.dt = 0
+        self.motorVelocity_history = np.zeros((self.affective_history, n))  # oldest first
+
+    def friction_force(self):
+        """Desired friction force per axis: the static force while sticking, the
+        dynamic cone radius split along the slip direction while sliding."""
+        if self.sliding:
+            return np.linalg.norm(self.dynamicFriction) * np.abs(self.slip_direction)
+        return self.maxStaticFriction
+
+    def compute_command(self, positions, now):
+        """Filter the readings and return the servo angle of every axis.
+
+        Returns None during the initialization phase, when no command is issued.
+        """
+        position = np.asarray(positions, dtype=float)
+        dt = now - self.last_time
+        self.last_time = now
+        self.dt = dt
+
+        if self.lastSmoothedPosition is None:
+            smoothedPosition = position.copy()
+        else:
+            smoothedPosition = self.alpha * position + (1 - self.alpha) * self.lastSmoothedPosition
+        self.smoothedPosition = smoothedPosition
+
+        # === Initialization Phase ===
+        if now - self.start_time < self.initTime:
+            self.targetPosition = smoothedPosition
+            self.lastSmoothedPosition = smoothedPosition
+            self.previous_error = np.zeros(self.n_axes)
+            return None
+
+        spring_rate = self.spring_rate
+        targetPosition = self.targetPosition.copy()
+
+        # === Calibration (per axis, same ladder as the 1-D controller) ===
+        if not self.calibrated:
+            rest = self.maxStaticFriction / spring_rate - 1
+            pending = ~self.axis_calibrated
+            step = np.select([smoothedPosition > 1.1 + 4, smoothedPosition > rest + 1,
+                              smoothedPosition > rest + 0.1, smoothedPosition > rest + 0.02],
+                             [2.0, 0.3, 0.1, 0.01], 0.0)
+            moving = pending & (step > 0)
+            targetPosition[moving] = smoothedPosition[moving] - step[moving]
+            done = pending & (step == 0)
+            self.axis_calibrated |= done
+            self.integral[done] = 0
+            self.calibrated = bool(self.axis_calibrated.all())
+            self.frictionForce = np.zeros(self.n_axes)
+
+        else:
+            # === Control ===
+            self.detectedForce = (smoothedPosition + 1.1) * spring_rate
+            self.frictionForce = self.friction_force()
+            targetPosition = self.frictionForce / spring_rate - 1
+
+        # === PID ===
+        external_velocity = self.external_velocity
+        if self.calibrated:
+            pushing = np.maximum(external_velocity, 0)
+            targetPosition = targetPosition - pushing * self.ff_gain * dt
+            if self.sliding:
+                targetPosition -= pushing * np.maximum(pushing / self.slip_ff_scale, self.slip_ff_gain) * dt
+        self.targetPosition = targetPosition
+
+        self.velocity = (smoothedPosition - self.lastSmoothedPosition) / dt
+        predictedPosition = smoothedPosition
+        if self.prediction_horizon:
+            predictedPosition = smoothedPosition + self.pending_weights @ self.motorVelocity_history
+        self.predictedPosition = predictedPosition
+        error = targetPosition - predictedPosition
+        self.integral += error * dt
+        self.derivative = (error - self.previous_error) / dt if dt > 0 else np.zeros(self.n_axes)
+        self.error = error
+        self.controlSignal = -(self.Kp * error * self.pid_scale_factor + self.Ki * self.integral + self.Kd * self.derivative)
+        self.controlAngle = np.clip(self.servoBaseAngle + self.controlSignal, 0, self.max_angle)
+        return self.controlAngle
+
+    def finish_tick(self):
+        """Update the motor-velocity model and the friction-cone state after the servos were commanded."""
+        motorVelocity = self.model_coeffs_rev @ self.motorVelocity_history
+        self.motorVelocity = motorVelocity
+        velocity = self.velocity
+
+        external_velocity = velocity - motorVelocity
+        self.external_velocity = external_velocity
+        self.previous_error = self.error
+
+        self.positionChange = self.high_pass_alpha * (self.positionChange + self.targetPosition - self.lastTargetPosition)
+
+        pid_enhance = np.zeros(self.n_axes)
+        if self.calibrated:
+            if self.sliding:
+                pid_enhance += np.maximum(np.tanh(np.abs(self.positionChange)), self.slide_boost_min)
+            pid_enhance += np.where(external_velocity > self.delta_v,
+                                    np.tanh(np.abs(external_velocity / self.velocity_boost_scale)), 0)
+        self.pid_scale_factor = 1 + pid_enhance
+
+        frictionForce = self.frictionForce
+        self.error_percent = np.divide(100 * (self.detectedForce - frictionForce), frictionForce,
+                                       out=np.zeros(self.n_axes), where=frictionForce > 0)
+
+        # Only pushing into the springs loads the contact
+        push_velocity = np.maximum(external_velocity, 0)
+        push_speed = np.linalg.norm(push_velocity)
+        if self.calibrated and not self.sliding:
+            if push_speed > self.delta_v:
+                u = push_velocity / push_speed
+                load = np.maximum(self.detectedForce - self.rest_force, 0)
+                if np.linalg.norm(load) > np.linalg.norm(self.breakaway_load * u):
+                    self.sliding = True
+                    self.slip_direction = u
+
+        elif self.calibrated and self.sliding:
+            u = self.slip_direction
+            if u @ velocity < 0 and u @ motorVelocity > u @ velocity + 5:
+                self.released = True
+                return
+
+        angle_change = self.controlAngle - self.servoBaseAngle
+        history = self.motorVelocity_history
+        history[:-1] = history[1:]
+        history[-1] = angle_change
+
+        self.servoBaseAngle = self.controlAngle
+        self.lastSmoothedPosition = self.smoothedPosition
+        self.lastTargetPosition = self.targetPosition
+
+    def step(self, positions, now):
+        angles = self.compute_command(positions, now)
+        if angles is not None:
+            self.finish_tick()
+        return angles
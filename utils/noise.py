@@ -0,0 +1,142 @@
+import numpy as np
+
+from utils.metrics import RunningStats
+
+
+class NoiseAnalyzer:
+    """Constant-memory noise characterization of a sampled stream.
+
+    add() takes one sample or an array of them and updates, in O(1) memory
+    whatever the stream length:
+
+    * running mean/std/min/max (Welford, merged chunk by chunk);
+    * a Welch power spectral density: Hann-windowed segments of nperseg
+      samples with 50 % overlap, averaged as they complete;
+    * non-overlapping Allan deviation at tau = 2**k / fs, k = 0..max_octave,
+      from a cascade where every level keeps one pending sample and the last
+      block mean of the level below.
+
+    The same code path serves a live sensor (one chunk per read loop) and a
+    recorded log (one call with the whole array).
+    """
+
+    def __init__(self, fs, nperseg=2048, max_octave=16):
+        self.fs = float(fs)
+        self.nperseg = nperseg
+        self.hop = nperseg // 2
+        self.window = np.hanning(nperseg)
+        self.window_power = float(np.sum(self.window ** 2))
+        self.freqs = np.fft.rfftfreq(nperseg, 1 / self.fs)
+        self.stats = RunningStats()
+        self.min = np.inf
+        self.max = -np.inf
+        self.psd_sum = np.zeros(len(self.freqs))
+        self.segments = 0
+        self.tail = np.zeros(0)  # samples not yet in a complete segment (< nperseg)
+        self.max_octave = max_octave
+        self.allan_pending = [None] * (max_octave + 1)
+        self.allan_last = [None] * (max_octave + 1)
+        self.allan_sumsq = np.zeros(max_octave + 1)
+        self.allan_count = np.zeros(max_octave + 1, dtype=np.int64)
+
+    def add(self, samples):
+        x = np.atleast_1d(np.asarray(samples, dtype=float))
+        if len(x) == 0:
+            return
+        self._add_stats(x)
+        self._add_welch(x)
+        self._add_allan(x, 0)
+
+    def _add_stats(self, x):
+        chunk = RunningStats()
+        chunk.count = len(x)
+        chunk.mean = float(x.mean())
+        chunk.m2 = float(np.sum((x - chunk.mean) ** 2))
+        chunk.sum_sq = float(x @ x)
+        chunk.peak = float(np.abs(x).max())
+        self.stats.merge(chunk)
+        self.min = min(self.min, float(x.min()))
+        self.max = max(self.max, float(x.max()))
+
+    def _add_welch(self, x):
+        data = np.concatenate([self.tail, x])
+        n_seg = (len(data) - self.nperseg) // self.hop + 1 if len(data) >= self.nperseg else 0
+        if n_seg > 0:
+            segs = np.lib.stride_tricks.sliding_window_view(data, self.nperseg)[::self.hop][:n_seg]
+            segs = (segs - segs.mean(axis=1, keepdims=True)) * self.window
+            self.psd_sum += np.sum(np.abs(np.fft.rfft(segs, axis=1)) ** 2, axis=0)
+            self.segments += n_seg
+            data = data[n_seg * self.hop:]
+        self.tail = data.copy()
+
+    def _add_allan(self, values, k):
+        while len(values) and k <= self.max_octave:
+            last = self.allan_last[k]
+            seq = values if last is None else np.concatenate([[last], values])
+            d = np.diff(seq)
+            self.allan_sumsq[k] += d @ d
+            self.allan_count[k] += len(d)
+            self.allan_last[k] = values[-1]
+            # Pair up block means for the next octave
+            if self.allan_pending[k] is not None:
+                values = np.concatenate([[self.allan_pending[k]], values])
+            pairs = len(values) // 2
+            self.allan_pending[k] = values[-1] if len(values) % 2 else None
+            values = values[:2 * pairs].reshape(-1, 2).mean(axis=1)
+            k += 1
+
+    def psd(self):
+        """Frequencies (Hz) and one-sided PSD (units^2/Hz) averaged over the completed segments."""
+        if self.segments == 0:
+            return self.freqs, np.zeros(len(self.freqs))
+        psd = self.psd_sum / (self.segments * self.fs * self.window_power)
+        psd[1:-1 if self.nperseg % 2 == 0 else None] *= 2
+        return self.freqs, psd
+
+    def allan_deviation(self):
+        """Averaging times (s) and Allan deviation for every octave with data."""
+        valid = self.allan_count > 0
+        taus = 2.0 ** np.arange(self.max_octave + 1) / self.fs
+        return taus[valid], np.sqrt(self.allan_sumsq[valid] / (2 * self.allan_count[valid]))
+
+    def recommend(self, control_dt=0.02, target_std=0.012, signal_bandwidth=5.0):
+        """Filter settings for the controller from the noise recorded so far.
+
+        white_density: median PSD over the top half of the band (white floor).
+        drift_corner_hz: highest frequency below which the PSD stays above
+        twice the floor (1/f drift); the high-pass cutoff sits there so the
+        slip detector's position change ignores drift.
+        lowpass_cutoff_hz: a first-order low-pass passes about
+        white_density * pi/2 * fc of white noise, so fc is chosen to leave
+        target_std (e.g. pot_fluc) of noise, but never below
+        signal_bandwidth (hand motion) nor above the control Nyquist rate.
+        The cutoffs are also given as the controller's alpha (EMA smoothing
+        factor) and high_pass_alpha at control_dt.
+        """
+        freqs, psd = self.psd()
+        band = freqs >= self.fs / 4
+        white = float(np.median(psd[band])) if self.segments else 0.0
+        floor = np.flatnonzero(psd[1:] <= 2 * white) + 1 if self.segments else np.array([], dtype=int)
+        corner = float(freqs[floor[0] - 1]) if len(floor) and floor[0] > 1 else 0.0
+        nyquist = 0.5 / control_dt
+        lp = target_std ** 2 / (white * np.pi / 2) if white > 0 else nyquist
+        lp = float(min(max(lp, signal_bandwidth), nyquist))
+        hp = float(min(max(corner, freqs[1] if len(freqs) > 1 else 0.0), lp))
+        taus, adev = self.allan_deviation()
+        rc_lp = 1 / (2 * np.pi * lp)
+        rc_hp = 1 / (2 * np.pi * hp) if hp > 0 else np.inf
+        return {
+            "samples": self.stats.count,
+            "mean": self.stats.mean,
+            "std": self.stats.std,
+            "min": self.min,
+            "max": self.max,
+            "white_density": white,
+            "drift_corner_hz": corner,
+            "allan_min_tau_s": float(taus[np.argmin(adev)]) if len(adev) else None,
+            "allan_min_dev": float(adev.min()) if len(adev) else None,
+            "lowpass_cutoff_hz": lp,
+            "highpass_cutoff_hz": hp,
+            "alpha": float(control_dt / (rc_lp + control_dt)),
+            "high_pass_alpha": float(rc_hp / (rc_hp + control_dt)) if np.isfinite(rc_hp) else 1.0,
+        }
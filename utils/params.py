@@ -0,0 +1,105 @@
+import fcntl
+import mmap
+import os
+import struct
+import tempfile
+
+# Controller attributes that can be changed while friction_render.py runs (slot order in the block)
+LIVE_PARAMS = ("maxStaticFriction", "dynamicFriction", "Kp", "Ki", "Kd", "delta_v", "ff_gain", "slip_ff_gain",
+               "slide_boost_min", "velocity_boost_scale")
+
+MAGIC = b"FRPB"
+HEADER = struct.Struct("<4sIQ")  # magic, slot count, version (odd while a writer is mid-update)
+DEFAULT_PATH = os.path.join("/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir(), "friction_params")
+
+
+class ParameterBlock:
+    """Versioned parameter block in a memory-mapped file, shared by the renderer and a CLI.
+
+    Layout: 16-byte header (magic, slot count, uint64 version) followed by
+    one float64 per name in LIVE_PARAMS. Writers take an flock, make the
+    version odd, write the values and make it even again (a seqlock), so
+    the reader never locks: poll() reads the version once per tick and only
+    when it changed copies the values, keeping them if the version was even
+    and unchanged across the copy. A torn read is simply retried on the
+    next tick. Only the slots that changed are set on the target, so a
+    value the target rewrites itself (a texture's friction levels) is left
+    alone unless that slot is written.
+    """
+
+    def __init__(self, path=DEFAULT_PATH, names=LIVE_PARAMS, initial=None):
+        """Open the block at path; with `initial` (name -> value) create or reset it first."""
+        self.path = path
+        self.names = tuple(names)
+        self.size = HEADER.size + 8 * len(self.names)
+        if initial is not None:
+            values = [float(initial[name]) for name in self.names]
+            with open(path, "wb") as f:
+                f.write(HEADER.pack(MAGIC, len(self.names), 0) + struct.pack(f"<{len(values)}d", *values))
+        self.file = open(path, "r+b")
+        self.mm = mmap.mmap(self.file.fileno(), self.size)
+        magic, count, _ = HEADER.unpack_from(self.mm, 0)
+        if magic != MAGIC or count != len(self.names):
+            raise ValueError(f"{path} is not a parameter block with {len(self.names)} slots")
+        self._view = memoryview(self.mm)
+        self._version = self._view[8:16].cast("Q")
+        self._values = self._view[HEADER.size:self.size].cast("d")
+        self.version = 0 if initial is not None else -1  # last version poll() applied
+        self.applied = self._values.tolist() if initial is not None else None  # values as of that version
+
+    def read(self):
+        """Consistent snapshot (version, {name: value}); spins while a writer is mid-update."""
+        while True:
+            v1 = self._version[0]
+            values = self._values.tolist()
+            if v1 % 2 == 0 and self._version[0] == v1:
+                return v1, dict(zip(self.names, values))
+
+    def poll(self, target):
+        """Copy the changed parameters onto target's attributes if the block changed since the last poll.
+
+        Returns the new version, or None when nothing changed (the common,
+        one-read case) or a writer was mid-update.
+        """
+        v1 = self._version[0]
+        if v1 == self.version or v1 % 2:
+            return None
+        values = self._values.tolist()
+        if self._version[0] != v1:
+            return None
+        applied = self.applied
+        for k, (name, value) in enumerate(zip(self.names, values)):
+            if applied is None or applied[k] != value:
+                setattr(target, name, value)
+        self.applied = values
+        self.version = v1
+        return v1
+
+    def update(self, **values):
+        """Write some parameters; other slots keep their values."""
+        unknown = set(values) - set(self.names)
+        if unknown:
+            raise KeyError(f"Unknown parameter(s): {', '.join(sorted(unknown))}")
+        fcntl.flock(self.file.fileno(), fcntl.LOCK_EX)
+        try:
+            version = self._version[0]
+            self._version[0] = version + 1
+            for name, value in values.items():
+                self._values[self.names.index(name)] = float(value)
+            self._version[0] = version + 2
+        finally:
+            fcntl.flock(self.file.fileno(), fcntl.LOCK_UN)
+        return version + 2
+
+    def close(self, unlink=False):
+        """Unmap the block; the owner passes unlink=True to remove the file as well."""
+        self._version.release()
+        self._values.release()
+        self._view.release()
+        self.mm.close()
+        self.file.close()
+        if unlink:
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
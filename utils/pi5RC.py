@@ -2,34 +2,45 @@
 import os
 import time
 
+# Supported GPIO pins and their mappings
+PINS = [12, 13, 14, 15, 18, 19]
+AFUNC = ['a0', 'a0', 'a0', 'a0', 'a3', 'a3']
+PWMCHIP_MAP = [0, 2, -1, -1, 0, 2]  # GPIO18 (pwmchip2/pwm2), GPIO19 (pwmchip2/pwm1)
+PWMCHAN_MAP = [0, 0, -1, -1, 2, 1]
+
 
 class pi5RC:
-    def __init__(self, Pin):
-        # Define supported GPIO pins and their mappings
-        pins = [12, 13, 14, 15, 18, 19]
-        afunc = ['a0', 'a0', 'a0', 'a0', 'a3', 'a3']
-        pwmchip_map = [0, 2, -1, -1, 0, 2]  # GPIO18 (pwmchip2/pwm2), GPIO19 (pwmchip2/pwm1)
-        pwmchan_map = [0, 0, -1, -1, 2, 1]
+    sysfs_root = "/sys/class/pwm"
+    pinctrl = "/usr/bin/pinctrl"
 
-        if Pin not in pins:
+    def __init__(self, Pin, profiler=None, sysfs_root=None, pinctrl=None):
+        if Pin not in PINS:
             raise ValueError(f"Unsupported PWM pin: GPIO{Pin}")
 
         self.pin = Pin
-        self.pinIdx = pins.index(Pin)
-        self.pwmchip = pwmchip_map[self.pinIdx]
-        self.pwmchan = pwmchan_map[self.pinIdx]
+        if sysfs_root is not None:
+            self.sysfs_root = sysfs_root
+        if pinctrl is not None:
+            self.pinctrl = pinctrl
+        self.pinIdx = PINS.index(Pin)
+        self.pwmchip = PWMCHIP_MAP[self.pinIdx]
+        self.pwmchan = PWMCHAN_MAP[self.pinIdx]
         self.enableFlag = False
         self.file_duty = None
-        self.pwm_path = f"/sys/class/pwm/pwmchip{self.pwmchip}/pwm{self.pwmchan}"
+        self.profiler = profiler
+        if profiler is not None:
+            profiler.add_stage("pwm_write")
+        self.chip_path = f"{self.sysfs_root}/pwmchip{self.pwmchip}"
+        self.pwm_path = f"{self.chip_path}/pwm{self.pwmchan}"
 
         # Set pin function
-        os.system(f"/usr/bin/pinctrl set {self.pin} {afunc[self.pinIdx]}")
+        os.system(f"{self.pinctrl} set {self.pin} {AFUNC[self.pinIdx]}")
         time.sleep(0.1)
 
         # Export if not already
         if not os.path.exists(self.pwm_path):
             try:
-                with open(f"/sys/class/pwm/pwmchip{self.pwmchip}/export", "w") as f:
+                with open(f"{self.chip_path}/export", "w") as f:
                     f.write(str(self.pwmchan))
                 time.sleep(0.2)
             except OSError as e:
@@ -54,9 +65,12 @@ class pi5RC:
         if not self.enableFlag:
             self.enable(True)
         self.onTime_us = onTime_us
+        t0 = time.perf_counter_ns() if self.profiler is not None else 0
         self.file_duty.seek(0)
         self.file_duty.write(str(onTime_us * 1000))  # Convert µs to ns
         self.file_duty.flush()
+        if self.profiler is not None:
+            self.profiler.record("pwm_write", time.perf_counter_ns() - t0)
 
     def _write(self, path, value):
         try:
@@ -71,9 +85,19 @@ class pi5RC:
             if self.file_duty and not self.file_duty.closed:
                 self.file_duty.close()
             self.enable(False)
-            if os.path.exists(f"/sys/class/pwm/pwmchip{self.pwmchip}/unexport"):
-                with open(f"/sys/class/pwm/pwmchip{self.pwmchip}/unexport", "w") as f:
+            if os.path.exists(f"{self.chip_path}/unexport"):
+                with open(f"{self.chip_path}/unexport", "w") as f:
                     f.write(str(self.pwmchan))
-            os.system(f"/usr/bin/pinctrl set {self.pin} no")
+            os.system(f"{self.pinctrl} set {self.pin} no")
         except Exception as e:
             print(f"Cleanup failed: {e}")
+
+
+def open_servo(pin=18, profiler=None, daemon=None):
+    """pi5RC on the pin, or with daemon=None and FRICTION_DAEMON set, the pin of the running device daemon."""
+    if daemon is None:
+        daemon = bool(os.environ.get("FRICTION_DAEMON"))
+    if daemon:
+        from utils.device_daemon import connect
+        return connect().servo(pin)
+    return pi5RC(pin, profiler=profiler)
@@ -0,0 +1,134 @@
+import os
+
+import numpy as np
+
+from utils.tools import read_potentialmeter
+
+# Single-device file of earlier calibrations; each device now has its own, see calibration_path()
+DEFAULT_PATH = "assets/pot_calibration.npz"
+
+# Every 16-bit ADS1115 code, in table order: index i holds code int16(i), so table[raw] also works
+# for negative codes through Python's negative indexing
+CODES = np.arange(65536, dtype=np.uint16).view(np.int16)
+
+
+class PotCalibration:
+    """Per-device potentiometer calibration compiled into 65,536-entry lookup tables.
+
+    raw_to_mm: polynomial (np.polyval order) from raw / 32767 to slider
+    position (mm), fitted against reference positions; it absorbs the
+    LMCR8-11's linearity error. mm_to_force: polynomial from position to
+    spring force (N), fitted against a force gauge; it absorbs the spring's
+    nonlinearity. Both are evaluated once for every ADC code, so a
+    conversion is one table index. A fitted curve is not extrapolated below
+    code 0 (below ground is noise, clamped to code 0); the nominal mapping
+    is linear and extends to negative codes like read_potentialmeter.
+
+    Three tables are kept:
+    * distance: raw -> mm, for measurements in real units;
+    * force: raw -> N;
+    * position: raw -> the position at which the controller's linear model
+      (pos + 1.1) * spring_rate gives the calibrated force. Feeding this to
+      FrictionController makes its force, targets and calibration ladder
+      follow the measured curve without changing the controller.
+    With the nominal calibration all three match read_potentialmeter and
+    the linear spring exactly.
+    """
+
+    def __init__(self, device_id, raw_to_mm, mm_to_force, spring_rate=0.16, distance=None, force=None):
+        self.device_id = str(device_id)
+        self.raw_to_mm = np.asarray(raw_to_mm, dtype=float)
+        self.mm_to_force = np.asarray(mm_to_force, dtype=float)
+        self.spring_rate = float(spring_rate)
+        if distance is None:
+            x = np.clip(CODES, 0, 32767) / 32767.0
+            distance = np.polyval(self.raw_to_mm, x)
+        if force is None:
+            force = np.polyval(self.mm_to_force, distance)
+        if len(distance) != 65536 or len(force) != 65536:
+            raise ValueError("calibration tables must have one entry per 16-bit code")
+        self.distance_table = np.asarray(distance, dtype=float)
+        self.force_table = np.asarray(force, dtype=float)
+        self.position_table = self.force_table / self.spring_rate - 1.1
+        # Python lists: indexing them is cheaper than indexing NumPy arrays for one scalar per tick
+        self._distance = self.distance_table.tolist()
+        self._force = self.force_table.tolist()
+        self._position = self.position_table.tolist()
+
+    @classmethod
+    def nominal(cls, spring_rate=0.16):
+        """The datasheet mapping of read_potentialmeter and a linear spring, for uncalibrated devices."""
+        return cls("nominal", [10.5 / 1.01, 1.0], [spring_rate, 1.1 * spring_rate], spring_rate,
+                   distance=read_potentialmeter(CODES.astype(float)))
+
+    @classmethod
+    def fit(cls, device_id, raw, mm, force_mm=None, force=None, raw_degree=3, force_degree=2, spring_rate=0.16):
+        """Fit both curves from reference points.
+
+        raw/mm: ADC readings at known slider positions. force_mm/force:
+        positions and gauge readings (N); without them the nominal linear
+        spring is used. Degrees are capped at the number of points - 1.
+        """
+        raw = np.asarray(raw, dtype=float)
+        mm = np.asarray(mm, dtype=float)
+        raw_to_mm = np.polyfit(raw / 32767.0, mm, min(raw_degree, len(raw) - 1))
+        if force is None or len(force) == 0:
+            mm_to_force = [spring_rate, 1.1 * spring_rate]
+        else:
+            force_mm = np.asarray(force_mm, dtype=float)
+            mm_to_force = np.polyfit(force_mm, np.asarray(force, dtype=float), min(force_degree, len(force_mm) - 1))
+        return cls(device_id, raw_to_mm, mm_to_force, spring_rate)
+
+    def distance(self, raw):
+        """Slider position (mm) for one raw reading."""
+        return self._distance[raw]
+
+    def force(self, raw):
+        """Spring force (N) for one raw reading."""
+        return self._force[raw]
+
+    def position(self, raw):
+        """Controller position (mm) for one raw reading."""
+        return self._position[raw]
+
+    def distance_array(self, raw):
+        """Vectorized distance() for whole arrays of raw samples."""
+        return self.distance_table[np.asarray(raw, dtype=np.intp)]
+
+    def force_array(self, raw):
+        return self.force_table[np.asarray(raw, dtype=np.intp)]
+
+    def position_array(self, raw):
+        return self.position_table[np.asarray(raw, dtype=np.intp)]
+
+    def save(self, path=DEFAULT_PATH):
+        np.savez(path, device_id=self.device_id, raw_to_mm=self.raw_to_mm, mm_to_force=self.mm_to_force,
+                 spring_rate=self.spring_rate, distance=self.distance_table, force=self.force_table)
+
+
+def calibration_path(device_id, directory="assets"):
+    """File of one device's calibration: <directory>/pot_calibration_<device_id>.npz."""
+    safe_id = "".join(ch if ch.isalnum() or ch in "-_." else "_" for ch in str(device_id))
+    return os.path.join(directory, f"pot_calibration_{safe_id}.npz")
+
+
+def load_pot_calibration(path=None, device_id=None, spring_rate=0.16):
+    """The calibration stored at path, or the nominal one when there is none.
+
+    Without a path, device_id selects that device's file (calibration_path)
+    and falls back to the single-device DEFAULT_PATH of older calibrations.
+    With device_id, a calibration made for another device is an error
+    rather than silently applied.
+    """
+    if path is None:
+        path = calibration_path(device_id) if device_id is not None else DEFAULT_PATH
+        if not os.path.exists(path):
+            path = DEFAULT_PATH
+    if not os.path.exists(path):
+        return PotCalibration.nominal(spring_rate)
+    data = np.load(path)
+    calibration = PotCalibration(str(data["device_id"]), data["raw_to_mm"], data["mm_to_force"],
+                                 float(data["spring_rate"]), distance=data["distance"], force=data["force"])
+    if device_id is not None and calibration.device_id != device_id:
+        raise ValueError(f"{path} was made for device {calibration.device_id!r}, not {device_id!r}")
+    return calibration
@@ -0,0 +1,160 @@
+import time
+
+
+class LatencyHistogram:
+    """Log-linear (HDR-style) histogram of nanosecond latencies.
+
+    Values below 2**sub_bucket_bits are counted exactly; above that every
+    power-of-two range is split into 2**sub_bucket_bits linear sub-buckets,
+    so the relative error stays below 1 / 2**sub_bucket_bits at any scale.
+    All buckets are allocated up front, so record() never allocates.
+    """
+
+    def __init__(self, sub_bucket_bits=7, max_value_ns=60_000_000_000):
+        self.sub_bucket_bits = sub_bucket_bits
+        self.sub_bucket_count = 1 << sub_bucket_bits
+        self.max_index = self._index(max_value_ns)
+        self.counts = [0] * (self.max_index + 1)
+        self.total = 0
+        self.max_ns = 0
+
+    def _index(self, value_ns):
+        shift = value_ns.bit_length() - self.sub_bucket_bits - 1
+        if shift < 0:
+            shift = 0
+        return (shift << self.sub_bucket_bits) + (value_ns >> shift)
+
+    def _value(self, index):
+        shift = (index >> self.sub_bucket_bits) - 1
+        if shift < 0:
+            shift = 0
+        return (index - (shift << self.sub_bucket_bits)) << shift
+
+    def record(self, value_ns):
+        if value_ns < 0:
+            value_ns = 0
+        idx = self._index(value_ns)
+        if idx > self.max_index:
+            idx = self.max_index
+        self.counts[idx] += 1
+        self.total += 1
+        if value_ns > self.max_ns:
+            self.max_ns = value_ns
+
+    def percentile(self, p):
+        """Lower bound of the bucket holding the p-th percentile, in ns."""
+        if self.total == 0:
+            return 0
+        target = max(1, int(round(self.total * p / 100.0)))
+        seen = 0
+        for idx, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return min(self._value(idx), self.max_ns)
+        return self.max_ns
+
+    def reset(self):
+        for i in range(len(self.counts)):
+            self.counts[i] = 0
+        self.total = 0
+        self.max_ns = 0
+
+
+class StageProfiler:
+    """Per-stage latency histograms for one control loop tick.
+
+    Call tick_start() at the top of a tick, lap(stage) after each stage and
+    tick_end() when the tick is done. record(stage, ns) adds a latency that
+    was measured elsewhere (e.g. inside pi5RC).
+    """
+
+    TICK = "tick"
+    enabled = True
+
+    def __init__(self, stages):
+        self.stages = list(stages)
+        self.histograms = {stage: LatencyHistogram() for stage in self.stages + [self.TICK]}
+        self._tick_start = 0
+        self._last = 0
+
+    def add_stage(self, stage):
+        if stage not in self.histograms:
+            self.stages.append(stage)
+            self.histograms[stage] = LatencyHistogram()
+
+    def tick_start(self):
+        self._tick_start = self._last = time.perf_counter_ns()
+
+    def lap(self, stage):
+        now = time.perf_counter_ns()
+        self.histograms[stage].record(now - self._last)
+        self._last = now
+
+    def tick_end(self):
+        now = time.perf_counter_ns()
+        self.histograms[self.TICK].record(now - self._tick_start)
+        self._last = now
+
+    def record(self, stage, value_ns):
+        self.histograms[stage].record(value_ns)
+
+    def summary(self):
+        """{stage: {"count", "p50_us", "p99_us", "max_us"}} for every stage with samples."""
+        result = {}
+        for stage in self.stages + [self.TICK]:
+            hist = self.histograms[stage]
+            if hist.total == 0:
+                continue
+            result[stage] = {
+                "count": hist.total,
+                "p50_us": hist.percentile(50) / 1000.0,
+                "p99_us": hist.percentile(99) / 1000.0,
+                "max_us": hist.max_ns / 1000.0,
+            }
+        return result
+
+    def report(self):
+        lines = [f"{'stage':<12} {'count':>8} {'p50 (us)':>10} {'p99 (us)':>10} {'max (us)':>10}"]
+        for stage, stats in self.summary().items():
+            lines.append(f"{stage:<12} {stats['count']:>8d} {stats['p50_us']:>10.1f} "
+                         f"{stats['p99_us']:>10.1f} {stats['max_us']:>10.1f}")
+        return "\n".join(lines)
+
+    def reset(self):
+        for hist in self.histograms.values():
+            hist.reset()
+
+
+class NullProfiler:
+    """Drop-in StageProfiler that records nothing."""
+
+    enabled = False
+    stages = []
+
+    def add_stage(self, stage):
+        pass
+
+    def tick_start(self):
+        pass
+
+    def lap(self, stage):
+        pass
+
+    def tick_end(self):
+        pass
+
+    def record(self, stage, value_ns):
+        pass
+
+    def summary(self):
+        return {}
+
+    def report(self):
+        return ""
+
+    def reset(self):
+        pass
+
+
+def make_profiler(enabled, stages):
+    return StageProfiler(stages) if enabled else NullProfiler()
@@ -0,0 +1,128 @@
+#!/usr/bin/python3
+import os
+import time
+
+from utils.pi5RC import AFUNC, PINS, PWMCHAN_MAP, PWMCHIP_MAP
+
+
+class PWMGroup:
+    """Several servo PWM channels driven as one unit.
+
+    All pins are muxed, exported and configured by one init path (one
+    settle wait instead of one per channel), and every duty_cycle file is
+    kept open as a raw descriptor. set_many() formats all pulse widths
+    first and then issues the writes back to back, one pwrite() each, so
+    the skew between channels is a few syscalls; last_skew_ns holds the
+    time between the first and the last write of the latest batch.
+    """
+
+    sysfs_root = "/sys/class/pwm"
+    pinctrl = "/usr/bin/pinctrl"
+    channels = ()
+
+    def __init__(self, pins, profiler=None, sysfs_root=None, pinctrl=None, export_timeout=1.0):
+        for pin in pins:
+            if pin not in PINS or PWMCHIP_MAP[PINS.index(pin)] < 0:
+                raise ValueError(f"Unsupported PWM pin: GPIO{pin}")
+        if len(set(pins)) != len(pins):
+            raise ValueError("Duplicate PWM pin")
+
+        self.pins = list(pins)
+        if sysfs_root is not None:
+            self.sysfs_root = sysfs_root
+        if pinctrl is not None:
+            self.pinctrl = pinctrl
+        self.profiler = profiler
+        if profiler is not None:
+            profiler.add_stage("pwm_write")
+        self.enableFlag = False
+        self.last_skew_ns = 0
+        self.fd_duty = []
+        self.channels = []
+        for pin in self.pins:
+            idx = PINS.index(pin)
+            chip_path = f"{self.sysfs_root}/pwmchip{PWMCHIP_MAP[idx]}"
+            self.channels.append((pin, AFUNC[idx], chip_path, PWMCHAN_MAP[idx], f"{chip_path}/pwm{PWMCHAN_MAP[idx]}"))
+
+        # Set pin functions
+        for pin, afunc, _, _, _ in self.channels:
+            os.system(f"{self.pinctrl} set {pin} {afunc}")
+        time.sleep(0.1)
+
+        # Export every channel, then wait once for all of them
+        for _, _, chip_path, chan, pwm_path in self.channels:
+            if not os.path.exists(pwm_path):
+                try:
+                    with open(f"{chip_path}/export", "w") as f:
+                        f.write(str(chan))
+                except OSError as e:
+                    if "Device or resource busy" not in str(e):
+                        raise e
+        end = time.time() + export_timeout
+        while not all(os.path.exists(f"{c[4]}/duty_cycle") for c in self.channels):
+            if time.time() > end:
+                raise TimeoutError("PWM channels were not exported in time")
+            time.sleep(0.01)
+
+        # Set 20ms period (50Hz servo signal)
+        for _, _, _, _, pwm_path in self.channels:
+            self._write(f"{pwm_path}/period", "20000000")
+        self.enable(False)
+        self.fd_duty = [os.open(f"{c[4]}/duty_cycle", os.O_WRONLY) for c in self.channels]
+
+    def enable(self, flag: bool):
+        self.enableFlag = flag
+        for _, _, _, _, pwm_path in self.channels:
+            self._write(f"{pwm_path}/enable", "1" if flag else "0")
+
+    def set_many(self, angles, angle_range: float = 180.0, pulse_range: tuple = (500, 2400)):
+        """One angle per pin, in the order the pins were given."""
+        self.set_pwm_many([int(((angle / angle_range) * (pulse_range[1] - pulse_range[0]) + pulse_range[0]))
+                           for angle in angles])
+
+    def set_pwm_many(self, onTimes_us):
+        """Pulse widths in microseconds, one per pin, written as one batch."""
+        if len(onTimes_us) != len(self.fd_duty):
+            raise ValueError(f"Expected {len(self.fd_duty)} pulse widths, got {len(onTimes_us)}")
+        payloads = [str(onTime_us * 1000).encode() for onTime_us in onTimes_us]  # Convert µs to ns
+        self.onTimes_us = list(onTimes_us)
+        pwrite = os.pwrite
+        t0 = time.perf_counter_ns()
+        for fd, payload in zip(self.fd_duty, payloads):
+            pwrite(fd, payload, 0)
+        t1 = time.perf_counter_ns()
+        self.last_skew_ns = t1 - t0
+        if self.profiler is not None:
+            self.profiler.record("pwm_write", t1 - t0)
+        if not self.enableFlag:
+            # Enable only after every channel has a valid duty cycle
+            self.enable(True)
+
+    def _write(self, path, value):
+        try:
+            with open(path, "w") as f:
+                f.write(value)
+        except Exception as e:
+            print(f"Failed to write to {path}: {e}")
+            raise
+
+    def close(self):
+        """Disable, close the duty_cycle descriptors, unexport and release the pins."""
+        if not self.channels:
+            return
+        try:
+            for fd in self.fd_duty:
+                os.close(fd)
+            self.fd_duty = []
+            self.enable(False)
+            for pin, _, chip_path, chan, _ in self.channels:
+                if os.path.exists(f"{chip_path}/unexport"):
+                    with open(f"{chip_path}/unexport", "w") as f:
+                        f.write(str(chan))
+                os.system(f"{self.pinctrl} set {pin} no")
+        except Exception as e:
+            print(f"Cleanup failed: {e}")
+        self.channels = []
+
+    def __del__(self):
+        self.close()
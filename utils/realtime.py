@@ -0,0 +1,69 @@
+import csv
+import gc
+
+import numpy as np
+
+
+def gc_pause():
+    """Enter a real-time section: collect now, freeze the survivors and disable the collector.
+
+    gc.freeze() moves every object alive at this point to the permanent
+    generation, so even a collection forced inside the section would not
+    have to traverse them. Call gc_resume() at the next safe point.
+    """
+    gc.collect()
+    gc.freeze()
+    gc.disable()
+
+
+def gc_resume():
+    """Leave a real-time section: re-enable the collector and collect what the section left behind."""
+    gc.unfreeze()
+    gc.enable()
+    gc.collect()
+
+
+class TickLog:
+    """Preallocated per-tick log: one float64 column per field, filled in place.
+
+    append() stores into the next row without creating a row object, so
+    logging retains nothing per tick. When the capacity runs out the columns
+    double (rare; size `capacity` for the longest expected trial).
+    """
+
+    def __init__(self, header, capacity=3000):
+        self.header = list(header)
+        self.columns = [np.empty(capacity) for _ in self.header]
+        self.capacity = capacity
+        self.count = 0
+
+    def append(self, *values):
+        n = self.count
+        if n == self.capacity:
+            self._grow()
+        for column, value in zip(self.columns, values):
+            column[n] = value
+        self.count = n + 1
+
+    def _grow(self):
+        self.capacity *= 2
+        for i, column in enumerate(self.columns):
+            grown = np.empty(self.capacity)
+            grown[:len(column)] = column
+            self.columns[i] = grown
+
+    def clear(self):
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def rows(self):
+        """The logged rows as lists, like the log_list friction_render.py used to keep."""
+        return np.column_stack([column[:self.count] for column in self.columns]).tolist()
+
+    def write_csv(self, path):
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(self.header)
+            writer.writerows(self.rows())
@@ -0,0 +1,152 @@
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+FIT_META_PATH = "assets/servo_model_fit.json"
+ALPHAS = (0.0, 1e-4, 1e-3, 1e-2, 1e-1, 1.0)  # ridge strengths, relative to the mean diagonal of X'X
+
+
+def lagged(deltas, history):
+    """Design matrix of command histories, most recent first, as a zero-copy view.
+
+    Row j holds deltas[j + history - 1], deltas[j + history - 2], ...,
+    deltas[j]: the command of the tick the velocity was measured in and
+    the history - 1 before it.
+    """
+    return sliding_window_view(deltas, history)[:, ::-1]
+
+
+class NormalEquations:
+    """Cross-validation folds of the least-squares normal equations, accumulated chunk by chunk.
+
+    Rows are grouped in contiguous blocks of `block` samples and block b
+    goes to fold b % folds (contiguous blocks keep the strongly
+    autocorrelated neighbours of a validation sample out of its training
+    set). For every fold it keeps X'X, X'1, X'y, y'y, sum(y) and the row
+    count of the max_history-column design, so memory does not grow with
+    the recording and every shorter history is a leading sub-block.
+    """
+
+    def __init__(self, max_history, folds=5, block=500):
+        self.max_history = max_history
+        self.folds = folds
+        self.block = block
+        h = max_history
+        self.xtx = np.zeros((folds, h, h))
+        self.xsum = np.zeros((folds, h))
+        self.xty = np.zeros((folds, h))
+        self.yty = np.zeros(folds)
+        self.ysum = np.zeros(folds)
+        self.n = np.zeros(folds, dtype=np.int64)
+
+    def add(self, deltas, velocities, first_row=0):
+        """Accumulate one contiguous piece of a recording.
+
+        deltas[i] and velocities[i] belong to the same tick; the first
+        max_history - 1 ticks only provide history. first_row is the index
+        (within its recording) of the first target row, which fixes the
+        fold of every block.
+        """
+        X = lagged(np.asarray(deltas, dtype=float), self.max_history)
+        y = np.asarray(velocities, dtype=float)[self.max_history - 1:]
+        start = 0
+        while start < len(y):
+            row = first_row + start
+            stop = min(start + self.block - row % self.block, len(y))
+            f = (row // self.block) % self.folds
+            Xb, yb = X[start:stop], y[start:stop]
+            self.xtx[f] += Xb.T @ Xb
+            self.xsum[f] += Xb.sum(axis=0)
+            self.xty[f] += Xb.T @ yb
+            self.yty[f] += yb @ yb
+            self.ysum[f] += yb.sum()
+            self.n[f] += len(yb)
+            start = stop
+
+    def merge(self, other):
+        for name in ("xtx", "xsum", "xty", "yty", "ysum", "n"):
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+        return self
+
+    def stats(self, history, folds=None):
+        """Summed statistics of the given folds (all by default) for the first `history` lags."""
+        f = slice(None) if folds is None else folds
+        return (self.xtx[f, :history, :history].sum(axis=0), self.xsum[f, :history].sum(axis=0),
+                self.xty[f, :history].sum(axis=0), self.yty[f].sum(), self.ysum[f].sum(), int(self.n[f].sum()))
+
+
+def solve(stats, alpha, fit_intercept=True):
+    """Ridge solution (coefficients, intercept) from summed normal equations.
+
+    alpha is relative to the mean diagonal of X'X, so one grid suits any
+    amount of data and command scale; the intercept is not penalized.
+    """
+    xtx, xsum, xty, yty, ysum, n = stats
+    h = len(xty)
+    if fit_intercept:
+        # Center: X'X - n mean(x) mean(x)' and X'y - n mean(x) mean(y)
+        xm, ym = xsum / n, ysum / n
+        xtx = xtx - n * np.outer(xm, xm)
+        xty = xty - n * xm * ym
+    ridge = alpha * np.trace(xtx) / h
+    coeffs = np.linalg.lstsq(xtx + ridge * np.eye(h), xty, rcond=None)[0]
+    intercept = float(ym - xm @ coeffs) if fit_intercept else 0.0
+    return coeffs, intercept
+
+
+def sse(stats, coeffs, intercept):
+    """Sum of squared residuals of (coeffs, intercept) on the rows behind stats, without the rows."""
+    xtx, xsum, xty, yty, ysum, n = stats
+    w, b = coeffs, intercept
+    return float(yty - 2 * w @ xty - 2 * b * ysum + w @ xtx @ w + 2 * b * w @ xsum + n * b * b)
+
+
+def cross_validate(eq, history, alpha, fit_intercept=True):
+    """Mean validation MSE over the folds and R^2 of the fit on all data."""
+    errors, count = 0.0, 0
+    for f in range(eq.folds):
+        train = [g for g in range(eq.folds) if g != f]
+        valid = eq.stats(history, [f])
+        if valid[5] == 0:
+            continue
+        coeffs, intercept = solve(eq.stats(history, train), alpha, fit_intercept)
+        errors += sse(valid, coeffs, intercept)
+        count += valid[5]
+    full = eq.stats(history)
+    coeffs, intercept = solve(full, alpha, fit_intercept)
+    sst = full[3] - full[4] ** 2 / full[5]
+    return errors / count, 1 - sse(full, coeffs, intercept) / sst, coeffs, intercept
+
+
+def _grid_job(args):
+    eq, history, alpha, fit_intercept = args
+    mse, r2, coeffs, intercept = cross_validate(eq, history, alpha, fit_intercept)
+    return {"history": history, "alpha": alpha, "cv_mse": mse, "r2": r2,
+            "coeffs": coeffs.tolist(), "intercept": intercept}
+
+
+def fit_grid(eq, histories=None, alphas=ALPHAS, fit_intercept=True, workers=None):
+    """Cross-validate every (history, alpha) pair over a process pool; results sorted by validation MSE."""
+    histories = range(1, eq.max_history + 1) if histories is None else histories
+    jobs = [(eq, h, a, fit_intercept) for h in histories for a in alphas]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(_grid_job, jobs))
+    return sorted(results, key=lambda r: r["cv_mse"])
+
+
+def save_servo_model(result, coeffs_path="assets/servo_model_coeffs.npy", meta_path=FIT_META_PATH, **meta):
+    """Write the coefficients (most recent command first) and the fit that chose them."""
+    np.save(coeffs_path, np.array(result["coeffs"]))
+    with open(meta_path, "w") as f:
+        json.dump({k: v for k, v in result.items() if k != "coeffs"} | meta, f, indent=2)
+
+
+def load_model_history(path=FIT_META_PATH, default=7):
+    """History length chosen by the last cross-validated fit, or `default` without one."""
+    if not os.path.exists(path):
+        return default
+    with open(path) as f:
+        return int(json.load(f)["history"])
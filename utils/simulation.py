@@ -0,0 +1,200 @@
+from functools import partial
+
+import numpy as np
+
+from utils.tools import read_potentialmeter
+
+
+class SpringServoPlant:
+    """Simulated LMCR8-11 spring potentiometer driven by an SG90 servo and a hand.
+
+    The potentiometer reads the spring compression (mm). The servo moves the
+    spring base according to the identified FIR velocity model
+    (assets/servo_model_coeffs.npy, one coefficient per 20 ms command step),
+    and the hand adds its own velocity on top.
+    """
+
+    def __init__(self, model_coeffs, hand=None, initial_position=6.0, noise_std=0.0, stroke=(1.0, 11.4), seed=None):
+        self.model_coeffs = np.asarray(model_coeffs, dtype=float)
+        self.hand = hand if hand is not None else hand_idle
+        self.position = initial_position
+        self.noise_std = noise_std
+        self.stroke = stroke
+        self.rng = np.random.default_rng(seed)
+        self.commanded_angle = 0.0
+        self.last_angle = 0.0
+        self.delta_history = [0.0] * len(self.model_coeffs)  # most recent first
+        self.time = 0.0
+
+    def command(self, angle):
+        self.commanded_angle = float(angle)
+
+    def motor_velocity(self):
+        return float(np.dot(self.model_coeffs, self.delta_history))
+
+    def advance(self, dt):
+        """Move the plant forward by dt seconds (one command step)."""
+        self.delta_history.pop()
+        self.delta_history.insert(0, self.commanded_angle - self.last_angle)
+        self.last_angle = self.commanded_angle
+        velocity = self.motor_velocity() + self.hand(self.time)
+        self.position = min(max(self.position + velocity * dt, self.stroke[0]), self.stroke[1])
+        self.time += dt
+
+    def read_position(self):
+        if self.noise_std > 0:
+            return self.position + self.rng.normal(0.0, self.noise_std)
+        return self.position
+
+    def read_raw(self):
+        """ADS1115 reading (0–32767) that read_potentialmeter maps back to the position."""
+        raw = int(round((self.read_position() - 1) * 1.01 / 10.5 * 32767.0))
+        return min(max(raw, 0), 32767)
+
+
+class FakePot:
+    """Stands in for adafruit AnalogIn: .value reads the simulated plant."""
+
+    def __init__(self, plant):
+        self.plant = plant
+
+    @property
+    def value(self):
+        return self.plant.read_raw()
+
+
+class FakeServo:
+    """Stands in for pi5RC: commands go to the simulated plant."""
+
+    def __init__(self, plant):
+        self.plant = plant
+
+    def set(self, angle, angle_range=180.0, pulse_range=(500, 2400)):
+        self.plant.command(angle)
+
+    def set_pwm(self, onTime_us):
+        self.plant.command((onTime_us - 500) / (2400 - 500) * 180.0)
+
+
+# === Scripted hand motions: hand velocity (mm/s) as a function of time (s) ===
+
+def hand_idle(t):
+    return 0.0
+
+
+DEFAULT_PUSH_START = 3.0
+
+
+def hand_push_release(t, start=DEFAULT_PUSH_START, push_speed=3.0, push_time=1.5, release_speed=-12.0, release_time=0.3):
+    """Push into the handle at constant speed, then let go."""
+    if t < start:
+        return 0.0
+    if t < start + push_time:
+        return push_speed
+    if t < start + push_time + release_time:
+        return release_speed
+    return 0.0
+
+
+# Library of scripted motions used for tuning and robustness studies (hand_push_release keyword arguments)
+HAND_MOTIONS = {
+    "push": {},
+    "slow_push": {"push_speed": 1.0, "push_time": 2.5},
+    "fast_push": {"push_speed": 8.0, "push_time": 0.6},
+    "long_push": {"push_speed": 2.0, "push_time": 3.0},
+    "late_push": {"start": 4.5},
+    "gentle_release": {"release_speed": -6.0, "release_time": 0.6},
+}
+
+
+def make_hand(name):
+    """Picklable hand motion from HAND_MOTIONS, plus the time the push starts."""
+    kwargs = HAND_MOTIONS[name]
+    return partial(hand_push_release, **kwargs), kwargs.get("start", DEFAULT_PUSH_START)
+
+
+# === Position sensor models for closed-loop noise studies ===
+
+class SensorModel:
+    """Sensed position of a SpringServoPlant through a parameterized sensor; a run_trial read hook.
+
+    The true spring compression is corrupted by absolute noise (abs_std, mm)
+    and by force-relative noise (rel_std of the spring force, clipped to
+    +-rel_clip, as in noise_injection.py), quantized to `resolution` mm and
+    refreshed only every `sample_period` s (sample and hold); between
+    refreshes the last reading is returned.
+    """
+
+    def __init__(self, abs_std=0.0, rel_std=0.0, rel_clip=np.inf, resolution=0.0, sample_period=0.0, seed=None):
+        self.abs_std = abs_std
+        self.rel_std = rel_std
+        self.rel_clip = rel_clip
+        self.resolution = resolution
+        self.sample_period = sample_period
+        self.rng = np.random.default_rng(seed)
+        self.last_sample_time = -np.inf
+        self.reading = None
+
+    def __call__(self, plant):
+        if self.reading is not None and plant.time - self.last_sample_time < self.sample_period - 1e-9:
+            return self.reading
+        self.last_sample_time = plant.time
+        position = plant.position
+        if self.rel_std > 0:
+            # Relative noise on the force (position + 1.1) * spring_rate
+            scale = np.clip(self.rng.normal(0.0, self.rel_std), -self.rel_clip, self.rel_clip)
+            position = (position + 1.1) * (1 + scale) - 1.1
+        if self.abs_std > 0:
+            position += self.rng.normal(0.0, self.abs_std)
+        if self.resolution > 0:
+            position = round(position / self.resolution) * self.resolution
+        self.reading = position
+        return position
+
+
+# Sensors considered for the handle (SensorModel keyword arguments). The LMCR8-11 goes through the ADS1115
+# (16-bit over the 10.5 mm stroke); the ToF sensors report whole millimetres at their ranging rate.
+SENSOR_MODELS = {
+    "LMCR8-11": {"abs_std": 0.012, "resolution": 10.5 / 1.01 / 32767},
+    "VL6180": {"rel_std": 0.05, "rel_clip": 0.15, "resolution": 1.0, "sample_period": 0.02},
+    "VL53L0X": {"rel_std": 0.07, "rel_clip": 0.2, "resolution": 1.0, "sample_period": 0.033},
+}
+
+
+def run_trial(controller, plant, duration=8.0, dt=0.02, read=None, on_tick=None, rate=None):
+    """Run the controller against the plant in simulated time.
+
+    Returns the log rows friction_render.py writes: time, velocity, handler
+    velocity, desired force, rendered force, percentage of error and
+    sliding (1.0 once slip was declared).
+    read(plant) returns the sensed position; it defaults to the noisy
+    potentiometer reading. on_tick(controller, plant, now) is called after
+    every controlled tick. With rate=AdaptiveRate the next tick comes
+    rate.next_period() later; the plant keeps advancing in dt steps with the
+    servo holding its command in between.
+    """
+    controller.reset(0.0)
+    log_list = []
+    now = 0.0
+    next_tick = 0.0
+    while now < duration:
+        plant.advance(dt)
+        now += dt
+        if now < next_tick - 1e-9:
+            continue
+        position = read(plant) if read is not None else read_potentialmeter(plant.read_raw())
+        angle = controller.compute_command(position, now)
+        if angle is None:
+            continue
+        plant.command(angle)
+        controller.finish_tick()
+        if rate is not None:
+            next_tick = now + rate.next_period(controller, now)
+        if on_tick is not None:
+            on_tick(controller, plant, now)
+        if controller.released:
+            break
+        c = controller
+        log_list.append([now, c.velocity, c.velocity + c.motorVelocity, c.frictionForce, c.detectedForce, c.error_percent,
+                         float(c.sliding)])
+    return log_list
@@ -0,0 +1,120 @@
+import json
+import math
+import os
+
+# Statistics of the detector streams while the handle sticks; tuning/slip_eval.py --write fits them
+STREAM_PARAMS = ("velocity_mean", "velocity_std", "velocity_rho", "force_mean", "force_std", "force_rho")
+
+
+def cusum_threshold(k, arl):
+    """Decision threshold h of a one-sided CUSUM on unit-variance samples with reference k.
+
+    Siegmund's approximation of the in-control average run length,
+    ARL0 = (exp(2kb) - 2kb - 1) / (2k^2) with b = h + 1.166, solved for h
+    by bisection.
+    """
+    lo, hi = 0.0, 100.0
+    for _ in range(60):
+        h = (lo + hi) / 2
+        b = 2 * k * (h + 1.166)
+        if b < 700 and (math.exp(b) - b - 1) / (2 * k * k) < arl:
+            lo = h
+        else:
+            hi = h
+    return (lo + hi) / 2
+
+
+class SlipDetector:
+    """Streaming CUSUM change-point detector for the stick -> slip and slip -> release transitions.
+
+    While sticking, two one-sided CUSUMs run on standardized streams: the
+    external velocity (hand velocity, mm/s) rising by velocity_shift and the
+    force above static friction (N) rising by force_shift. Slip is declared
+    once both statistics are past their thresholds. While sliding, a third
+    CUSUM watches the external velocity falling below -release_velocity
+    (the hand letting go). Each update is a few float operations.
+
+    The finite-difference velocity is strongly anti-correlated from tick to
+    tick and the force correlated, so every sample is first prewhitened
+    with the stream's lag-1 autocorrelation; the CUSUM then sees roughly
+    independent samples and its run length matches the design. The
+    thresholds come from false_alarms_per_hour at the control period dt
+    (see cusum_threshold); requiring both stick statistics only lowers the
+    false-alarm rate further. The stream statistics default to the
+    simulated LMCR8-11 at pot_fluc noise; tuning/slip_eval.py measures them
+    on recorded logs.
+    """
+
+    def __init__(self, dt=0.02, false_alarms_per_hour=1.0, velocity_shift=1.0, force_shift=0.01,
+                 release_velocity=2.5, velocity_mean=0.0, velocity_std=0.52, velocity_rho=-0.37,
+                 force_mean=0.015, force_std=0.0016, force_rho=0.41):
+        self.dt = dt
+        self.false_alarms_per_hour = false_alarms_per_hour
+        self.velocity_shift = velocity_shift
+        self.force_shift = force_shift
+        self.release_velocity = release_velocity
+        self.velocity_mean, self.velocity_std, self.velocity_rho = velocity_mean, velocity_std, velocity_rho
+        self.force_mean, self.force_std, self.force_rho = force_mean, force_std, force_rho
+        arl = 3600.0 / (false_alarms_per_hour * dt)  # ticks between false alarms
+        # Both streams are prewhitened with their lag-1 autocorrelation rho: e = x - rho * x_prev has
+        # std sqrt(1 - rho^2) * std and a step of s in x becomes a step of (1 - rho) * s in e
+        self._velocity_scale = 1 / (velocity_std * math.sqrt(1 - velocity_rho ** 2))
+        self._force_scale = 1 / (force_std * math.sqrt(1 - force_rho ** 2))
+        # Reference values half-way to the shift to detect, in standard deviations of e
+        self.velocity_k = (1 - velocity_rho) * velocity_shift * self._velocity_scale / 2
+        self.force_k = (1 - force_rho) * force_shift * self._force_scale / 2
+        self.release_k = (1 - velocity_rho) * release_velocity * self._velocity_scale
+        self.velocity_h = cusum_threshold(self.velocity_k, arl)
+        self.force_h = cusum_threshold(self.force_k, arl)
+        self.release_h = cusum_threshold(self.release_k, arl)
+        self.reset()
+
+    def reset(self):
+        self.velocity_stat = 0.0
+        self.force_stat = 0.0
+        self.release_stat = 0.0
+        self.last_velocity = 0.0  # deviations from the means of the previous tick
+        self.last_force = 0.0
+
+    def stick(self, external_velocity, force_above_static):
+        """Update the stick statistics; True when slip is detected (and the statistics restart)."""
+        dv = external_velocity - self.velocity_mean
+        df = force_above_static - self.force_mean
+        v = self.velocity_stat + (dv - self.velocity_rho * self.last_velocity) * self._velocity_scale - self.velocity_k
+        f = self.force_stat + (df - self.force_rho * self.last_force) * self._force_scale - self.force_k
+        self.last_velocity, self.last_force = dv, df
+        v = v if v > 0.0 else 0.0
+        f = f if f > 0.0 else 0.0
+        if v > self.velocity_h and f > self.force_h:
+            self.reset()
+            return True
+        self.velocity_stat = v
+        self.force_stat = f
+        return False
+
+    def slide(self, external_velocity):
+        """Update the release statistic; True when the hand let go."""
+        dv = self.velocity_mean - external_velocity
+        r = self.release_stat + (dv - self.velocity_rho * self.last_velocity) * self._velocity_scale - self.release_k
+        self.last_velocity = dv
+        r = r if r > 0.0 else 0.0
+        if r > self.release_h:
+            self.reset()
+            return True
+        self.release_stat = r
+        return False
+
+
+def load_slip_detector(path="assets/slip_detector.json", dt=0.02, **kwargs):
+    """SlipDetector with the stream statistics stored by tuning/slip_eval.py --write (defaults if missing)."""
+    params = {}
+    if os.path.exists(path):
+        with open(path) as f:
+            params = {k: v for k, v in json.load(f).items() if k in STREAM_PARAMS}
+    params.update(kwargs)
+    return SlipDetector(dt=dt, **params)
+
+
+def save_slip_detector(stats, path="assets/slip_detector.json", **meta):
+    with open(path, "w") as f:
+        json.dump({**{k: stats[k] for k in STREAM_PARAMS}, **meta}, f, indent=2)
@@ -0,0 +1,239 @@
+import math
+import time
+
+import numpy as np
+
+
+def trapezoidal_profile(steps, v_max, accel, v_start=None):
+    """Step intervals (us) for a move of |steps| steps.
+
+    Accelerates at `accel` (steps/s^2) from v_start to v_max, cruises and
+    decelerates symmetrically; short moves become triangles.
+    """
+    n = int(abs(steps))
+    if n == 0:
+        return np.zeros(0, dtype=np.int64)
+    v0 = min(v_start if v_start is not None else np.sqrt(2 * accel), v_max)
+    i = np.arange(n)
+    v_acc = np.sqrt(v0 ** 2 + 2 * accel * i)
+    v_dec = np.sqrt(v0 ** 2 + 2 * accel * (n - 1 - i))
+    v = np.minimum(np.minimum(v_acc, v_dec), v_max)
+    return np.round(1e6 / v).astype(np.int64)
+
+
+def s_curve_profile(steps, v_max, accel, v_start=None):
+    """Like trapezoidal_profile but with jerk-limited ramps.
+
+    v^2 follows a smoothstep over the ramp, whose length is chosen so the
+    peak acceleration equals `accel`.
+    """
+    n = int(abs(steps))
+    if n == 0:
+        return np.zeros(0, dtype=np.int64)
+    v0 = min(v_start if v_start is not None else np.sqrt(2 * accel), v_max)
+    ramp = max(0.75 * (v_max ** 2 - v0 ** 2) / accel, 1.0)
+    i = np.arange(n)
+
+    def v_squared(s):
+        x = np.clip(s / ramp, 0.0, 1.0)
+        return v0 ** 2 + (v_max ** 2 - v0 ** 2) * x * x * (3 - 2 * x)
+
+    v = np.sqrt(np.minimum(v_squared(i), v_squared(n - 1 - i)))
+    return np.round(1e6 / v).astype(np.int64)
+
+
+PROFILES = {"trapezoid": trapezoidal_profile, "s-curve": s_curve_profile}
+
+
+class StepperActuator:
+    """STEP/DIR stepper driver with hardware-timed pulse trains, usable in place of pi5RC.
+
+    set(angle) maps the servo-style command to an absolute step position
+    (angle * mm_per_degree / mm_per_step) and streams towards it: every
+    call plans one tick_period of steps with plan_tick(), continuing from
+    the step rate the previous wave ended at (accelerating or braking at
+    `accel`, never faster than v_max, slowing in time to stop on the
+    target), and queues it with lgpio.tx_wave, so the step timing comes
+    from lgpio's pulse engine instead of Python sleeps. A wave that ends
+    while moving is padded to exactly tick_period and the next one carries
+    the remainder of the step interval, so back-to-back ticks give one
+    continuous pulse train. If the previous wave has not started playing
+    yet the command is dropped (the next tick plans from the newest
+    target), so lag never builds up beyond one tick; after a late tick the
+    pause counts as a long step interval, and the ramp restarts from the
+    start speed if it was longer than a start-speed step. Neither
+    set() nor move_steps() sleeps. Each STEP pulse goes high for
+    pulse_width_us at the end of its interval. max_steps_per_command is
+    capped at v_max * tick_period, the most one tick can cover.
+
+    move_steps(steps) is a standalone point-to-point move from rest with
+    the trapezoidal or S-curve profile, for scripts outside the control
+    loop; the streamed set() always uses constant-acceleration ramps.
+
+    lgpio_module defaults to the real lgpio; pass utils.emulator.FakeLgpio
+    (and its clock) to record the schedule without hardware.
+    """
+
+    def __init__(self, step_pin=21, dir_pin=20, chip=0, mm_per_step=0.005, mm_per_degree=0.18, v_max=4000,
+                 accel=40000, profile="trapezoid", pulse_width_us=10, dir_setup_us=5, max_steps_per_command=80,
+                 tick_period=0.02, invert=False, lgpio_module=None, clock=time.perf_counter):
+        if lgpio_module is None:
+            import lgpio as lgpio_module
+        if profile not in PROFILES:
+            raise ValueError(f"Unsupported motion profile: {profile}")
+        self.lgpio = lgpio_module
+        self.clock = clock
+        self.step_pin = step_pin
+        self.dir_pin = dir_pin
+        self.steps_per_degree = mm_per_degree / mm_per_step
+        self.v_max = v_max
+        self.accel = accel
+        self.v_min = min(math.sqrt(2 * accel), v_max)  # start/stop speed, the profiles' first step
+        self.profile = PROFILES[profile]
+        self.pulse_width_us = pulse_width_us
+        self.dir_setup_us = dir_setup_us
+        self.tick_period = tick_period
+        self.max_steps_per_command = min(max_steps_per_command, int(v_max * tick_period))
+        self.invert = invert
+        self.position = 0  # commanded position in steps, at the end of the queued train
+        self.target = 0
+        self.speed = 0.0  # step rate (steps/s) the queued train ends at, 0 when it ends at rest
+        self.direction = 1
+        self.since_step = 0.0  # time from the last queued step to the end of the queued train (s)
+        self.train_end = 0.0  # clock time at which the queued train runs out
+        self.enableFlag = True
+
+        self.handle = self.lgpio.gpiochip_open(chip)
+        # Group leader is STEP (bit 0), DIR is bit 1
+        self.lgpio.group_claim_output(self.handle, [step_pin, dir_pin], [0, 0])
+
+    def enable(self, flag: bool):
+        self.enableFlag = flag
+        if not flag:
+            self.stop()
+
+    def set(self, angle: float, angle_range: float = 180.0, pulse_range: tuple = (500, 2400)):
+        self.target = int(round(angle * self.steps_per_degree))
+        if not self.enableFlag:
+            return
+        now = self.clock()
+        if self.train_end - now > self.tick_period:
+            return  # the last wave has not started yet; the next tick plans from the newest target
+        late = now - self.train_end
+        if late > 0 and self.speed:
+            # The train ran dry: the wait counts towards the next step interval and caps the speed
+            self.since_step += late
+            self.speed = min(self.speed, 1.0 / self.since_step)
+            if self.speed < self.v_min:
+                self.speed = 0.0
+                self.since_step = 0.0
+        edges = self.plan_tick(self.target)
+        if edges:
+            self._send(edges, self.tick_period if self.speed else None)
+
+    def set_pwm(self, onTime_us: int):
+        """Servo-style pulse width (500–2400 us) mapped to 0–180 degrees."""
+        self.set((onTime_us - 500) / (2400 - 500) * 180.0)
+
+    def plan_tick(self, target):
+        """(time, direction) of each step over the next tick_period towards `target`.
+
+        Times are seconds from the start of the wave. Updates position,
+        speed, direction and since_step to the state at the end of the wave.
+        """
+        accel2 = 2 * self.accel
+        v_min, v_max = self.v_min, self.v_max
+        p, s, d = self.position, self.speed, self.direction
+        t = -self.since_step  # the last step, relative to this wave
+        edges = []
+        while len(edges) < self.max_steps_per_command:
+            remaining = target - p
+            if s == 0.0:
+                if remaining == 0:
+                    break
+                d = 1 if remaining > 0 else -1
+                s_next = v_min
+            elif remaining * d > 0:
+                # Accelerate, but no faster than allows stopping on the target
+                s_stop = math.sqrt(v_min * v_min + accel2 * (abs(remaining) - 1))
+                s_next = min(math.sqrt(s * s + accel2), s_stop, v_max)
+                s_next = max(s_next, math.sqrt(max(s * s - accel2, v_min * v_min)))
+            elif s * s - accel2 < v_min * v_min:
+                s = 0.0  # on or past the target and slow enough to stop (and reverse)
+                continue
+            else:
+                s_next = math.sqrt(s * s - accel2)  # past the target: brake first
+            if t + 1.0 / s_next > self.tick_period:
+                break
+            t += 1.0 / s_next
+            p += d
+            s = s_next
+            edges.append((t, d))
+        self.position, self.speed, self.direction = p, s, d
+        self.since_step = self.tick_period - t if s else 0.0
+        return edges
+
+    def move_steps(self, steps):
+        """Point-to-point move of `steps` from rest with the configured profile (outside the control loop)."""
+        if not self.enableFlag or steps == 0:
+            return 0
+        d = 1 if steps > 0 else -1
+        times = np.cumsum(self.profile(steps, self.v_max, self.accel)) / 1e6
+        self._send([(t, d) for t in times.tolist()], None)
+        self.position += int(steps)
+        self.target = self.position
+        self.speed = 0.0
+        self.since_step = 0.0
+        return int(steps)
+
+    def build_pulses(self, edges, pad_to=None):
+        """lgpio pulse list stepping at each (time, direction) of `edges`, optionally padded to `pad_to` s."""
+        pulse = self.lgpio.pulse
+        width = self.pulse_width_us
+        pulses = []
+        cursor = 0
+        last_bits = None
+        for t, d in edges:
+            dir_bit = 0b10 if (d > 0) != self.invert else 0
+            edge = int(round(t * 1e6))
+            gap = edge - cursor
+            floor = self.dir_setup_us if dir_bit != last_bits else 1
+            gap = gap if gap > floor else floor
+            pulses.append(pulse(dir_bit, 0b11, gap))
+            pulses.append(pulse(0b01 | dir_bit, 0b11, width))
+            cursor += gap + width
+            last_bits = dir_bit
+        if pad_to is not None:
+            pad = int(round(pad_to * 1e6)) - cursor
+            if pad > 0:
+                pulses.append(pulse(last_bits or 0, 0b11, pad))
+                cursor += pad
+        return pulses, cursor
+
+    def _send(self, edges, pad_to):
+        pulses, length_us = self.build_pulses(edges, pad_to)
+        self.lgpio.tx_wave(self.handle, self.step_pin, pulses)
+        now = self.clock()
+        self.train_end = max(now, self.train_end) + length_us / 1e6
+
+    def busy(self):
+        return bool(self.lgpio.tx_busy(self.handle, self.step_pin, self.lgpio.TX_WAVE))
+
+    def wait(self, timeout=10.0):
+        end = time.time() + timeout
+        while self.busy() and time.time() < end:
+            time.sleep(0.001)
+
+    def stop(self):
+        self.lgpio.tx_pulse(self.handle, self.step_pin, 0, 0)
+        self.speed = 0.0
+        self.since_step = 0.0
+        self.train_end = 0.0
+
+    def __del__(self):
+        try:
+            self.stop()
+            self.lgpio.group_free(self.handle, self.step_pin)
+            self.lgpio.gpiochip_close(self.handle)
+        except Exception as e:
+            print(f"Cleanup failed: {e}")
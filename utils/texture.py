@@ -0,0 +1,149 @@
+import os
+
+import numpy as np
+
+
+class FrictionTexture:
+    """Static and dynamic friction (N) as a function of surface position (mm).
+
+    Both maps are stored as one uniform lookup table over [x_min, x_max]; a
+    lookup is one index computation and a linear interpolation between two
+    entries, whatever the source data looked like. Outside the range the
+    texture repeats when `periodic`, otherwise the end values hold.
+    """
+
+    def __init__(self, static, dynamic, x_min=0.0, x_max=None, periodic=False, name=""):
+        static = np.asarray(static, dtype=float)
+        dynamic = np.asarray(dynamic, dtype=float)
+        if static.shape != dynamic.shape or static.ndim != 1 or len(static) < 2:
+            raise ValueError("static and dynamic must be 1-D tables of the same length (at least 2)")
+        if np.any(dynamic > static):
+            raise ValueError("dynamic friction must not exceed static friction")
+        self.static = static
+        self.dynamic = dynamic
+        self.x_min = float(x_min)
+        self.x_max = float(x_max if x_max is not None else x_min + len(static) - 1)
+        self.periodic = periodic
+        self.name = name
+        self.size = len(static)
+        self.inv_dx = (self.size - 1) / (self.x_max - self.x_min)
+        # Python lists: indexing them is cheaper than indexing NumPy arrays for one scalar per tick
+        self._static = static.tolist()
+        self._dynamic = dynamic.tolist()
+
+    @classmethod
+    def from_samples(cls, positions, static, dynamic, resolution=0.01, **kwargs):
+        """Resample friction measured at arbitrary (increasing) positions into a uniform table."""
+        positions = np.asarray(positions, dtype=float)
+        x = np.arange(positions[0], positions[-1] + resolution / 2, resolution)
+        return cls(np.interp(x, positions, static), np.interp(x, positions, dynamic),
+                   x_min=x[0], x_max=x[-1], **kwargs)
+
+    def lookup(self, x):
+        """(static, dynamic) friction at surface position x."""
+        f = (x - self.x_min) * self.inv_dx
+        last = self.size - 1
+        if self.periodic:
+            f %= last
+        elif f <= 0:
+            return self._static[0], self._dynamic[0]
+        elif f >= last:
+            return self._static[last], self._dynamic[last]
+        i = int(f)
+        frac = f - i
+        s, d = self._static, self._dynamic
+        return s[i] + (s[i + 1] - s[i]) * frac, d[i] + (d[i + 1] - d[i]) * frac
+
+    def lookup_array(self, x):
+        """Vectorized lookup for plotting and offline analysis."""
+        x = np.asarray(x, dtype=float)
+        if self.periodic:
+            x = self.x_min + np.mod(x - self.x_min, self.x_max - self.x_min)
+        grid = np.linspace(self.x_min, self.x_max, self.size)
+        return np.interp(x, grid, self.static), np.interp(x, grid, self.dynamic)
+
+    def save(self, path):
+        np.savez(path, static=self.static, dynamic=self.dynamic, x_min=self.x_min, x_max=self.x_max,
+                 periodic=self.periodic)
+
+
+def load_texture(path, length=40.0, static_range=(0.4, 1.2), dynamic_ratio=0.5, resolution=0.01, periodic=False):
+    """Load a friction texture from a file.
+
+    .npz: arrays `static` and `dynamic`, plus either `position` (any spacing,
+    resampled) or `x_min`/`x_max` (already uniform).
+    .csv: columns position (mm), static (N), dynamic (N) with a header row.
+    Images (.png, ...): the brightness of each column, averaged over the
+    rows, maps to static friction in static_range along `length` mm;
+    dynamic friction is dynamic_ratio times the static friction.
+    """
+    name = os.path.splitext(os.path.basename(path))[0]
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".npz":
+        data = np.load(path)
+        if "position" in data:
+            return FrictionTexture.from_samples(data["position"], data["static"], data["dynamic"], resolution,
+                                                periodic=periodic, name=name)
+        return FrictionTexture(data["static"], data["dynamic"], float(data["x_min"]), float(data["x_max"]),
+                               periodic=bool(data["periodic"]) if "periodic" in data else periodic, name=name)
+    if ext == ".csv":
+        position, static, dynamic = np.loadtxt(path, delimiter=",", skiprows=1, unpack=True)
+        return FrictionTexture.from_samples(position, static, dynamic, resolution, periodic=periodic, name=name)
+
+    import matplotlib.pyplot as plt
+    image = np.asarray(plt.imread(path), dtype=float)
+    if image.ndim == 3:
+        image = image[..., :3].mean(axis=2)
+    if image.max() > 1:
+        image = image / 255.0
+    brightness = image.mean(axis=0)
+    positions = np.linspace(0, length, len(brightness))
+    static = static_range[0] + brightness * (static_range[1] - static_range[0])
+    return FrictionTexture.from_samples(positions, static, static * dynamic_ratio, resolution,
+                                        periodic=periodic, name=name)
+
+
+# === Texture gallery (all precomputed into lookup tables) ===
+
+def uniform(static=0.8, dynamic=0.4, length=40.0, resolution=0.01):
+    n = int(round(length / resolution)) + 1
+    return FrictionTexture(np.full(n, static), np.full(n, dynamic), 0.0, length, name="uniform")
+
+
+def ridges(period=4.0, width=1.0, base=(0.8, 0.4), peak=(1.2, 0.8), length=40.0, resolution=0.01):
+    """Raised-cosine ridges `width` mm wide every `period` mm."""
+    x = np.arange(0, length + resolution / 2, resolution)
+    d = np.abs((x % period) - period / 2)
+    bump = np.where(d < width / 2, 0.5 * (1 + np.cos(2 * np.pi * d / width)), 0.0)
+    return FrictionTexture(base[0] + bump * (peak[0] - base[0]), base[1] + bump * (peak[1] - base[1]),
+                           0.0, x[-1], periodic=True, name="ridges")
+
+
+def patches(edges=(0, 8, 16, 24, 32, 40), levels=((0.8, 0.4), (0.5, 0.2), (1.1, 0.7), (0.6, 0.5), (1.0, 0.3)),
+            blend=0.2, resolution=0.01):
+    """Piecewise-constant patches with `blend` mm linear transitions."""
+    x = np.arange(edges[0], edges[-1] + resolution / 2, resolution)
+    static = np.full_like(x, levels[0][0])
+    dynamic = np.full_like(x, levels[0][1])
+    for edge, (prev, level) in zip(edges[1:-1], zip(levels, levels[1:])):
+        w = np.clip((x - edge) / blend + 0.5, 0, 1)
+        static += w * (level[0] - prev[0])
+        dynamic += w * (level[1] - prev[1])
+    return FrictionTexture(static, dynamic, x[0], x[-1], name="patches")
+
+
+def gradient(start=(1.2, 0.6), end=(0.4, 0.2), length=40.0, resolution=0.01):
+    x = np.arange(0, length + resolution / 2, resolution)
+    w = x / length
+    return FrictionTexture(start[0] + w * (end[0] - start[0]), start[1] + w * (end[1] - start[1]),
+                           0.0, x[-1], name="gradient")
+
+
+TEXTURES = {"uniform": uniform, "ridges": ridges, "patches": patches, "gradient": gradient}
+
+
+def make_texture(spec):
+    """A gallery texture by name, or a texture file by path."""
+    if spec in TEXTURES:
+        return TEXTURES[spec]()
+    return load_texture(spec)
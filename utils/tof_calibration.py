@@ -0,0 +1,184 @@
+import os
+import re
+
+import numpy as np
+
+DEFAULT_PATH = "assets/tof_calibration.npz"
+
+# Largest raw reading (mm) each sensor reports; the tables cover 0..MAX_RAW
+MAX_RAW = {"VL6180": 255, "VL53L0X": 2047}
+
+# tof_raw.py run names: raw_<true distance mm>_<window>, the window in ms or as "<n>sample"
+RUN_NAME = re.compile(r"^raw_(\d+)_(\d+|\d+sample)$")
+
+
+def parse_runs(raw_data):
+    """{window: (true mm, raw mm)} sample arrays from a tof_raw.py-style dict of runs."""
+    runs = {}
+    for name, values in raw_data.items():
+        match = RUN_NAME.match(name)
+        if not match or not values:
+            continue
+        window = match.group(2)
+        true, raw = runs.setdefault(window, ([], []))
+        true.append(np.full(len(values), float(match.group(1))))
+        raw.append(np.asarray(values, dtype=float))
+    return {window: (np.concatenate(true), np.concatenate(raw)) for window, (true, raw) in runs.items()}
+
+
+def cross_validate_degree(true, raw, degrees=(1, 2, 3)):
+    """Leave-one-distance-out RMS error (mm) of each polynomial degree; a distance is never fitted to itself."""
+    distances = np.unique(true)
+    errors = {}
+    for degree in degrees:
+        if degree > len(distances) - 2:
+            continue
+        sq, n = 0.0, 0
+        for d in distances:
+            held = true == d
+            coeffs = np.polyfit(raw[~held], true[~held], degree)
+            sq += float(np.sum((np.polyval(coeffs, raw[held]) - d) ** 2))
+            n += int(held.sum())
+        errors[degree] = (sq / n) ** 0.5
+    return errors
+
+
+class ToFTable:
+    """Raw -> true distance for one ToF sensor at one window setting, compiled into a lookup table.
+
+    coeffs: polynomial (np.polyval order) from the raw reading to the true
+    distance, fitted over raw_range. It is evaluated once for every whole
+    raw millimetre 0..max_raw; outside raw_range the offset at the nearest
+    end is kept instead of extrapolating the polynomial, and distances stay
+    non-negative. The sensors report whole millimetres, so correct() is one
+    list index; fractional readings (window averages) interpolate between
+    two entries, still O(1).
+    """
+
+    def __init__(self, sensor, window, coeffs, raw_range, max_raw=None, table=None):
+        self.sensor = str(sensor)
+        self.window = str(window)
+        self.coeffs = np.asarray(coeffs, dtype=float)
+        self.raw_range = (float(raw_range[0]), float(raw_range[1]))
+        self.max_raw = int(max_raw if max_raw is not None else MAX_RAW.get(self.sensor, 255))
+        if table is None:
+            raw = np.arange(self.max_raw + 1, dtype=float)
+            lo, hi = self.raw_range
+            clipped = np.clip(raw, lo, hi)
+            table = np.maximum(np.polyval(self.coeffs, clipped) + (raw - clipped), 0.0)
+        if len(table) != self.max_raw + 1:
+            raise ValueError(f"table must have one entry per raw reading 0..{self.max_raw}")
+        self.table = np.asarray(table, dtype=np.float32)
+        # Python lists: indexing them is cheaper than indexing NumPy arrays for one scalar per sample
+        self._table = self.table.astype(float).tolist()
+        self._slope = np.diff(self.table.astype(float), append=self.table[-1] + 1.0).tolist()
+
+    @classmethod
+    def identity(cls, sensor="VL6180", window="none"):
+        """No correction, for sensors without a calibration."""
+        max_raw = MAX_RAW.get(sensor, 255)
+        return cls(sensor, window, [1.0, 0.0], (0, max_raw), max_raw)
+
+    @classmethod
+    def fit(cls, sensor, window, true, raw, degree=2, max_raw=None):
+        """Least-squares polynomial of the true distance on the raw reading, over every sample at once."""
+        true = np.asarray(true, dtype=float)
+        raw = np.asarray(raw, dtype=float)
+        degree = min(degree, len(np.unique(true)) - 1)
+        return cls(sensor, window, np.polyfit(raw, true, degree), (raw.min(), raw.max()), max_raw)
+
+    def correct(self, raw):
+        """True distance (mm) for one raw reading."""
+        i = int(raw)
+        if 0 <= i < self.max_raw:
+            return self._table[i] if i == raw else self._table[i] + (raw - i) * self._slope[i]
+        return self._table[0] if raw < 0 else self._table[-1] + (raw - self.max_raw)
+
+    def correct_array(self, raw):
+        """Vectorized correct() for whole arrays of readings."""
+        raw = np.asarray(raw, dtype=float)
+        i = np.clip(raw.astype(np.intp), 0, self.max_raw)
+        frac = np.clip(raw, 0, None) - i
+        return self.table[i] + frac * np.asarray(self._slope, dtype=np.float32)[i]
+
+
+def _key(sensor, window):
+    return f"{sensor}@{window}"
+
+
+def save_tof_tables(tables, path=DEFAULT_PATH):
+    """Store tables in path, replacing those of the same sensor and window and keeping the others."""
+    stored = load_tof_tables(path) if os.path.exists(path) else {}
+    stored.update({(t.sensor, t.window): t for t in tables})
+    arrays = {}
+    for t in stored.values():
+        key = _key(t.sensor, t.window)
+        arrays[f"{key}/coeffs"] = t.coeffs
+        arrays[f"{key}/raw_range"] = np.array(t.raw_range)
+        arrays[f"{key}/table"] = t.table
+    np.savez(path, **arrays)
+
+
+def load_tof_tables(path=DEFAULT_PATH):
+    """{(sensor, window): ToFTable} of every table stored in path."""
+    data = np.load(path)
+    tables = {}
+    for name in data.files:
+        key, field = name.rsplit("/", 1)
+        if field != "table":
+            continue
+        sensor, window = key.split("@", 1)
+        table = data[name]
+        tables[(sensor, window)] = ToFTable(sensor, window, data[f"{key}/coeffs"], data[f"{key}/raw_range"],
+                                            len(table) - 1, table)
+    return tables
+
+
+def load_tof_table(sensor, window, path=DEFAULT_PATH):
+    """The table for this sensor and window, or no correction when path holds no calibration at all.
+
+    A calibration file without this sensor and window is an error rather
+    than silently falling back.
+    """
+    if not os.path.exists(path):
+        return ToFTable.identity(sensor, str(window))
+    tables = load_tof_tables(path)
+    if (sensor, str(window)) not in tables:
+        available = ", ".join(f"{s} {w}" for s, w in sorted(tables))
+        raise ValueError(f"{path} has no table for {sensor} window {window} (has: {available})")
+    return tables[(sensor, str(window))]
+
+
+class ToFReader:
+    """Live ToF position source: a sensor driver's range reading through a calibration table.
+
+    device is anything with a .range attribute in mm (the Adafruit VL6180X
+    and VL53L0X drivers); .value reads and corrects one sample, like the
+    potentiometer's AnalogIn.value.
+    """
+
+    def __init__(self, device, table):
+        self.device = device
+        self.table = table
+        self._correct = table.correct
+
+    @property
+    def value(self):
+        return self._correct(self.device.range)
+
+
+def open_tof(sensor="VL6180", window="15", path=DEFAULT_PATH):
+    """ToFReader on the I2C bus with the stored table for this sensor and window."""
+    import board
+    import busio
+
+    i2c = busio.I2C(board.SCL, board.SDA)
+    if sensor == "VL6180":
+        import adafruit_vl6180x
+        device = adafruit_vl6180x.VL6180X(i2c)
+    elif sensor == "VL53L0X":
+        import adafruit_vl53l0x
+        device = adafruit_vl53l0x.VL53L0X(i2c)
+    else:
+        raise ValueError(f"Unknown ToF sensor {sensor!r} (expected one of {', '.join(MAX_RAW)})")
+    return ToFReader(device, load_tof_table(sensor, window, path))
@@ -0,0 +1,249 @@
+import json
+import os
+import re
+import sqlite3
+
+import numpy as np
+
+from utils.controller import TUNABLE_GAINS
+from utils.metrics import TrialMetrics
+
+DEFAULT_PATH = "logs/trial_index.sqlite"
+SUMMARIES = "trial_summaries.jsonl"
+
+# Indexed columns; every other field of a summary line is kept in the meta JSON
+COLUMNS = {
+    "log": "TEXT PRIMARY KEY",  # absolute path of the trial CSV
+    "session": "TEXT",  # directory of the CSV
+    "trial": "INTEGER",
+    "start_time": "REAL",
+    "device_id": "TEXT",  # potentiometer calibration
+    "model_version": "TEXT",  # hash of the servo model coefficients
+    "model_history": "INTEGER",
+    "scene": "TEXT",
+    "texture": "TEXT",
+    "cusum_slip": "REAL",
+    "maxStaticFriction": "REAL",
+    "dynamicFriction": "REAL",
+    "delta_v": "REAL",
+    **{name: "REAL" for name in TUNABLE_GAINS},
+    # Timing, from the CSV
+    "ticks": "INTEGER",
+    "duration_s": "REAL",
+    "dt_mean": "REAL",
+    "dt_p99": "REAL",
+    "dt_max": "REAL",
+    # Quality, from the summary line or recomputed from the CSV
+    "stick_rms_error_N": "REAL",
+    "stick_peak_error_N": "REAL",
+    "stick_in_band_fraction": "REAL",
+    "slip_rms_error_N": "REAL",
+    "slip_peak_error_N": "REAL",
+    "slip_in_band_fraction": "REAL",
+    "slip_latency_s": "REAL",
+    "mtime": "REAL",
+    "size": "INTEGER",
+    "meta": "TEXT",
+}
+QUALITY = [name for name in COLUMNS if name.startswith(("stick_", "slip_"))]
+# Single columns, plus the gain / friction-level pairs most queries combine
+INDEXED = ("maxStaticFriction", "dynamicFriction", "Kp", "Kd", "device_id", "model_version", "session",
+           "start_time", "stick_rms_error_N", ("Kd", "maxStaticFriction"), ("Kp", "maxStaticFriction"))
+
+FILTER = re.compile(r"^\s*(\w+)\s*(<=|>=|!=|=|<|>)\s*(.*?)\s*$")
+
+
+def flatten(summary):
+    """Index columns of one trial_summaries.jsonl line (the per-phase dicts become <phase>_<field>)."""
+    row = {}
+    for key, value in summary.items():
+        if isinstance(value, dict) and key in ("calibration", "stick", "slip"):
+            row.update({f"{key}_{k}": v for k, v in value.items() if f"{key}_{k}" in COLUMNS})
+        elif key in COLUMNS and key != "log":
+            row[key] = value
+    row["meta"] = json.dumps(summary)
+    return row
+
+
+def log_stats(path):
+    """Timing statistics and, when the log has no summary line, quality metrics of one trial CSV."""
+    try:
+        rows = np.loadtxt(path, delimiter=",", skiprows=1, ndmin=2)
+    except ValueError:
+        return {}
+    if len(rows) == 0 or rows.shape[1] < 6:
+        return {}
+    t = rows[:, 0]
+    dt = np.diff(t)
+    row = {"ticks": len(t), "duration_s": float(t[-1] - t[0])}
+    if len(dt):
+        row.update(dt_mean=float(dt.mean()), dt_p99=float(np.percentile(dt, 99)), dt_max=float(dt.max()))
+    summary = TrialMetrics.from_log(rows.tolist()).summary()
+    row.update({k: v for k, v in flatten(summary).items() if k in QUALITY})
+    return row
+
+
+def parse_value(text):
+    try:
+        return float(text)
+    except ValueError:
+        return None if text in ("None", "null") else text
+
+
+def parse_filter(text):
+    """"Kd=0.02" or "stick_rms_error_N<0.05" -> (column, operator, value)."""
+    match = FILTER.match(text)
+    if not match or match.group(1) not in COLUMNS:
+        raise ValueError(f"Bad filter {text!r}: expected <column><op><value> with a column from {', '.join(COLUMNS)}")
+    return match.group(1), match.group(2), parse_value(match.group(3))
+
+
+class TrialIndex:
+    """SQLite index of every trial under a log directory.
+
+    update() reads the trial_summaries.jsonl lines written since the last
+    update (it keeps a byte offset per summaries file) and the CSV logs that
+    are new or changed since (by mtime and size), so re-indexing after a
+    session costs only that session. Parameters, device ID and model
+    version come from the summary lines; timing statistics come from the
+    CSV, which also provides the quality metrics of logs written without a
+    summary line. The common query columns are indexed, so filtering tens
+    of thousands of trials takes a few milliseconds.
+    """
+
+    def __init__(self, path=DEFAULT_PATH, log_dir=None):
+        self.path = path
+        self.log_dir = log_dir if log_dir is not None else os.path.dirname(path) or "."
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.db = sqlite3.connect(path)
+        self.db.row_factory = sqlite3.Row
+        self.db.execute(f"CREATE TABLE IF NOT EXISTS trials ({', '.join(f'{k} {v}' for k, v in COLUMNS.items())})")
+        self.db.execute("CREATE TABLE IF NOT EXISTS sources (path TEXT PRIMARY KEY, offset INTEGER)")
+        known = {row[1] for row in self.db.execute("PRAGMA table_info(trials)")}
+        for name in COLUMNS.keys() - known:
+            self.db.execute(f"ALTER TABLE trials ADD COLUMN {name} {COLUMNS[name]}")
+        for columns in INDEXED:
+            columns = (columns,) if isinstance(columns, str) else columns
+            self.db.execute(f"CREATE INDEX IF NOT EXISTS trials_{'_'.join(columns)} ON trials ({', '.join(columns)})")
+        self.db.commit()
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def upsert(self, log, row, keep=()):
+        """Insert or update the trial of `log`; columns in `keep` are only filled where still NULL."""
+        names = list(row)
+        updates = ", ".join(f"{n} = COALESCE(trials.{n}, excluded.{n})" if n in keep else f"{n} = excluded.{n}"
+                            for n in names)
+        self.db.execute(f"INSERT INTO trials (log, {', '.join(names)}) VALUES (?{', ?' * len(names)}) "
+                        f"ON CONFLICT(log) DO {'UPDATE SET ' + updates if names else 'NOTHING'}",
+                        [log, *row.values()])
+
+    def update(self):
+        """Index what changed under log_dir since the last update; returns (summary lines, CSV logs) read."""
+        summaries, csvs = [], {}
+        for directory, dirs, files in os.walk(self.log_dir):
+            dirs[:] = [d for d in dirs if not d.endswith(".lod")]
+            for name in files:
+                path = os.path.abspath(os.path.join(directory, name))
+                if name == SUMMARIES:
+                    summaries.append(path)
+                elif name.endswith(".csv"):
+                    csvs[path] = os.stat(path)
+
+        lines = sum(self._read_summaries(path) for path in summaries)
+
+        known = {row[0]: (row[1], row[2]) for row in self.db.execute("SELECT log, mtime, size FROM trials")}
+        changed = [path for path, st in csvs.items() if known.get(path) != (st.st_mtime, st.st_size)]
+        for path in changed:
+            st = csvs[path]
+            row = {"session": os.path.basename(os.path.dirname(path)), **log_stats(path),
+                   "mtime": st.st_mtime, "size": st.st_size}
+            self.upsert(path, row, keep=QUALITY + ["session"])
+        self.db.commit()
+        return lines, len(changed)
+
+    def _read_summaries(self, path):
+        row = self.db.execute("SELECT offset FROM sources WHERE path = ?", (path,)).fetchone()
+        offset = row[0] if row else 0
+        if os.path.getsize(path) < offset:
+            offset = 0  # rewritten
+        count = 0
+        with open(path, "rb") as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # still being written
+                offset += len(line)
+                if not line.strip():
+                    continue
+                summary = json.loads(line)
+                log = self._resolve(summary["log"], os.path.dirname(path))
+                self.upsert(log, {"session": os.path.basename(os.path.dirname(log)), **flatten(summary)})
+                count += 1
+        self.db.execute("INSERT OR REPLACE INTO sources (path, offset) VALUES (?, ?)", (path, offset))
+        return count
+
+    @staticmethod
+    def _resolve(log, summaries_dir):
+        """Absolute path of a logged CSV path: as given, or relative to the directory of the summaries."""
+        if os.path.isabs(log) or os.path.exists(log):
+            return os.path.abspath(log)
+        parts = os.path.normpath(log).split(os.sep)
+        for i in range(1, len(parts)):
+            candidate = os.path.join(summaries_dir, *parts[i:])
+            if os.path.exists(candidate):
+                return candidate
+        return os.path.join(summaries_dir, *parts[1:]) if len(parts) > 1 else os.path.abspath(log)
+
+    def query(self, *filters, where=None, params=(), order_by="start_time", limit=None, **equals):
+        """Trials matching all filters, as dicts.
+
+        filters are (column, op, value) tuples or "Kd=0.02"-style strings,
+        equals are column=value keywords, where is extra raw SQL with its
+        params. Parameters are stored as logged, so Kd=0.02 matches exactly.
+        """
+        clauses, values = [], []
+        for f in [*filters, *((k, "=", v) for k, v in equals.items())]:
+            column, op, value = parse_filter(f) if isinstance(f, str) else f
+            if column not in COLUMNS:
+                raise ValueError(f"Unknown column {column!r}")
+            if value is None:
+                clauses.append(f"{column} IS {'NOT ' if op == '!=' else ''}NULL")
+            else:
+                clauses.append(f"{column} {op} ?")
+                values.append(value)
+        if where:
+            clauses.append(f"({where})")
+            values += list(params)
+        if order_by.lstrip("-") not in COLUMNS:
+            raise ValueError(f"Unknown column {order_by!r}")
+        sql = "SELECT * FROM trials"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += f" ORDER BY {order_by.lstrip('-')}{' DESC' if order_by.startswith('-') else ''}"
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+        return [dict(row) for row in self.db.execute(sql, values)]
+
+    def logs(self, *filters, **kwargs):
+        """CSV paths of the matching trials, ready for the plotting tools."""
+        return [row["log"] for row in self.query(*filters, **kwargs)]
+
+    def __len__(self):
+        return self.db.execute("SELECT COUNT(*) FROM trials").fetchone()[0]
+
+
+def latest_log(*filters, index_path=DEFAULT_PATH):
+    """Most recent trial CSV matching the filters, after bringing the index up to date (None if none match)."""
+    with TrialIndex(index_path) as index:
+        index.update()
+        rows = index.query(*filters, order_by="-mtime", limit=1)
+    return rows[0]["log"] if rows else None